@@ -4,15 +4,27 @@ sys.path.insert(0, str(Path(__file__).resolve().parent))
 
 
 import json
+import re
+import uuid
 from pathlib import Path
 import streamlit as st
-import pandas as pd
 
-from src.config import get_settings, init_openai_client
-from src.parsing import extract_text_from_upload
-from src.analyzer import analyze_resume_against_jd, ask_followup
+from src.config import get_settings, init_openai_client, semantic_cache
+from src.client import registry_stats
+from src.ratelimit import rate_limit_stats
+from src.cache import get_result_cache
+from src.compaction import STATS as compaction_stats
+from src.tracing import configure as configure_tracing, span, summarize_file, to_prometheus, trace
+from src.parsing import extract_document_from_upload
+from src.analyzer import analyze_resume_against_jd, ask_followup, run_analysis
+from src.cascade import AUTO_MODEL, analyze_with_cascade, cascade_stats, parse_tiers
+from src.keywords import merge_keyword_fields
+from src.heuristics import local_heuristic_fields, merge_heuristic_fields
+from src.incremental import reanalyze_incremental, section_keyword_fields
+from src.retrieval import get_followup_index
+from src.history import AnalysisHistory, AnalysisRecord, get_history
 from src.rewrite import generate_rewrites
-from src.utils import badge, severity_color, safe_json, make_markdown_report
+from src.utils import badge, iter_html_report, severity_color, safe_json, make_markdown_report
 
 st.set_page_config(
     page_title="ATS ChatGPT — Smart Resume vs JD",
@@ -30,18 +42,107 @@ plus AI-tailored bullets & summary. Designed to be brighter, stricter, and more
 """, unsafe_allow_html=True)
 
 settings = get_settings()
+configure_tracing(settings.METRICS_PATH or None)
+result_cache = get_result_cache(
+    settings.CACHE_PATH,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CACHE_TTL_SECONDS,
+)
+HISTORY_ID_RE = re.compile(r"[A-Za-z0-9_-]{8,64}")
+
+def _history_owner() -> str:
+    """
+    Whose history this session lists: ATS_HISTORY_OWNER when configured, else the id in the
+    page's ?history= link (created on first visit), so a reload, a bookmark or a server
+    restart finds the same saved analyses.
+    """
+    if settings.HISTORY_OWNER:
+        return settings.HISTORY_OWNER
+    linked = st.query_params.get("history", "")
+    owner = linked if HISTORY_ID_RE.fullmatch(linked) else st.session_state.get("history_owner") or uuid.uuid4().hex
+    st.session_state["history_owner"] = owner
+    if settings.HISTORY_PATH and linked != owner:
+        st.query_params["history"] = owner
+    return owner
+
+# rows are tagged with their owner and a session only lists its owner's analyses.
+# Without ATS_HISTORY_PATH the history lives in memory for the session only.
+history_owner = _history_owner()
+if settings.HISTORY_PATH:
+    history = get_history(settings.HISTORY_PATH)
+else:
+    if "session_history" not in st.session_state:
+        st.session_state["session_history"] = AnalysisHistory(":memory:", max_entries=50)
+    history = st.session_state["session_history"]
+answer_cache = semantic_cache(settings)
 
 with st.sidebar:
     st.header("⚙️ Settings")
     st.caption("Configure model/temperature and (optionally) override API key.")
+    cascade_tiers = parse_tiers(settings.CASCADE_MODELS)
     model = st.selectbox(
         "OpenAI Model",
-        ["gpt-4o-mini", "gpt-4o", "gpt-4.1-mini"],
-        index=0
+        ["gpt-4o-mini", "gpt-4o", "gpt-4.1-mini", AUTO_MODEL],
+        index=0,
+        format_func=lambda m: f"Auto ({' → '.join(cascade_tiers)})" if m == AUTO_MODEL else m,
+        help="Auto runs the cheapest model first and escalates only when its analysis fails the "
+             "validity/consistency checks or lands near the decision threshold.",
     )
+    auto_route = model == AUTO_MODEL
+    if auto_route:
+        model = cascade_tiers[0]  # the cheapest tier stands in wherever one model is needed
     temperature = st.slider("Temperature", 0.0, 1.0, 0.2, 0.05)
     api_key_override = st.text_input("OPENAI_API_KEY (optional)", type="password")
 
+    st.write("---")
+    st.write("**Result cache**")
+    use_cache = st.checkbox("Reuse cached analyses", value=True)
+    force_refresh = st.checkbox("Force refresh (re-run and overwrite cache)", value=False, disabled=not use_cache)
+    cache_stats = result_cache.stats()
+    st.caption(
+        f"{cache_stats['entries']} cached • {cache_stats['hits']} hits • {cache_stats['misses']} misses"
+    )
+    if answer_cache is not None:
+        answer_stats = answer_cache.stats()
+        st.caption(
+            f"Similar questions/goals: {answer_stats['entries']} cached • "
+            f"{answer_stats['hit_rate']:.0%} hit rate"
+        )
+    if st.button("Clear cache"):
+        result_cache.clear()
+        if answer_cache is not None:
+            answer_cache.clear()
+        st.rerun()
+    stream_results = st.checkbox("Stream results as they are generated", value=True)
+    decomposed = st.checkbox(
+        "Parallel sub-analyses", value=False,
+        help="Split the analysis into 4 smaller prompts run concurrently: faster, slightly more input tokens."
+    )
+    incremental_reanalysis = st.checkbox(
+        "Incremental re-analysis", value=True,
+        help="When only the resume changed since the last analysis, re-score just the edited sections."
+    )
+
+    past = history.list(history_owner, limit=50)
+    if past:
+        st.write("---")
+        st.write("**🕘 History**")
+        picked = st.selectbox(
+            "Past analyses", past, format_func=lambda r: r.title, label_visibility="collapsed"
+        )
+        if st.button("Load analysis", use_container_width=True):
+            st.session_state["analysis"] = history.get(picked.id, history_owner)
+            st.session_state["rewrites"] = []
+            st.session_state["qa"] = []
+            st.rerun()
+
+    st.write("---")
+    st.write("**Input compaction**")
+    st.caption(
+        f"Budgets: resume {settings.RESUME_TOKEN_BUDGET} / JD {settings.JD_TOKEN_BUDGET} tokens • "
+        f"saved {compaction_stats.tokens_saved:,} of {compaction_stats.tokens_before:,} input tokens so far"
+    )
+
     st.write("---")
     st.write("**Tips**")
     st.caption("• Keep resume to 1–2 pages. • Paste the full JD. • Use ‘Follow-up Q&A’ to iterate.")
@@ -54,12 +155,29 @@ with col1:
     resume_file = st.file_uploader("Upload resume (PDF/DOCX/TXT)", type=["pdf", "docx", "txt"])
     resume_text = ""
     if resume_file:
-        with st.spinner("Extracting text from resume..."):
-            resume_text = extract_text_from_upload(resume_file)
-        if not resume_text.strip():
+        with st.spinner("Extracting text from resume..."), trace("extract") as extract_trace:
+            resume_doc = extract_document_from_upload(resume_file)
+            resume_text = resume_doc.text
+            extract_trace.persist = not resume_doc.from_cache
+        if not resume_doc.from_cache:
+            st.session_state["last_extract_trace"] = extract_trace.to_dict()
+        if resume_doc.timed_out:
+            st.error("Text extraction timed out. The PDF may be malformed or very large.")
+        elif not resume_text.strip():
             st.error("Could not extract text from the uploaded resume. Please check the file.")
         else:
             st.success(f"Extracted ~{len(resume_text)} characters from resume.")
+            timing = "cached" if resume_doc.from_cache else f"{resume_doc.elapsed:.2f}s"
+            slowest = resume_doc.slowest_page
+            st.caption(
+                f"{len(resume_doc.pages)} page(s) • {timing}"
+                + (f" • slowest page {slowest[0]}: {slowest[1]:.2f}s" if slowest and len(resume_doc.pages) > 1 else "")
+            )
+            if resume_doc.truncated:
+                st.warning(f"Only the first {len(resume_doc.pages)} of {resume_doc.page_count} pages were read.")
+            if resume_doc.page_errors:
+                st.warning("Could not read page(s) " + ", ".join(map(str, resume_doc.page_errors))
+                           + "; the analysis uses the other pages.")
 
 with col2:
     st.subheader("🧾 Job Description")
@@ -75,204 +193,524 @@ with col2:
 
 analyze_clicked = st.button("🚀 Analyze Resume vs JD", type="primary", use_container_width=True)
 
+# --------------------------- Section Renderers ---------------------------
+# Each renderer draws one block from a (possibly partial) analysis dict, so the
+# streaming path can redraw a block as soon as its fields arrive.
+OVERVIEW_FIELDS = {"ats_score_overall", "role_title_inferred", "hard_requirements", "red_flags"}
+SCORES_FIELDS = {"section_scores", "formatting_issues", "unquantified_bullets"}
+KEYWORD_FIELDS = {"missing_nice_to_have_keywords"}
+RECOMMENDATION_FIELDS = {"recommendations"}
+TAILORED_FIELDS = {"tailored_summary", "tailored_bullets", "top_action_verbs"}
+
+def render_overview(data: dict):
+    st.subheader("📊 ATS Overview")
+
+    score = data.get("ats_score_overall", 0)
+    colA, colB, colC = st.columns([1, 2, 2])
+    with colA:
+        if "ats_score_overall" in data:
+            st.metric("ATS Score", f"{round(score)} / 100")
+            st.progress(min(max(score / 100, 0), 1))
+        else:
+            st.caption("Scoring...")
+
+    with colB:
+        role = data.get("role_title_inferred", "")
+        hard_req = data.get("hard_requirements", {})
+        met = hard_req.get("met", False)
+        details = hard_req.get("details", [])
+        st.markdown(f"**Target role inferred:** `{role or '—'}`")
+        if "hard_requirements" in data:
+            st.markdown(f"**Hard requirements met?** {'✅ Yes' if met else '❌ No'}")
+        if details:
+            st.caption("Hard requirement checks:")
+            for d in details:
+                st.write(f"- {d}")
+
+    with colC:
+        red_flags = data.get("red_flags", [])
+        if red_flags:
+            st.markdown("**⚠️ Potential red flags**")
+            for rf in red_flags:
+                st.write(f"- {rf}")
+        elif "red_flags" in data:
+            st.markdown("**No major red flags detected.**")
+
+def render_section_scores(data: dict):
+    st.write("---")
+    st.subheader("🧩 Section Scores")
+    sec = data.get("section_scores", {})
+    if sec:
+        import pandas as pd  # loaded on first table, not at startup
+
+        df_scores = pd.DataFrame(
+            [{"Section": k, "Score": v} for k, v in sec.items()]
+        ).sort_values("Score", ascending=False)
+        st.dataframe(df_scores, use_container_width=True)
+        st.caption("ImpactQuantification and FormattingATS are computed locally from the parsed resume.")
+    else:
+        st.caption("Waiting for section scores...")
+
+    issues = data.get("formatting_issues", [])
+    if issues:
+        st.markdown("**Formatting & impact checks**")
+        for issue in issues:
+            st.write(f"- {issue}")
+    unquantified = data.get("unquantified_bullets", [])
+    if unquantified:
+        with st.expander("Bullets without numbers"):
+            for b in unquantified:
+                st.write(f"- {b}")
+
+def render_keywords(data: dict):
+    st.write("---")
+    st.subheader("🔑 Keywords & Alignment")
+
+    colk1, colk2 = st.columns(2)
+    matched = data.get("matched_keywords", [])
+    missing_critical = data.get("missing_critical_keywords", [])
+    missing_nice = data.get("missing_nice_to_have_keywords", [])
+    density = data.get("keyword_density", [])
+
+    with colk1:
+        st.markdown("**Matched (Resume ∩ JD)**")
+        if matched:
+            st.write(", ".join(matched))
+        else:
+            st.caption("No explicit matches found (may be phrased differently).")
+
+        st.markdown("**Missing — Critical**")
+        if missing_critical:
+            st.error(", ".join(missing_critical))
+        else:
+            st.success("No critical keywords missing.")
+
+        st.markdown("**Missing — Nice to have**")
+        if missing_nice:
+            st.warning(", ".join(missing_nice))
+        elif "missing_nice_to_have_keywords" in data:
+            st.success("All nice-to-have keywords present.")
+        else:
+            st.caption("Waiting for the model...")
+
+    with colk2:
+        st.markdown("**Keyword Density (Resume vs JD)**")
+        if density:
+            import pandas as pd
+
+            df_kd = pd.DataFrame(density)
+            df_kd = df_kd.rename(columns={
+                "keyword": "Keyword",
+                "resume_freq": "Resume Freq",
+                "jd_freq": "JD Freq"
+            })
+            st.dataframe(df_kd, use_container_width=True)
+        else:
+            st.caption("No density table produced.")
+
+def render_recommendations(data: dict):
+    st.write("---")
+    st.subheader("🛠️ Recommendations & Example Rewrites")
+
+    recs = data.get("recommendations", [])
+    if recs:
+        for r in recs:
+            area = r.get("area", "General")
+            sev = r.get("severity", "med")
+            sug = r.get("suggestion", "")
+            exr = r.get("example_rewrite", "")
+            st.markdown(
+                f"{badge(area)}  {badge(sev.upper(), color=severity_color(sev))}  \n\n{sug}"
+                , unsafe_allow_html=True
+            )
+            if exr:
+                with st.expander("Example rewrite"):
+                    st.write(exr)
+    elif "recommendations" in data:
+        st.caption("No recommendations produced.")
+    else:
+        st.caption("Waiting for recommendations...")
+
+def render_tailored(data: dict):
+    st.write("---")
+    st.subheader("✨ Tailored Summary & Bullet Suggestions")
+    ts = data.get("tailored_summary", "")
+    tb = data.get("tailored_bullets", [])
+    verbs = data.get("top_action_verbs", [])
+
+    if ts:
+        st.markdown("**Tailored Professional Summary**")
+        st.write(ts)
+
+    if tb:
+        st.markdown("**High-impact Bullet Suggestions**")
+        for i, bullet in enumerate(tb, 1):
+            st.write(f"{i}. {bullet}")
+
+    if verbs:
+        st.caption("Suggested action verbs to diversify your bullets:")
+        st.write(", ".join(verbs))
+
+SECTIONS = [
+    (OVERVIEW_FIELDS, render_overview),
+    (SCORES_FIELDS, render_section_scores),
+    (KEYWORD_FIELDS, render_keywords),
+    (RECOMMENDATION_FIELDS, render_recommendations),
+    (TAILORED_FIELDS, render_tailored),
+]
+
 # --------------------------- Run Analysis ---------------------------
+just_analyzed = False
 if analyze_clicked:
     if not resume_text.strip() or not jd_text.strip():
         st.error("Please provide both a resume and a job description.")
     else:
-        client = init_openai_client(api_key_override or settings.OPENAI_API_KEY)
-        with st.spinner("Calling ATS brain..."):
-            result = analyze_resume_against_jd(
-                client=client,
-                model=model,
-                temperature=temperature,
-                resume_text=resume_text,
-                jd_text=jd_text
-            )
+        with trace("analyze") as analysis_trace:
+            client = init_openai_client(api_key_override or settings.OPENAI_API_KEY, backend=settings.LLM_BACKEND)
+            with span("keywords"):
+                local_keywords = section_keyword_fields(resume_text, jd_text)
+            with span("heuristics"):
+                local_heuristics = local_heuristic_fields(resume_text)
+            status = st.empty()
+
+            # an edited resume against the same JD: patch the previous analysis instead of starting over
+            prior = st.session_state.get("analysis")
+            incremental = None
+            routed = None
+            if incremental_reanalysis and prior is not None and prior.resume_text != resume_text and not force_refresh:
+                with st.spinner("Re-scoring the edited sections..."):
+                    incremental = reanalyze_incremental(
+                        client=client,
+                        model=model,
+                        temperature=temperature,
+                        prior=prior,
+                        resume_text=resume_text,
+                        jd_text=jd_text,
+                        jd_budget=settings.JD_TOKEN_BUDGET,
+                        cache=result_cache if use_cache else None,
+                    )
 
-        data = safe_json(result)
-        if not data:
-            st.error("The analyzer returned an unexpected format. Please try again.")
-        else:
-            # --------------------------- Overview ---------------------------
-            st.success("Analysis complete!")
-            st.subheader("📊 ATS Overview")
-
-            score = data.get("ats_score_overall", 0)
-            colA, colB, colC = st.columns([1, 2, 2])
-            with colA:
-                st.metric("ATS Score", f"{round(score)} / 100")
-                st.progress(min(max(score / 100, 0), 1))
-
-            with colB:
-                role = data.get("role_title_inferred", "")
-                hard_req = data.get("hard_requirements", {})
-                met = hard_req.get("met", False)
-                details = hard_req.get("details", [])
-                st.markdown(f"**Target role inferred:** `{role or '—'}`")
-                st.markdown(f"**Hard requirements met?** {'✅ Yes' if met else '❌ No'}")
-                if details:
-                    st.caption("Hard requirement checks:")
-                    for d in details:
-                        st.write(f"- {d}")
-
-            with colC:
-                red_flags = data.get("red_flags", [])
-                if red_flags:
-                    st.markdown("**⚠️ Potential red flags**")
-                    for rf in red_flags:
-                        st.write(f"- {rf}")
-                else:
-                    st.markdown("**No major red flags detected.**")
-
-            # --------------------------- Section Scores ---------------------------
-            st.write("---")
-            st.subheader("🧩 Section Scores")
-            sec = data.get("section_scores", {})
-            if sec:
-                df_scores = pd.DataFrame(
-                    [{"Section": k, "Score": v} for k, v in sec.items()]
-                ).sort_values("Score", ascending=False)
-                st.dataframe(df_scores, use_container_width=True)
-
-            # --------------------------- Keyword Analysis ---------------------------
-            st.write("---")
-            st.subheader("🔑 Keywords & Alignment")
-
-            colk1, colk2 = st.columns(2)
-            matched = data.get("matched_keywords", [])
-            missing_critical = data.get("missing_critical_keywords", [])
-            missing_nice = data.get("missing_nice_to_have_keywords", [])
-            density = data.get("keyword_density", [])
-
-            with colk1:
-                st.markdown("**Matched (Resume ∩ JD)**")
-                if matched:
-                    st.write(", ".join(matched))
-                else:
-                    st.caption("No explicit matches found (may be phrased differently).")
-
-                st.markdown("**Missing — Critical**")
-                if missing_critical:
-                    st.error(", ".join(missing_critical))
-                else:
-                    st.success("No critical keywords missing.")
-
-                st.markdown("**Missing — Nice to have**")
-                if missing_nice:
-                    st.warning(", ".join(missing_nice))
-                else:
-                    st.success("All nice-to-have keywords present.")
-
-            with colk2:
-                st.markdown("**Keyword Density (Resume vs JD)**")
-                if density:
-                    df_kd = pd.DataFrame(density)
-                    df_kd = df_kd.rename(columns={
-                        "keyword": "Keyword",
-                        "resume_freq": "Resume Freq",
-                        "jd_freq": "JD Freq"
-                    })
-                    st.dataframe(df_kd, use_container_width=True)
-                else:
-                    st.caption("No density table produced.")
-
-            # --------------------------- Recommendations ---------------------------
-            st.write("---")
-            st.subheader("🛠️ Recommendations & Example Rewrites")
-
-            recs = data.get("recommendations", [])
-            if recs:
-                for r in recs:
-                    area = r.get("area", "General")
-                    sev = r.get("severity", "med")
-                    sug = r.get("suggestion", "")
-                    exr = r.get("example_rewrite", "")
-                    st.markdown(
-                        f"{badge(area)}  {badge(sev.upper(), color=severity_color(sev))}  \n\n{sug}"
-                        , unsafe_allow_html=True
+            if incremental is not None:
+                result = json.dumps(incremental.data, ensure_ascii=False)
+                # no edits means only whitespace moved; this is the previous analysis
+                from_cache = incremental.from_cache or not incremental.diff.edited
+                slots = None
+                diff = incremental.diff
+                timing = (
+                    f"incremental: {len(diff.edited)} of {len(diff.edited) + len(diff.unchanged)} section(s) changed"
+                    + (f" • re-scored {', '.join(incremental.rescored)}" if incremental.rescored else "")
+                    + f" in {incremental.seconds:.1f}s"
+                )
+            elif auto_route:
+                with st.spinner("Calling ATS brain... (cheapest model first)"):
+                    routed = analyze_with_cascade(
+                        client=client,
+                        temperature=temperature,
+                        resume_text=resume_text,
+                        jd_text=jd_text,
+                        tiers=cascade_tiers,
+                        resume_budget=settings.RESUME_TOKEN_BUDGET,
+                        jd_budget=settings.JD_TOKEN_BUDGET,
+                        cache=result_cache if use_cache else None,
+                        refresh=force_refresh,
+                        threshold=settings.CASCADE_THRESHOLD,
                     )
-                    if exr:
-                        with st.expander("Example rewrite"):
-                            st.write(exr)
+                result = routed.raw
+                from_cache = all(a.from_cache for a in routed.attempts)
+                slots = None
+                timing = f"{routed.summary()} • ${routed.cost_usd:.4f}"
+            elif stream_results:
+                status.info("Calling ATS brain... (streaming)")
+                stream = analyze_resume_against_jd(
+                    client=client,
+                    model=model,
+                    temperature=temperature,
+                    resume_text=resume_text,
+                    jd_text=jd_text,
+                    resume_budget=settings.RESUME_TOKEN_BUDGET,
+                    jd_budget=settings.JD_TOKEN_BUDGET,
+                    cache=result_cache if use_cache else None,
+                    refresh=force_refresh,
+                    stream=True,
+                    decomposed=decomposed,
+                )
+                partial = merge_heuristic_fields(merge_keyword_fields({}, local_keywords), local_heuristics)
+                slots = [st.empty() for _ in SECTIONS]
+                for slot, (_, render) in zip(slots, SECTIONS):
+                    with slot.container():
+                        render(partial)
+                for field_name, value in stream:
+                    partial[field_name] = value
+                    if field_name in KEYWORD_FIELDS:
+                        partial = merge_keyword_fields(partial, local_keywords)
+                    elif field_name in SCORES_FIELDS:
+                        partial = merge_heuristic_fields(partial, local_heuristics)
+                    for slot, (fields, render) in zip(slots, SECTIONS):
+                        if field_name in fields:
+                            with slot.container():
+                                render(partial)
+                result = stream.raw
+                from_cache = stream.from_cache
+                timing = (
+                    f"first section {stream.first_section_seconds:.1f}s • total {stream.total_seconds:.1f}s"
+                    if stream.first_section_seconds is not None and stream.total_seconds is not None else ""
+                )
+                if stream.validation is not None and stream.validation.repaired:
+                    timing += f" • repaired {', '.join(stream.validation.repaired)}"
             else:
-                st.caption("No recommendations produced.")
-
-            # --------------------------- Tailored Summary & Bullets ---------------------------
-            st.write("---")
-            st.subheader("✨ Tailored Summary & Bullet Suggestions")
-            ts = data.get("tailored_summary", "")
-            tb = data.get("tailored_bullets", [])
-            verbs = data.get("top_action_verbs", [])
-
-            if ts:
-                st.markdown("**Tailored Professional Summary**")
-                st.write(ts)
-
-            if tb:
-                st.markdown("**High-impact Bullet Suggestions**")
-                for i, bullet in enumerate(tb, 1):
-                    st.write(f"{i}. {bullet}")
-
-            if verbs:
-                st.caption("Suggested action verbs to diversify your bullets:")
-                st.write(", ".join(verbs))
-
-            # --------------------------- Generate + Download Report ---------------------------
-            st.write("---")
-            st.subheader("📥 Export")
-
-            md_report = make_markdown_report(data)
-            st.download_button(
-                "Download Full Report (Markdown)",
-                data=md_report.encode("utf-8"),
-                file_name="ats_report.md",
-                mime="text/markdown",
-                use_container_width=True
+                with st.spinner("Calling ATS brain..."):
+                    result, from_cache = run_analysis(
+                        client=client,
+                        model=model,
+                        temperature=temperature,
+                        resume_text=resume_text,
+                        jd_text=jd_text,
+                        resume_budget=settings.RESUME_TOKEN_BUDGET,
+                        jd_budget=settings.JD_TOKEN_BUDGET,
+                        cache=result_cache if use_cache else None,
+                        refresh=force_refresh,
+                        decomposed=decomposed,
+                    )
+                slots = None
+                timing = ""
+
+            with span("safe_json"):
+                data = safe_json(result)
+            if data:
+                data = merge_heuristic_fields(merge_keyword_fields(data, local_keywords), local_heuristics)
+            if not data:
+                status.error("The analyzer returned an unexpected format. Please try again.")
+            else:
+                status.success(
+                    ("Analysis complete! (served from cache)" if from_cache else "Analysis complete!")
+                    + (f"  ⏱️ {timing}" if timing else "")
+                )
+                if not from_cache:
+                    compacted = [compaction_stats.last.get(k) for k in ("analysis.resume", "analysis.jd")]
+                    compacted = [c for c in compacted if c is not None]
+                    if compacted:
+                        before = sum(c.tokens_before for c in compacted)
+                        after = sum(c.tokens_after for c in compacted)
+                        dropped = sorted({d for c in compacted for d in c.dropped})
+                        st.caption(
+                            f"Input compaction: {before:,} → {after:,} tokens ({before - after:,} saved)"
+                            + (f" • dropped: {', '.join(dropped)}" if dropped else "")
+                        )
+                with span("render"):
+                    if slots is None:
+                        for _, render in SECTIONS:
+                            render(data)
+                    else:
+                        # redraw once with the merged result so every block reflects the final JSON
+                        for slot, (_, render) in zip(slots, SECTIONS):
+                            with slot.container():
+                                render(data)
+
+                # keep the result for this session (and on disk) so rewrites, follow-ups and
+                # reruns reuse it instead of re-analyzing
+                record = AnalysisRecord(
+                    data=data, resume_text=resume_text, jd_text=jd_text, model=routed.model if routed else model,
+                    temperature=temperature, resume_name=getattr(resume_file, "name", ""), owner=history_owner,
+                )
+                if not from_cache:
+                    with span("history"):
+                        history.save(record)
+                st.session_state["analysis"] = record
+                just_analyzed = True
+                st.session_state["rewrites"] = []
+                st.session_state["qa"] = []
+        st.session_state["last_trace"] = analysis_trace.to_dict()
+
+# --------------------------- Stored Result ---------------------------
+current = st.session_state.get("analysis")
+if current is not None and not just_analyzed:
+    # a rerun from any other widget: redraw the stored analysis, no model call
+    st.caption(f"Showing analysis from {current.title}")
+    for _, render in SECTIONS:
+        render(current.data)
+
+if current is not None:
+    # --------------------------- Generate + Download Report ---------------------------
+    st.write("---")
+    st.subheader("📥 Export")
+
+    md_report = make_markdown_report(current.data)
+    st.download_button(
+        "Download Full Report (Markdown)",
+        data=md_report.encode("utf-8"),
+        file_name="ats_report.md",
+        mime="text/markdown",
+        use_container_width=True
+    )
+    st.download_button(
+        "Download Full Report (HTML)",
+        data="\n".join(iter_html_report(current.data)).encode("utf-8"),
+        file_name="ats_report.html",
+        mime="text/html",
+        use_container_width=True
+    )
+    st.download_button(
+        "Download Raw JSON",
+        data=json.dumps(current.data, indent=2).encode("utf-8"),
+        file_name="ats_report.json",
+        mime="application/json",
+        use_container_width=True
+    )
+
+    # --------------------------- Extra: On-demand rewrites ---------------------------
+    st.write("---")
+    st.subheader("🧩 On-Demand Rewrites (optional)")
+    rewrite_goal = st.text_area(
+        "Describe what you want rewritten (e.g., “Rewrite my summary to emphasize Generative AI and Azure MLOps”):",
+        placeholder="What should the rewrite emphasize or change?"
+    )
+    if st.button("Generate Rewrites", use_container_width=True):
+        if not rewrite_goal.strip():
+            st.warning("Please describe your rewrite goal.")
+        else:
+            reuse = answer_cache if use_cache else None
+            with st.spinner("Generating tailored rewrites..."), trace("rewrite") as rewrite_trace:
+                client = init_openai_client(api_key_override or settings.OPENAI_API_KEY, backend=settings.LLM_BACKEND)
+                rewrites = generate_rewrites(
+                    client=client, model=current.model, temperature=current.temperature,
+                    resume_text=current.resume_text, jd_text=current.jd_text, rewrite_goal=rewrite_goal,
+                    semantic_cache=reuse,
+                )
+                # a semantic cache hit answers without a completion
+                rewrite_trace.persist = bool(rewrite_trace.llm_calls)
+            if not rewrite_trace.persist:
+                st.caption("⚡ Reused the rewrites for a near-identical goal (semantic cache).")
+            st.session_state["last_trace"] = rewrite_trace.to_dict()
+            st.session_state.setdefault("rewrites", []).append((rewrite_goal, rewrites or "No rewrite generated."))
+    for goal, rewrites in reversed(st.session_state.get("rewrites", [])):
+        st.markdown(f"**Suggested rewrites** — _{goal}_")
+        st.write(rewrites)
+
+    # --------------------------- Follow-up Q&A ---------------------------
+    st.write("---")
+    st.subheader("💬 Follow-up Q&A — Ask ATS ChatGPT")
+    # chunk + index the resume/JD once; each question then retrieves only what it needs
+    followup_index = get_followup_index(current.resume_text, current.jd_text, current.model)
+    st.caption(
+        f"Indexed {followup_index.resume_chunks} resume / {followup_index.jd_chunks} JD chunks "
+        f"in {followup_index.build_seconds * 1000:.0f} ms"
+    )
+    q = st.text_input("Ask a question about your resume fit, gaps, or how to improve further:")
+    if st.button("Ask", use_container_width=True):
+        if not q.strip():
+            st.warning("Please type a question.")
+        else:
+            reuse = answer_cache if use_cache else None
+            with st.spinner("Thinking..."), trace("followup") as followup_trace:
+                client = init_openai_client(api_key_override or settings.OPENAI_API_KEY, backend=settings.LLM_BACKEND)
+                answer = ask_followup(
+                    client=client,
+                    model=current.model,
+                    temperature=current.temperature,
+                    resume_text=current.resume_text,
+                    jd_text=current.jd_text,
+                    analysis_json=current.data,
+                    user_question=q,
+                    index=followup_index,
+                    semantic_cache=reuse,
+                )
+                followup_trace.persist = bool(followup_trace.llm_calls)
+            if not followup_trace.persist:
+                st.caption("⚡ Answered from a near-identical earlier question (semantic cache).")
+            st.session_state["last_trace"] = followup_trace.to_dict()
+            st.session_state.setdefault("qa", []).append((q, answer or "No answer generated."))
+    for question, answer in reversed(st.session_state.get("qa", [])):
+        st.markdown(f"**Q:** {question}")
+        st.write(answer)
+
+# --------------------------- Performance Panel ---------------------------
+with st.sidebar:
+    st.write("---")
+    with st.expander("⏱️ Performance", expanded=False):
+        for title, key in (("Last action", "last_trace"), ("Last extraction", "last_extract_trace")):
+            tr = st.session_state.get(key)
+            if not tr:
+                continue
+            st.markdown(f"**{title}** — {tr['duration_ms'] / 1000:.2f}s")
+            import pandas as pd
+
+            st.dataframe(
+                pd.DataFrame([{"Stage": sp["name"], "ms": round(sp["duration_ms"], 1)} for sp in tr["spans"]]),
+                use_container_width=True, hide_index=True
             )
-            st.download_button(
-                "Download Raw JSON",
-                data=json.dumps(data, indent=2).encode("utf-8"),
-                file_name="ats_report.json",
-                mime="application/json",
-                use_container_width=True
+            for call in tr["llm_calls"]:
+                ttft = f" • TTFT {call['first_token_ms'] / 1000:.2f}s" if call.get("first_token_ms") is not None else ""
+                cached = f" ({call['cached_tokens']:,} cached)" if call.get("cached_tokens") else ""
+                st.caption(
+                    f"{call['label']} ({call['model']}): {call['prompt_tokens']:,} in{cached} / "
+                    f"{call['completion_tokens']:,} out • ${call['cost_usd']:.4f}{ttft}"
+                )
+
+        llm_stats = registry_stats()
+        if llm_stats.calls:
+            st.caption(
+                f"LLM requests: {llm_stats.calls} • retries {llm_stats.retries} • "
+                f"hedged {llm_stats.hedges} • failed {llm_stats.failures}"
             )
-
-            # --------------------------- Extra: On-demand rewrites ---------------------------
-            st.write("---")
-            st.subheader("🧩 On-Demand Rewrites (optional)")
-            rewrite_goal = st.text_area(
-                "Describe what you want rewritten (e.g., “Rewrite my summary to emphasize Generative AI and Azure MLOps”):",
-                placeholder="What should the rewrite emphasize or change?"
+        routing = cascade_stats()
+        if routing["analyses"]:
+            st.markdown(
+                f"**Model cascade** — escalated {routing['escalations']}/{routing['analyses']} "
+                f"({routing['escalation_rate']:.0%})"
             )
-            if st.button("Generate Rewrites", use_container_width=True):
-                if not rewrite_goal.strip():
-                    st.warning("Please describe your rewrite goal.")
-                else:
-                    with st.spinner("Generating tailored rewrites..."):
-                        rewrites = generate_rewrites(
-                            client=client, model=model, temperature=temperature,
-                            resume_text=resume_text, jd_text=jd_text, rewrite_goal=rewrite_goal
-                        )
-                    st.markdown("**Suggested rewrites**")
-                    st.write(rewrites or "No rewrite generated.")
-
-            # --------------------------- Follow-up Q&A ---------------------------
-            st.write("---")
-            st.subheader("💬 Follow-up Q&A — Ask ATS ChatGPT")
-            q = st.text_input("Ask a question about your resume fit, gaps, or how to improve further:")
-            if st.button("Ask", use_container_width=True):
-                if not q.strip():
-                    st.warning("Please type a question.")
-                else:
-                    with st.spinner("Thinking..."):
-                        answer = ask_followup(
-                            client=client,
-                            model=model,
-                            temperature=temperature,
-                            resume_text=resume_text,
-                            jd_text=jd_text,
-                            analysis_json=data,
-                            user_question=q
-                        )
-                    st.write(answer or "No answer generated.")
+            import pandas as pd
+
+            st.dataframe(
+                pd.DataFrame([
+                    {"Tier": m, "Runs": t["runs"], "Kept": t["kept"], "Escalated": t["escalated"],
+                     "Avg $": round(t["avg_cost_usd"], 5), "Avg ms": round(t["avg_ms"], 1),
+                     "p95 ms": round(t["p95_ms"], 1)}
+                    for m, t in routing["tiers"].items()
+                ]),
+                use_container_width=True, hide_index=True
+            )
+            if routing["reasons"]:
+                st.caption("Escalated for: " + ", ".join(f"{k} ×{v}" for k, v in sorted(routing["reasons"].items())))
+        if answer_cache is not None:
+            answers = answer_cache.stats()
+            if answers["hits"] + answers["misses"]:
+                st.caption(
+                    f"Semantic cache: {answers['hits']}/{answers['hits'] + answers['misses']} hits "
+                    f"({answers['hit_rate']:.0%}) • avg similarity {answers['avg_hit_similarity']:.2f} "
+                    f"• {answers['entries']} entries, {answers['evictions']} evicted"
+                )
+        limits = rate_limit_stats()
+        if limits:
+            st.markdown("**Rate limiter**")
+            import pandas as pd
+
+            st.dataframe(
+                pd.DataFrame([
+                    {"Model": m, "Queued": v["queued"], "Granted": v["granted"], "Delayed": v["delayed"],
+                     "Avg wait ms": round(v["wait_avg_ms"], 1), "p95 wait ms": round(v["wait_p95_ms"], 1),
+                     "429s": v["throttled"], "TPM limit": v["tpm"]}
+                    for m, v in sorted(limits.items())
+                ]),
+                use_container_width=True, hide_index=True
+            )
+
+        if settings.METRICS_PATH:
+            metrics_summary = summarize_file(settings.METRICS_PATH)
+            if metrics_summary:
+                st.markdown("**History (p50 / p95)**")
+                import pandas as pd
+
+                st.dataframe(
+                    pd.DataFrame([
+                        {"Stage": k, "n": v["count"], "p50 ms": round(v["p50_ms"], 1), "p95 ms": round(v["p95_ms"], 1)}
+                        for k, v in sorted(metrics_summary.items())
+                    ]),
+                    use_container_width=True, hide_index=True
+                )
+                st.download_button(
+                    "Export metrics (Prometheus)",
+                    data=to_prometheus(metrics_summary).encode("utf-8"),
+                    file_name="ats_metrics.prom",
+                    mime="text/plain",
+                    use_container_width=True
+                )
@@ -0,0 +1,294 @@
+"""
+Reproducible latency/throughput benchmarks for the analyze / rewrite / follow-up paths,
+run against the in-process fake LLM (no API key, no network).
+
+    python -m benchmarks.bench --out bench.json
+    python -m benchmarks.bench --compare bench.json       # exit 1 when something regressed
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.analyzer import _analysis_messages, analyze_resume_against_jd, ask_followup
+from src.cascade import analyze_with_cascade
+from src.compaction import JD_TOKEN_BUDGET, RESUME_TOKEN_BUDGET
+from src.export import write_report_zip
+from src.fake_llm import DEFAULT_ANALYSIS, FakeLLMConfig, FakeOpenAI
+from src.heuristics import apply_local_heuristics
+from src.history import AnalysisRecord
+from src.incremental import reanalyze_incremental
+from src.keywords import apply_local_keywords
+from src.parsing import clear_extraction_cache, extract_document, structure_resume
+from src.rewrite import generate_rewrites
+from src.schema import validate_analysis
+from src.semcache import SemanticCache, vectorize
+from src.tracing import trace
+from src.utils import safe_json
+from benchmarks.fixtures import JD_TEXT, RESUME_TEXT, long_jd, make_docx, make_pdf, resume_variant
+from benchmarks.startup import app_modules, import_seconds, render_seconds
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    if len(samples) >= 2:
+        cuts = statistics.quantiles(samples, n=20, method="inclusive")
+        p50, p95 = statistics.median(samples), cuts[18]
+    else:
+        p50 = p95 = samples[0]
+    return {
+        "n": len(samples),
+        "min_ms": samples[0] * 1000,
+        "p50_ms": p50 * 1000,
+        "p95_ms": p95 * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+    }
+
+def _time(fn: Callable[[], Any], repeat: int, setup: Callable[[], Any] | None = None) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return _summary(samples)
+
+def bench_parsing(repeat: int) -> Dict[str, Any]:
+    pages = [RESUME_TEXT] * 5
+    docs = {
+        "pdf_5_pages": ("resume.pdf", make_pdf(pages)),
+        "docx": ("resume.docx", make_docx(RESUME_TEXT)),
+        "txt": ("resume.txt", RESUME_TEXT.encode("utf-8")),
+    }
+    out = {}
+    for name, (filename, data) in docs.items():
+        # warm the PDF worker pool once so pool start-up isn't billed to the first sample
+        extract_document(filename, data)
+        out[f"parse.{name}"] = _time(lambda: extract_document(filename, data), repeat, setup=clear_extraction_cache)
+    filename, data = docs["pdf_5_pages"]
+    out["parse.pdf_5_pages.inprocess"] = _time(
+        lambda: extract_document(filename, data, workers=0), repeat, setup=clear_extraction_cache
+    )
+    out["parse.pdf_5_pages.cached"] = _time(lambda: extract_document(filename, data), repeat)
+    out["parse.structure"] = _time(lambda: structure_resume(RESUME_TEXT), repeat)
+    return out
+
+def bench_prompt_and_json(repeat: int) -> Dict[str, Any]:
+    raw = json.dumps(DEFAULT_ANALYSIS)
+    return {
+        "prompt.build_analysis": _time(
+            lambda: _analysis_messages("gpt-4o-mini", RESUME_TEXT, JD_TEXT, RESUME_TOKEN_BUDGET, JD_TOKEN_BUDGET),
+            repeat,
+        ),
+        "json.safe_json": _time(lambda: safe_json(raw), repeat),
+        "json.validate": _time(lambda: validate_analysis(safe_json(raw)), repeat),
+        "json.local_keywords": _time(lambda: apply_local_keywords(safe_json(raw), RESUME_TEXT, JD_TEXT), repeat),
+        "json.local_heuristics": _time(lambda: apply_local_heuristics(safe_json(raw), RESUME_TEXT), repeat),
+        "semcache.vectorize": _time(lambda: vectorize("How can I add more metrics to my experience bullets?"), repeat),
+    }
+
+def bench_export(repeat: int, candidates: int = 1000) -> Dict[str, Any]:
+    data = apply_local_keywords(dict(DEFAULT_ANALYSIS), RESUME_TEXT, JD_TEXT)
+
+    def run():
+        with tempfile.TemporaryFile() as f:
+            write_report_zip(((f"candidate-{i}.pdf", data) for i in range(candidates)), f)
+    return {f"export.zip_{candidates}": _time(run, max(1, repeat // 10))}
+
+def bench_end_to_end(config: FakeLLMConfig, repeat: int) -> Dict[str, Any]:
+    client = FakeOpenAI(config)
+    data = dict(DEFAULT_ANALYSIS)
+    out = {
+        "e2e.analyze": _time(
+            lambda: safe_json(analyze_resume_against_jd(client, "gpt-4o-mini", 0.2, RESUME_TEXT, JD_TEXT)), repeat
+        ),
+        "e2e.rewrite": _time(
+            lambda: generate_rewrites(client, "gpt-4o-mini", 0.2, RESUME_TEXT, JD_TEXT, "Emphasize MLOps"), repeat
+        ),
+        "e2e.followup": _time(
+            lambda: ask_followup(client, "gpt-4o-mini", 0.2, RESUME_TEXT, JD_TEXT, data, "How do I add metrics?"),
+            repeat,
+        ),
+    }
+    out["e2e.analyze_decomposed"] = _time(
+        lambda: safe_json(analyze_resume_against_jd(client, "gpt-4o-mini", 0.2, RESUME_TEXT, JD_TEXT, decomposed=True)),
+        repeat,
+    )
+    # the fake scores 74: accepted by the cheap tier at threshold 50, escalated at the default 70
+    out["e2e.analyze_cascade.accepted"] = _time(
+        lambda: analyze_with_cascade(client, 0.2, RESUME_TEXT, JD_TEXT, threshold=50), repeat
+    )
+    out["e2e.analyze_cascade.escalated"] = _time(
+        lambda: analyze_with_cascade(client, 0.2, RESUME_TEXT, JD_TEXT), repeat
+    )
+    # a reworded question/goal after the first one was answered: served without a completion
+    answers = SemanticCache()
+    ask_followup(client, "gpt-4o-mini", 0.2, RESUME_TEXT, JD_TEXT, data, "How do I add metrics?", semantic_cache=answers)
+    generate_rewrites(client, "gpt-4o-mini", 0.2, RESUME_TEXT, JD_TEXT, "Emphasize MLOps", semantic_cache=answers)
+    out["e2e.followup.semantic_hit"] = _time(
+        lambda: ask_followup(client, "gpt-4o-mini", 0.2, RESUME_TEXT, JD_TEXT, data,
+                             "how can I add more metrics to my resume", semantic_cache=answers),
+        repeat,
+    )
+    out["e2e.rewrite.semantic_hit"] = _time(
+        lambda: generate_rewrites(client, "gpt-4o-mini", 0.2, RESUME_TEXT, JD_TEXT, "emphasize mlops more",
+                                  semantic_cache=answers),
+        repeat,
+    )
+    prior = AnalysisRecord(apply_local_keywords(data, RESUME_TEXT, JD_TEXT), RESUME_TEXT, JD_TEXT, "gpt-4o-mini", 0.2)
+    edited = RESUME_TEXT.replace("Git", "Git, Terraform")
+    out["e2e.reanalyze_incremental"] = _time(
+        lambda: reanalyze_incremental(client, "gpt-4o-mini", 0.2, prior, edited, JD_TEXT), repeat
+    )
+    first, total = [], []
+    for _ in range(repeat):
+        stream = analyze_resume_against_jd(client, "gpt-4o-mini", 0.2, RESUME_TEXT, JD_TEXT, stream=True)
+        for _field in stream:
+            pass
+        first.append(stream.first_section_seconds or 0.0)
+        total.append(stream.total_seconds or 0.0)
+    out["e2e.analyze_stream.first_section"] = _summary(first)
+    out["e2e.analyze_stream.total"] = _summary(total)
+    return out
+
+def bench_throughput(config: FakeLLMConfig, sessions: List[int], per_session: int) -> Dict[str, Any]:
+    out = {}
+    client = FakeOpenAI(config)
+    for n in sessions:
+        jobs = [resume_variant(i) for i in range(n * per_session)]
+
+        def run(resume: str) -> float:
+            t0 = time.perf_counter()
+            safe_json(analyze_resume_against_jd(client, "gpt-4o-mini", 0.2, resume, JD_TEXT))
+            return time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            latencies = list(pool.map(run, jobs))
+        elapsed = time.perf_counter() - t0
+        stats = _summary(latencies)
+        stats["requests_per_s"] = len(jobs) / elapsed
+        out[f"throughput.sessions_{n}"] = stats
+    return out
+
+def bench_prompt_cache(config: FakeLLMConfig, candidates: int = 16) -> Dict[str, Any]:
+    """
+    One long JD, many resumes: after the first request the system + schema + JD prefix is
+    served from the (simulated) provider prompt cache.
+    """
+    client = FakeOpenAI(config)
+    jd = long_jd()
+    latencies, prompt, cached, cost = [], 0, 0, 0.0
+    for i in range(candidates):
+        with trace("bench.same_jd") as tr:
+            tr.persist = False
+            t0 = time.perf_counter()
+            analyze_resume_against_jd(client, "gpt-4o-mini", 0.2, resume_variant(i), jd)
+            latencies.append(time.perf_counter() - t0)
+        prompt, cached, cost = prompt + tr.prompt_tokens, cached + tr.cached_tokens, cost + tr.cost_usd
+    stats = _summary(latencies)
+    stats["cached_token_share"] = cached / prompt if prompt else 0.0
+    stats["cost_usd_per_resume"] = cost / candidates
+    return {"e2e.analyze_same_jd": stats}
+
+def bench_startup(repeat: int) -> Dict[str, Any]:
+    """
+    Cold start of the Streamlit app, each sample in a fresh interpreter (see startup.py).
+    """
+    modules = app_modules()
+    imports, first, rerun = [], [], []
+    for _ in range(repeat):
+        imports.append(import_seconds(modules))
+        timings = render_seconds()
+        first.append(timings["first_render"])
+        rerun.append(timings["rerun"])
+    return {
+        "startup.import_app": _summary(imports),
+        "startup.first_render": _summary(first),
+        "startup.rerun": _summary(rerun),
+    }
+
+def run_all(args) -> Dict[str, Any]:
+    config = FakeLLMConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=0.0,
+        seed=args.seed,
+    )
+    metrics: Dict[str, Any] = {}
+    metrics.update(bench_parsing(args.repeat))
+    metrics.update(bench_prompt_and_json(args.repeat))
+    metrics.update(bench_export(args.repeat))
+    metrics.update(bench_end_to_end(config, max(1, args.repeat // 4)))
+    metrics.update(bench_throughput(config, args.sessions, args.per_session))
+    metrics.update(bench_prompt_cache(config))
+    if not args.skip_startup:
+        metrics.update(bench_startup(max(1, args.repeat // 4)))
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fake_latency_s": args.latency,
+            "fake_tokens_per_second": args.tokens_per_second,
+            "repeat": args.repeat,
+        },
+        "metrics": metrics,
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Latency metrics regress when p50 grows by more than `tolerance` (and at least 1 ms);
+    throughput metrics regress when requests/s drops by more than `tolerance`.
+    """
+    problems = []
+    for name, old in baseline.get("metrics", {}).items():
+        new = current["metrics"].get(name)
+        if new is None:
+            continue
+        if "requests_per_s" in old:
+            if new["requests_per_s"] < old["requests_per_s"] * (1 - tolerance):
+                problems.append(f"{name}: {old['requests_per_s']:.1f} -> {new['requests_per_s']:.1f} req/s")
+        elif new["p50_ms"] > old["p50_ms"] * (1 + tolerance) and new["p50_ms"] - old["p50_ms"] > 1.0:
+            problems.append(f"{name}: p50 {old['p50_ms']:.2f} -> {new['p50_ms']:.2f} ms")
+    return problems
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0, help="Simulated generation speed")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--per-session", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None, help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--skip-startup", action="store_true", help="Skip the cold-start (subprocess) benchmarks")
+    args = parser.parse_args(argv)
+
+    results = run_all(args)
+    text = json.dumps(results, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        problems = compare(results, baseline, args.tolerance)
+        for p in problems:
+            print(f"REGRESSION {p}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import io
+import zipfile
+from typing import List
+from xml.sax.saxutils import escape
+
+RESUME_TEXT = """Jane Doe
+jane.doe@example.com | (555) 010-2000 | linkedin.com/in/janedoe
+
+Summary
+Machine learning engineer with 6 years of experience building and deploying production models.
+
+Professional Experience
+Senior ML Engineer, Acme Analytics (2021 - Present)
+- Built ranking models in Python and PyTorch serving 40M predictions per day
+- Deployed models on Kubernetes (k8s) with Docker, cutting p95 latency by 35%
+- Owned Airflow pipelines feeding a Spark feature store
+- Mentored 4 engineers and led weekly model reviews
+
+ML Engineer, Beta Corp (2018 - 2021)
+- Trained gradient boosted models for churn prediction
+- Migrated batch scoring from cron jobs to AWS SageMaker
+- Wrote SQL for experiment analysis and A/B testing dashboards
+
+Skills
+Python, SQL, PyTorch, scikit-learn, Spark, Airflow, Docker, Kubernetes, AWS, Git
+
+Education
+B.S. Computer Science, State University (2018)
+"""
+
+JD_TEXT = """Senior Machine Learning Engineer
+
+About us
+We are a fast growing fintech company on a mission to make credit fair.
+
+Responsibilities
+- Build, deploy and monitor machine learning models in production
+- Own data pipelines in Spark and Airflow
+- Partner with product on experimentation and model monitoring
+
+Requirements
+- 5+ years of experience with Python and SQL
+- Experience deploying models on Kubernetes and AWS
+- Strong background in feature stores and model monitoring
+
+Nice to have
+- Experience with Terraform and LLMs
+
+Benefits
+- Competitive salary, 401(k) match, paid time off
+
+We are an equal opportunity employer and consider all applicants without regard to race or gender identity.
+"""
+
+def make_pdf(pages: List[str]) -> bytes:
+    """
+    Minimal single-font PDF, one text block per page; enough for pdfminer.
+    """
+    objs = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objs.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    font_id = 3 + 2 * len(pages)
+    for i, text in enumerate(pages):
+        lines = []
+        for j, line in enumerate(text.splitlines()[:45]):
+            safe = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            safe = safe.encode("latin-1", errors="replace").decode("latin-1")
+            lines.append(f"BT /F1 10 Tf 50 {760 - 16 * j} Td ({safe}) Tj ET")
+        stream = "\n".join(lines).encode("latin-1")
+        objs.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>".encode()
+        )
+        objs.append(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+    objs.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objs):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{o:010d} 00000 n \n".encode() for o in offsets)
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode()
+    return out
+
+def make_docx(text: str) -> bytes:
+    """
+    Minimal .docx (document.xml only) that docx2txt can read.
+    """
+    paras = "".join(
+        f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(line)}</w:t></w:r></w:p>"
+        for line in text.splitlines()
+    )
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{paras}</w:body></w:document>"
+    )
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        "</Types>"
+    )
+    buff = io.BytesIO()
+    with zipfile.ZipFile(buff, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", content_types)
+        zf.writestr("word/document.xml", document)
+    return buff.getvalue()
+
+def resume_variant(i: int) -> str:
+    # distinct text per synthetic candidate so content-addressed caches don't short-circuit
+    return RESUME_TEXT.replace("Jane Doe", f"Candidate {i:04d}") + f"\nCandidate id: {i}\n"
+
+_DUTIES = (
+    "design and operate", "evaluate and retrain", "instrument and monitor", "document and review",
+    "profile and optimize", "secure and audit",
+)
+_SYSTEMS = (
+    "real-time fraud scoring", "credit-line ranking", "feature store backfills", "streaming Kafka ingestion",
+    "offline evaluation harnesses", "model drift alerting", "GPU batch inference", "privacy-safe data exports",
+    "A/B test readouts", "Airflow retraining DAGs", "Terraform-managed infrastructure", "LLM-assisted triage",
+)
+
+def long_jd() -> str:
+    """
+    A detailed posting (~2-3k prompt tokens after compaction): long enough that the shared
+    system + schema + JD prefix clears the provider's 1024-token prompt-cache minimum.
+    """
+    lines = [JD_TEXT, "Detailed responsibilities"]
+    for i, system in enumerate(_SYSTEMS):
+        for j, duty in enumerate(_DUTIES):
+            lines.append(f"- {duty.capitalize()} our {system} (area {i + 1}.{j + 1}), owning its roadmap, "
+                         f"on-call rotation and quarterly reliability targets")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,149 @@
+"""
+Cold-start profile of the Streamlit app: per-module import cost (`python -X importtime`)
+and first-render / rerun latency, each measured in a fresh interpreter.
+
+    python -m benchmarks.startup               # import report + startup timings
+    python -m benchmarks.startup --top 40 --json startup.json
+
+The same timings are tracked by `python -m benchmarks.bench` as startup.* metrics.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "app.py"
+SEEDED_TRACES = 1000  # metrics log the rendered app starts with, as after a few days of use
+
+_RENDER_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+t0 = time.perf_counter()
+at.run()
+t1 = time.perf_counter()
+at.run()
+t2 = time.perf_counter()
+print(json.dumps({"first_render": t1 - t0, "rerun": t2 - t1, "failed": bool(at.exception)}))
+"""
+
+_IMPORT_SCRIPT = """
+import json, sys, time
+import streamlit
+t0 = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+print(json.dumps({"seconds": time.perf_counter() - t0}))
+"""
+
+def app_modules(path: Path = APP) -> List[str]:
+    """
+    The project modules a Streamlit script imports at top level, in order.
+    """
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    names: List[str] = []
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module and node.module.split(".")[0] == "src":
+            names.append(node.module)
+        elif isinstance(node, ast.Import):
+            names.extend(a.name for a in node.names if a.name.split(".")[0] == "src")
+    return list(dict.fromkeys(names))
+
+def _env(tmp: str, metrics_path: str = "") -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": str(ROOT),
+        "ATS_LLM_BACKEND": "fake",
+        "ATS_CACHE_PATH": os.path.join(tmp, "results.sqlite3"),
+        "ATS_HISTORY_PATH": "",
+        "ATS_METRICS_PATH": metrics_path,
+    })
+    return env
+
+def _run(args: List[str], tmp: str, metrics_path: str = "") -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, env=_env(tmp, metrics_path), capture_output=True, text=True, check=True
+    )
+
+def _seed_metrics(path: str, n: int) -> None:
+    trace = {
+        "name": "analyze", "duration_ms": 1500.0,
+        "spans": [{"name": "keywords", "duration_ms": 2.0}, {"name": "llm.analysis", "duration_ms": 1400.0}],
+        "llm_calls": [{"label": "analysis", "first_token_ms": 400.0}],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(trace) + "\n" for _ in range(n))
+
+def import_profile(modules: List[str]) -> List[Dict[str, Any]]:
+    """
+    One row per module loaded while importing `modules` in a fresh interpreter:
+    self and cumulative import time, and nesting depth (0 = imported directly).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = _run(["-X", "importtime", "-c", f"import {', '.join(modules)}"], tmp)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": depth,
+        })
+    return rows
+
+def import_seconds(modules: List[str]) -> float:
+    """
+    Wall time to import `modules` cold, with Streamlit itself already loaded.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        return json.loads(_run(["-c", _IMPORT_SCRIPT, *modules], tmp).stdout)["seconds"]
+
+def render_seconds(path: Path = APP) -> Dict[str, Any]:
+    """
+    First script run (cold imports, settings, caches) and one rerun of the app, headless,
+    with SEEDED_TRACES traces in the metrics log.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics = os.path.join(tmp, "metrics.jsonl")
+        _seed_metrics(metrics, SEEDED_TRACES)
+        proc = _run(["-c", _RENDER_SCRIPT, str(path)], tmp, metrics)
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def format_report(rows: List[Dict[str, Any]], top: int) -> str:
+    direct = sorted((r for r in rows if r["depth"] == 0), key=lambda r: -r["cumulative_ms"])
+    heaviest = sorted(rows, key=lambda r: -r["cumulative_ms"])[:top]
+    out = [f"{'module':<48} {'self ms':>9} {'cumul ms':>9}", "-- imported directly --"]
+    out += [f"{r['module']:<48} {r['self_ms']:>9.1f} {r['cumulative_ms']:>9.1f}" for r in direct]
+    out.append(f"-- top {top} by cumulative time --")
+    out += [f"{'  ' * r['depth'] + r['module']:<48} {r['self_ms']:>9.1f} {r['cumulative_ms']:>9.1f}" for r in heaviest]
+    return "\n".join(out)
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--json", default=None, help="Also write the profile and timings here")
+    args = parser.parse_args(argv)
+
+    modules = ["streamlit", *app_modules()]
+    rows = import_profile(modules)
+    print(format_report(rows, args.top))
+    timings = {"import_app_s": import_seconds(app_modules()), **render_seconds()}
+    print()
+    print(f"app modules import {timings['import_app_s'] * 1000:.0f} ms • first render "
+          f"{timings['first_render'] * 1000:.0f} ms • rerun {timings['rerun'] * 1000:.0f} ms")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"imports": rows, "timings": timings}, indent=2), encoding="utf-8")
+    return 1 if timings["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
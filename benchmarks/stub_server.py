@@ -0,0 +1,158 @@
+"""
+Local OpenAI-compatible HTTP stub for exercising the real SDK client path (connection reuse,
+retries, Retry-After, hedging) without network access. Responses come from the fake LLM's
+recordings.
+
+    python -m benchmarks.stub_server --port 8765 --fail-first 2 --retry-after 0.5
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub streamlit run app.py
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.fake_llm import FakeLLMConfig, FakeOpenAI
+
+@dataclass
+class StubBehavior:
+    latency: float = 0.0
+    fail_first: int = 0            # answer the first N requests with `fail_status`
+    fail_status: int = 429
+    retry_after: Optional[float] = None
+    slow_every: int = 0            # every Nth request waits `slow_seconds` extra (hedging tests)
+    slow_seconds: float = 2.0
+
+class StubState:
+    def __init__(self, behavior: StubBehavior):
+        self.behavior = behavior
+        self.fake = FakeOpenAI(FakeLLMConfig(latency=0.0))
+        self.requests = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+
+    def next_request(self, peer) -> int:
+        with self._lock:
+            self.requests += 1
+            self.connections.add(peer)
+            return self.requests
+
+def _handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+        def log_message(self, *_):
+            pass
+
+        def _send_json(self, status: int, payload, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            req = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+                return
+            n = state.next_request(self.client_address)
+            b = state.behavior
+            if n <= b.fail_first:
+                headers = {"retry-after": str(b.retry_after)} if b.retry_after is not None else {}
+                self._send_json(b.fail_status, {"error": {"message": f"stub failure {n}", "type": "stub"}}, headers)
+                return
+            delay = b.latency + (b.slow_seconds if b.slow_every and n % b.slow_every == 0 else 0.0)
+            if delay:
+                time.sleep(delay)
+            resp = state.fake.chat.completions.create(model=req.get("model", ""), messages=req.get("messages", []))
+            content = resp.choices[0].message.content
+            usage = {k: vars(v) if hasattr(v, "__dict__") else v for k, v in vars(resp.usage).items()}
+            cid = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            created = int(time.time())
+            if req.get("stream"):
+                self._stream(cid, created, req.get("model", ""), content, usage, req.get("stream_options") or {})
+                return
+            self._send_json(200, {
+                "id": cid, "object": "chat.completion", "created": created, "model": req.get("model", ""),
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                "usage": usage,
+            })
+
+        def _stream(self, cid, created, model, content, usage, stream_options):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def event(payload) -> None:
+                data = f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n".encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+            base = {"id": cid, "object": "chat.completion.chunk", "created": created, "model": model}
+            for i in range(0, len(content), 24):
+                event({**base, "choices": [{"index": 0, "delta": {"content": content[i:i + 24]}, "finish_reason": None}]})
+            event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            if stream_options.get("include_usage"):
+                event({**base, "choices": [], "usage": usage})
+            event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+@contextmanager
+def serve(behavior: Optional[StubBehavior] = None, host: str = "127.0.0.1", port: int = 0) -> Iterator[StubState]:
+    """
+    Runs the stub on a background thread; `state.base_url` is ready for OpenAI(base_url=...).
+    """
+    state = StubState(behavior or StubBehavior())
+    server = ThreadingHTTPServer((host, port), _handler(state))
+    server.daemon_threads = True
+    state.base_url = f"http://{host}:{server.server_address[1]}/v1"
+    thread = threading.Thread(target=server.serve_forever, name="ats-stub", daemon=True)
+    thread.start()
+    try:
+        yield state
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-first", type=int, default=0)
+    parser.add_argument("--fail-status", type=int, default=429)
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--slow-every", type=int, default=0)
+    parser.add_argument("--slow-seconds", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    behavior = StubBehavior(
+        latency=args.latency, fail_first=args.fail_first, fail_status=args.fail_status,
+        retry_after=args.retry_after, slow_every=args.slow_every, slow_seconds=args.slow_seconds,
+    )
+    with serve(behavior, args.host, args.port) as state:
+        print(f"Stub OpenAI API at {state.base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import os
+import tempfile
+import time
+import streamlit as st
+
+from src.config import get_settings, init_openai_client
+from src.cache import get_result_cache
+from src.batch import iter_zip_sources, run_batch, rank_results, rows_to_csv
+from src.cascade import AUTO_MODEL, parse_tiers
+from src.export import ReportZipWriter
+
+st.set_page_config(
+    page_title="ATS ChatGPT — Batch Ranking",
+    page_icon="📊",
+    layout="wide"
+)
+
+st.markdown("""
+<h1 style="margin-bottom:0">📊 Batch Ranking — Many Resumes vs One JD</h1>
+<p style="margin-top:0.5rem; font-size:1.05rem;">
+Upload a set of resumes (or a .zip of PDF/DOCX/TXT files) and one job description.
+Resumes are scored concurrently and the ranked table fills in as each one finishes.
+</p>
+""", unsafe_allow_html=True)
+
+settings = get_settings()
+
+with st.sidebar:
+    st.header("⚙️ Batch Settings")
+    cascade_tiers = parse_tiers(settings.CASCADE_MODELS)
+    model = st.selectbox(
+        "OpenAI Model",
+        ["gpt-4o-mini", "gpt-4o", "gpt-4.1-mini", AUTO_MODEL],
+        index=0,
+        format_func=lambda m: f"Auto ({' → '.join(cascade_tiers)})" if m == AUTO_MODEL else m,
+    )
+    temperature = st.slider("Temperature", 0.0, 1.0, 0.2, 0.05)
+    api_key_override = st.text_input("OPENAI_API_KEY (optional)", type="password")
+    workers = st.slider("Concurrent workers", 1, 32, 4)
+    timeout = st.number_input("Per-request timeout (s)", min_value=10, max_value=600, value=120, step=10)
+    retries = st.number_input(
+        "Retries per resume", min_value=0, max_value=5, value=2,
+        help="Re-runs when the model returns malformed output. Network errors and rate limits are retried by the client."
+    )
+    use_cache = st.checkbox("Reuse cached analyses", value=True)
+
+col1, col2 = st.columns([1, 1])
+
+with col1:
+    st.subheader("📄 Resumes")
+    uploads = st.file_uploader(
+        "Upload resumes (PDF/DOCX/TXT) or a .zip",
+        type=["pdf", "docx", "txt", "zip"],
+        accept_multiple_files=True
+    )
+
+with col2:
+    st.subheader("🧾 Job Description")
+    jd_text = st.text_area("Paste job description", height=220, placeholder="Paste full job description here...")
+
+def _drop_report_zip():
+    """
+    Deletes the previous run's reports zip; only the latest one can be downloaded.
+    """
+    path = st.session_state.pop("batch_report_zip", None)
+    if path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _sources(files):
+    for f in files or []:
+        if f.name.lower().endswith(".zip"):
+            yield from iter_zip_sources(f)
+        else:
+            yield f.name, f.getvalue()
+
+if st.button("🚀 Rank Resumes", type="primary", use_container_width=True):
+    if not uploads or not jd_text.strip():
+        st.error("Please provide resumes and a job description.")
+    else:
+        client = init_openai_client(api_key_override or settings.OPENAI_API_KEY, backend=settings.LLM_BACKEND)
+        cache = get_result_cache(
+            settings.CACHE_PATH, settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS
+        ) if use_cache else None
+
+        status = st.empty()
+        table = st.empty()
+        import pandas as pd  # only once there is a table to show
+
+        results = []
+        # reports go into the zip on disk as each resume finishes, not all at the end
+        _drop_report_zip()
+        report_zip = tempfile.NamedTemporaryFile(prefix="ats_reports_", suffix=".zip", delete=False)
+        st.session_state["batch_report_zip"] = report_zip.name
+        exporter = ReportZipWriter(report_zip)
+        started = time.perf_counter()
+        for r in run_batch(
+            client, model, temperature, _sources(uploads), jd_text,
+            workers=workers, timeout=float(timeout), retries=int(retries), cache=cache,
+            tiers=cascade_tiers, threshold=settings.CASCADE_THRESHOLD,
+            resume_budget=settings.RESUME_TOKEN_BUDGET, jd_budget=settings.JD_TOKEN_BUDGET,
+        ):
+            results.append(r)
+            exporter.add(r.name, r.data, model=r.model, error=r.error)
+            elapsed = time.perf_counter() - started
+            status.info(f"Scored {len(results)} resume(s) in {elapsed:.1f}s — latest: {r.name}")
+            table.dataframe(pd.DataFrame(rank_results(results)), use_container_width=True, hide_index=True)
+
+        failed = sum(1 for r in results if not r.ok)
+        status.success(
+            f"Done: {len(results)} resume(s) in {time.perf_counter() - started:.1f}s"
+            + (f" ({failed} failed)" if failed else "")
+            + (f" • escalated {sum(r.escalated for r in results)} to a stronger model" if model == AUTO_MODEL else "")
+        )
+        st.download_button(
+            "Download Ranking (CSV)",
+            data=rows_to_csv(rank_results(results)).encode("utf-8"),
+            file_name="ats_ranking.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
+        exporter.close()
+        report_zip.close()
+        zip_path = report_zip.name
+        zip_mb = os.path.getsize(zip_path) / 1e6
+        if zip_mb <= settings.EXPORT_INLINE_MAX_MB:
+            # deferred: the file is only read when the button is clicked, not on every rerun
+            st.download_button(
+                f"Download Reports (ZIP, {zip_mb:.1f} MB)",
+                data=lambda: Path(zip_path).read_bytes(),
+                file_name="ats_reports.zip",
+                mime="application/zip",
+                on_click="ignore",
+                use_container_width=True
+            )
+        else:
+            _drop_report_zip()
+            st.info(
+                f"The reports zip is {zip_mb:.0f} MB, over the {settings.EXPORT_INLINE_MAX_MB} MB in-page limit "
+                "(ATS_EXPORT_INLINE_MAX_MB). Export it from the command line instead; cached analyses are reused:\n\n"
+                "`python -m src.batch resumes/ --jd jd.txt --export reports.zip`"
+            )
@@ -0,0 +1,147 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import streamlit as st
+
+from src.config import get_settings, init_openai_client
+from src.cache import get_result_cache
+from src.jdlibrary import get_jd_library
+from src.batch import iter_zip_sources
+from src.parsing import extract_text_from_bytes, extract_text_from_upload
+from src.cascade import AUTO_MODEL, analyze_routed, parse_tiers
+from src.heuristics import apply_local_heuristics
+from src.keywords import apply_local_keywords
+from src.utils import safe_json
+
+st.set_page_config(
+    page_title="ATS ChatGPT — JD Library",
+    page_icon="🗂️",
+    layout="wide"
+)
+
+st.markdown("""
+<h1 style="margin-bottom:0">🗂️ JD Library — One Resume vs Many Postings</h1>
+<p style="margin-top:0.5rem; font-size:1.05rem;">
+Store job postings once, rank them all for a resume locally in milliseconds,
+then run the full ATS analysis only on the best matches.
+</p>
+""", unsafe_allow_html=True)
+
+settings = get_settings()
+library = get_jd_library(settings.JD_LIBRARY_PATH)
+
+with st.sidebar:
+    st.header("⚙️ Settings")
+    cascade_tiers = parse_tiers(settings.CASCADE_MODELS)
+    model = st.selectbox(
+        "OpenAI Model",
+        ["gpt-4o-mini", "gpt-4o", "gpt-4.1-mini", AUTO_MODEL],
+        index=0,
+        format_func=lambda m: f"Auto ({' → '.join(cascade_tiers)})" if m == AUTO_MODEL else m,
+    )
+    temperature = st.slider("Temperature", 0.0, 1.0, 0.2, 0.05)
+    api_key_override = st.text_input("OPENAI_API_KEY (optional)", type="password")
+    workers = st.slider("Concurrent analyses", 1, 16, 4)
+    use_cache = st.checkbox("Reuse cached analyses", value=True)
+    st.caption(f"Library: {len(library)} posting(s)")
+
+tab_match, tab_manage = st.tabs(["🔎 Match a resume", "📥 Manage postings"])
+
+with tab_manage:
+    st.subheader("Add postings")
+    pasted = st.text_area("Paste a job description", height=180)
+    title = st.text_input("Title (optional)")
+    files = st.file_uploader(
+        "…or upload postings (PDF/DOCX/TXT, one per file) or a .zip",
+        type=["pdf", "docx", "txt", "zip"],
+        accept_multiple_files=True
+    )
+    if st.button("Add to library", use_container_width=True):
+        added = dupes = 0
+        t0 = time.perf_counter()
+        if pasted.strip():
+            _, created = library.add(pasted, title=title)
+            added += created
+            dupes += not created
+        for f in files or []:
+            members = iter_zip_sources(f) if f.name.lower().endswith(".zip") else [(f.name, f.getvalue())]
+            a, d = library.add_many((name, extract_text_from_bytes(name, data), "") for name, data in members)
+            added += a
+            dupes += d
+        st.success(f"Added {added} posting(s) ({dupes} already stored) in {time.perf_counter() - t0:.1f}s.")
+
+    rows = library.list()
+    if rows:
+        import pandas as pd  # only once there is a table to show
+
+        st.subheader(f"Stored postings ({len(rows)})")
+        st.dataframe(
+            pd.DataFrame([{"ID": r["id"], "Title": r["title"], "Source": r["source"]} for r in rows]),
+            use_container_width=True, hide_index=True
+        )
+        remove_id = st.number_input("Remove posting by ID", min_value=0, value=0, step=1)
+        if st.button("Remove") and remove_id:
+            library.remove(int(remove_id))
+            st.rerun()
+
+with tab_match:
+    resume_file = st.file_uploader("Upload your resume (PDF/DOCX/TXT)", type=["pdf", "docx", "txt"])
+    top_k = st.slider("Postings to analyze with the LLM", 1, 20, 5)
+
+    if resume_file is None:
+        st.info("Upload a resume to rank the stored postings.")
+    elif not len(library):
+        st.info("The library is empty — add postings in the Manage tab.")
+    else:
+        import pandas as pd
+
+        resume_text = extract_text_from_upload(resume_file)
+        t0 = time.perf_counter()
+        matches = library.rank(resume_text, top_k=50)
+        st.caption(f"Ranked {len(library)} posting(s) locally in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        st.dataframe(pd.DataFrame([m.to_row() for m in matches]), use_container_width=True, hide_index=True)
+
+        if st.button(f"🚀 Analyze top {top_k}", type="primary", use_container_width=True):
+            client = init_openai_client(api_key_override or settings.OPENAI_API_KEY, backend=settings.LLM_BACKEND)
+            cache = get_result_cache(
+                settings.CACHE_PATH, settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS
+            ) if use_cache else None
+
+            def analyze(match):
+                raw = analyze_routed(
+                    client=client, model=model, temperature=temperature,
+                    resume_text=resume_text, jd_text=match.jd.text,
+                    tiers=cascade_tiers, threshold=settings.CASCADE_THRESHOLD,
+                    resume_budget=settings.RESUME_TOKEN_BUDGET, jd_budget=settings.JD_TOKEN_BUDGET, cache=cache,
+                )
+                data = safe_json(raw)
+                if not data:
+                    return None
+                return apply_local_heuristics(apply_local_keywords(data, resume_text, match.jd.text), resume_text)
+
+            status = st.empty()
+            table = st.empty()
+            results = []
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ats-jdlib") as pool:
+                futures = {pool.submit(analyze, m): m for m in matches[:top_k]}
+                for fut in as_completed(futures):
+                    m = futures[fut]
+                    row = {"ID": m.jd.id, "Title": m.jd.title, "Local match": round(m.score * 100)}
+                    try:
+                        data = fut.result()
+                        row["ATS score"] = (data or {}).get("ats_score_overall")
+                        row["Missing (Critical)"] = ", ".join((data or {}).get("missing_critical_keywords", [])[:8])
+                        row["Error"] = "" if data else "Unexpected format from analyzer."
+                    except Exception as e:
+                        row["Error"] = f"{type(e).__name__}: {e}"
+                    results.append(row)
+                    status.info(f"Analyzed {len(results)}/{len(futures)} in {time.perf_counter() - started:.1f}s")
+                    table.dataframe(
+                        pd.DataFrame(sorted(results, key=lambda r: -(r.get("ATS score") or -1))),
+                        use_container_width=True, hide_index=True
+                    )
+            status.success(f"Done: {len(results)} analysis(es) in {time.perf_counter() - started:.1f}s")
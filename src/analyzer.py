@@ -1,13 +1,286 @@
+import contextvars
 import json
-from typing import Any, Dict
-from .prompts import ANALYSIS_SYSTEM, ANALYSIS_USER_TEMPLATE, ANALYSIS_JSON_SCHEMA, FOLLOWUP_SYSTEM
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .prompts import (
+    ANALYSIS_SYSTEM, ANALYSIS_CONTEXT_TEMPLATE, ANALYSIS_USER_TEMPLATE, ANALYSIS_JSON_SCHEMA, ANALYSIS_PART_FIELDS,
+    ANALYSIS_PART_SCHEMAS, ANALYSIS_REPAIR_NOTE, FOLLOWUP_SYSTEM, PROMPT_VERSION,
+)
+from .cache import content_key
+from .compaction import JD_TOKEN_BUDGET, RESUME_TOKEN_BUDGET, compact_jd, compact_resume
+from .jsonstream import TopLevelFieldParser
+from .schema import ValidationResult, changed_fields, salvage_json, schema_for_fields, validate_analysis
+from .retrieval import FollowupIndex, followup_context, format_chunks
+from .tracing import record_llm_call, span, timed_completion
+from .utils import safe_json
 
-def _truncate(s: str, max_chars: int = 60000) -> str:
-    if len(s) <= max_chars:
-        return s
-    head = s[: max_chars // 2]
-    tail = s[-max_chars // 2 :]
-    return head + "\n...\n" + tail
+def analysis_cache_key(
+    model: str,
+    temperature: float,
+    resume_text: str,
+    jd_text: str,
+    resume_budget: int = RESUME_TOKEN_BUDGET,
+    jd_budget: int = JD_TOKEN_BUDGET,
+) -> str:
+    return content_key(
+        "analysis", PROMPT_VERSION, ANALYSIS_SYSTEM, ANALYSIS_CONTEXT_TEMPLATE, ANALYSIS_USER_TEMPLATE,
+        ANALYSIS_JSON_SCHEMA,
+        model, float(temperature), resume_budget, jd_budget, resume_text, jd_text,
+    )
+
+def followup_cache_scope(model: str, temperature: float, resume_text: str, jd_text: str,
+                         analysis_json: Dict[str, Any]) -> str:
+    """
+    Everything but the question that shapes a follow-up answer (see semcache.py).
+    """
+    return content_key(
+        "followup", PROMPT_VERSION, FOLLOWUP_SYSTEM, model, float(temperature), resume_text, jd_text,
+        json.dumps(analysis_json, sort_keys=True, ensure_ascii=False),
+    )
+
+def decomposed_cache_key(model: str, temperature: float, resume_text: str, jd_text: str,
+                         resume_budget: int = RESUME_TOKEN_BUDGET, jd_budget: int = JD_TOKEN_BUDGET) -> str:
+    return content_key(
+        analysis_cache_key(model, temperature, resume_text, jd_text, resume_budget, jd_budget),
+        "decomposed", sorted(ANALYSIS_PART_SCHEMAS.items()),
+    )
+
+def _compacted_inputs(model: str, resume_text: str, jd_text: str, resume_budget: int, jd_budget: int) -> Tuple[str, str]:
+    return (
+        compact_resume(resume_text, resume_budget, model=model, label="analysis.resume").text,
+        compact_jd(jd_text, jd_budget, model=model, label="analysis.jd").text,
+    )
+
+def _analysis_messages(model: str, resume_text: str, jd_text: str, resume_budget: int, jd_budget: int) -> List[Dict[str, str]]:
+    resume, jd = _compacted_inputs(model, resume_text, jd_text, resume_budget, jd_budget)
+    return _messages_for(resume, jd, ANALYSIS_JSON_SCHEMA)
+
+def _messages_for(resume: str, jd: str, schema: str) -> List[Dict[str, str]]:
+    """
+    System prompt, then schema + JD, then the resume: with one JD and many resumes every
+    request shares the same leading bytes, which the provider's prompt cache bills and
+    prefills at a discount (see the cached_tokens recorded per call in tracing.py).
+    """
+    return [
+        {"role": "system", "content": ANALYSIS_SYSTEM},
+        {"role": "user", "content": ANALYSIS_CONTEXT_TEMPLATE.format(schema=schema, jd=jd)},
+        {"role": "user", "content": ANALYSIS_USER_TEMPLATE.format(resume=resume)},
+    ]
+
+def validate_and_repair(
+    client,
+    model: str,
+    temperature: float,
+    resume: str,
+    jd: str,
+    data: Dict[str, Any],
+    repair: bool = True,
+) -> ValidationResult:
+    """
+    Coerces `data` to the analysis schema; fields that are still missing or invalid are
+    regenerated with one small request for just those fields instead of a full re-run.
+    `resume` / `jd` are the already-compacted prompt inputs.
+    """
+    with span("validate"):
+        result = validate_analysis(data)
+    if result.ok or not repair:
+        return result
+    # optional fields that went missing ride along, since a request is being made anyway
+    fields = list(result.invalid) + result.defaulted
+    messages = _messages_for(resume, jd, schema_for_fields(fields))
+    messages.append({"role": "user", "content": ANALYSIS_REPAIR_NOTE})
+    try:
+        resp = timed_completion(
+            "repair",
+            client,
+            model=model,
+            temperature=temperature,
+            response_format={"type": "json_object"},
+            messages=messages,
+        )
+        patch = salvage_json(resp.choices[0].message.content)
+    except Exception as e:
+        result.repair_error = f"{type(e).__name__}: {e}"
+        return result
+    merged = {k: v for k, v in result.data.items() if k not in result.defaulted}
+    merged.update((k, patch[k]) for k in fields if k in patch)
+    repaired = validate_analysis(merged)
+    repaired.coerced = sorted(set(result.coerced) | set(repaired.coerced))
+    repaired.repaired = [k for k in fields if k not in repaired.invalid]
+    return repaired
+
+class _AnalysisRun:
+    """
+    Shared state of the iterable analysis runs: timings, the final `raw` JSON and the
+    ValidationResult (`validation`) once iteration finishes.
+    """
+
+    def __init__(self, client, model: str, temperature: float, resume: str, jd: str,
+                 cached: Optional[str] = None, cache=None, key: Optional[str] = None):
+        self._client = client
+        self._model = model
+        self._temperature = temperature
+        self._resume = resume
+        self._jd = jd
+        self._cache = cache
+        self._key = key
+        self.raw = cached or ""
+        self.from_cache = cached is not None
+        self.first_token_seconds: Optional[float] = None
+        self.first_section_seconds: Optional[float] = None
+        self.total_seconds: Optional[float] = None
+        self.field_seconds: Dict[str, float] = {}
+        self.validation: Optional[ValidationResult] = None
+
+    def _replay_cached(self, started: float) -> Iterator[Tuple[str, Any]]:
+        for k, v in (safe_json(self.raw) or {}).items():
+            yield k, v
+        self.total_seconds = self.first_section_seconds = time.perf_counter() - started
+
+    def _finalize(self, collected: Dict[str, Any], started: float, cacheable: bool = True) -> Iterator[Tuple[str, Any]]:
+        """
+        Validates what was collected, repairs bad fields, and yields every field whose value
+        changed so renderers can redraw it.
+        """
+        self.validation = validate_and_repair(
+            self._client, self._model, self._temperature, self._resume, self._jd, collected
+        )
+        for k, v in changed_fields(collected, self.validation.data):
+            self.field_seconds[k] = time.perf_counter() - started
+            yield k, v
+        if self.validation.data:
+            self.raw = json.dumps(self.validation.data, ensure_ascii=False)
+        self.total_seconds = time.perf_counter() - started
+        if self._key is not None and cacheable and self.validation.ok:
+            self._cache.set(self._key, self.raw)
+
+class AnalysisStream(_AnalysisRun):
+    """
+    Iterates (field, value) pairs of the analysis JSON as each top-level field closes.
+    After iteration, `raw` holds the full JSON text and the timing attributes are set:
+    time to first token, time to first complete field, and total latency (seconds).
+    Fields that arrive invalid (or never arrive, e.g. on truncation) are repaired at the end
+    and yielded again.
+    """
+
+    def __iter__(self) -> Iterator[Tuple[str, Any]]:
+        started = time.perf_counter()
+        if self.from_cache:
+            yield from self._replay_cached(started)
+            return
+        collected: Dict[str, Any] = {}
+        with span("llm.analysis", model=self._model, stream=True):
+            for k, v in self._stream(started):
+                collected[k] = v
+                yield k, v
+        if not collected:
+            collected = salvage_json(self.raw)
+        yield from self._finalize(collected, started)
+
+    def _stream(self, started: float) -> Iterator[Tuple[str, Any]]:
+        parser = TopLevelFieldParser()
+        usage = None
+        stream = self._client.chat.completions.create(
+            model=self._model,
+            temperature=self._temperature,
+            response_format={"type": "json_object"},
+            messages=_messages_for(self._resume, self._jd, ANALYSIS_JSON_SCHEMA),
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if self.first_token_seconds is None:
+                self.first_token_seconds = time.perf_counter() - started
+            for k, v in parser.feed(delta):
+                elapsed = time.perf_counter() - started
+                self.field_seconds[k] = elapsed
+                if self.first_section_seconds is None:
+                    self.first_section_seconds = elapsed
+                yield k, v
+        self.raw = parser.buffer
+        self.total_seconds = time.perf_counter() - started
+        record_llm_call("analysis", self._model, usage, self.total_seconds, self.first_token_seconds)
+
+class DecomposedAnalysis(_AnalysisRun):
+    """
+    Runs the analysis as independent sub-prompts (prompts.ANALYSIS_PART_SCHEMAS) on a thread
+    pool and iterates (field, value) pairs as each part finishes, so wall-clock time is
+    roughly that of the slowest part. Attributes mirror AnalysisStream; `raw` is the merged
+    JSON in the usual shape. Parts that fail are listed in `errors` and their fields are
+    regenerated by the final repair step.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.part_seconds: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    def _run_part(self, name: str) -> Dict[str, Any]:
+        resp = timed_completion(
+            f"analysis.{name}",
+            self._client,
+            model=self._model,
+            temperature=self._temperature,
+            response_format={"type": "json_object"},
+            messages=_messages_for(self._resume, self._jd, ANALYSIS_PART_SCHEMAS[name]),
+        )
+        data = salvage_json(resp.choices[0].message.content)
+        if not data:
+            raise ValueError(f"part {name!r} returned invalid JSON")
+        return data
+
+    def __iter__(self) -> Iterator[Tuple[str, Any]]:
+        started = time.perf_counter()
+        if self.from_cache:
+            yield from self._replay_cached(started)
+            return
+        merged: Dict[str, Any] = {}
+        with ThreadPoolExecutor(max_workers=len(ANALYSIS_PART_SCHEMAS), thread_name_prefix="ats-part") as pool:
+            # each part runs in a copy of this context so its spans land in the caller's trace
+            futures = {
+                pool.submit(contextvars.copy_context().run, self._run_part, name): name
+                for name in ANALYSIS_PART_SCHEMAS
+            }
+            for fut in as_completed(futures):
+                name = futures[fut]
+                elapsed = time.perf_counter() - started
+                self.part_seconds[name] = elapsed
+                try:
+                    data = fut.result()
+                except Exception as e:
+                    self.errors[name] = f"{type(e).__name__}: {e}"
+                    continue
+                if self.first_section_seconds is None:
+                    self.first_token_seconds = self.first_section_seconds = elapsed
+                for k in ANALYSIS_PART_FIELDS[name]:
+                    if k in data:
+                        merged[k] = data[k]
+                        self.field_seconds[k] = elapsed
+                        yield k, data[k]
+        if len(self.errors) == len(ANALYSIS_PART_SCHEMAS):
+            # nothing to repair from; let the caller decide (don't spend a full-size repair call)
+            self.total_seconds = time.perf_counter() - started
+            return
+        yield from self._finalize(merged, started)
+
+def _cached_analysis(cache, refresh: bool, decomposed: bool, model: str, temperature: float, resume_text: str,
+                     jd_text: str, resume_budget: int, jd_budget: int) -> Tuple[Optional[str], Optional[str]]:
+    """
+    (cache key, cached JSON); the key is None without a cache, the JSON None on a miss or refresh.
+    """
+    if cache is None:
+        return None, None
+    key_fn = decomposed_cache_key if decomposed else analysis_cache_key
+    key = key_fn(model, temperature, resume_text, jd_text, resume_budget, jd_budget)
+    return key, (None if refresh else cache.get(key))
 
 def analyze_resume_against_jd(
     client,
@@ -15,27 +288,78 @@ def analyze_resume_against_jd(
     temperature: float,
     resume_text: str,
     jd_text: str,
-    max_chars: int = 60000
-) -> str:
-    resume_text = _truncate(resume_text, max_chars)
-    jd_text = _truncate(jd_text, max_chars)
+    resume_budget: int = RESUME_TOKEN_BUDGET,
+    jd_budget: int = JD_TOKEN_BUDGET,
+    cache=None,
+    refresh: bool = False,
+    stream: bool = False,
+    decomposed: bool = False,
+):
+    """
+    Returns the analysis JSON string, checked and coerced against the schema; fields the
+    model got wrong or cut off are regenerated by a targeted repair request (see schema.py).
+    Inputs are compacted to the given token budgets (see compaction.py) before prompting.
+    With a `ResultCache`, identical inputs are served from disk; `refresh=True` skips the lookup
+    but still stores the fresh result. run_analysis() also says whether it was a cache hit.
+    With `stream=True`, returns an AnalysisStream that yields fields as they are generated.
+    With `decomposed=True`, the analysis is split into concurrent sub-prompts (DecomposedAnalysis);
+    combined with `stream=True` the DecomposedAnalysis itself is returned.
+    """
+    if not stream:
+        return run_analysis(client, model, temperature, resume_text, jd_text, resume_budget, jd_budget,
+                            cache=cache, refresh=refresh, decomposed=decomposed)[0]
+    key, cached = _cached_analysis(cache, refresh, decomposed, model, temperature, resume_text, jd_text,
+                                   resume_budget, jd_budget)
+    resume, jd = _compacted_inputs(model, resume_text, jd_text, resume_budget, jd_budget)
+    run_cls = DecomposedAnalysis if decomposed else AnalysisStream
+    return run_cls(client, model, temperature, resume, jd, cached=cached, cache=cache, key=key)
 
-    user_msg = ANALYSIS_USER_TEMPLATE.format(
-        resume=resume_text,
-        jd=jd_text,
-        schema=ANALYSIS_JSON_SCHEMA
-    )
+def run_analysis(
+    client,
+    model: str,
+    temperature: float,
+    resume_text: str,
+    jd_text: str,
+    resume_budget: int = RESUME_TOKEN_BUDGET,
+    jd_budget: int = JD_TOKEN_BUDGET,
+    cache=None,
+    refresh: bool = False,
+    decomposed: bool = False,
+) -> Tuple[str, bool]:
+    """
+    The non-streamed analyze_resume_against_jd(): (analysis JSON, whether it was served from `cache`).
+    The flag belongs to this call, unlike the cache's shared hit counter.
+    """
+    key, cached = _cached_analysis(cache, refresh, decomposed, model, temperature, resume_text, jd_text,
+                                   resume_budget, jd_budget)
+    if cached is not None:
+        return cached, True
+
+    resume, jd = _compacted_inputs(model, resume_text, jd_text, resume_budget, jd_budget)
+    if decomposed:
+        parts = DecomposedAnalysis(client, model, temperature, resume, jd, cache=cache, key=key)
+        for _ in parts:
+            pass
+        if len(parts.errors) == len(ANALYSIS_PART_SCHEMAS):
+            raise RuntimeError("All analysis parts failed: " + "; ".join(parts.errors.values()))
+        return parts.raw, False
 
-    resp = client.chat.completions.create(
+    resp = timed_completion(
+        "analysis",
+        client,
         model=model,
         temperature=temperature,
         response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": ANALYSIS_SYSTEM},
-            {"role": "user", "content": user_msg},
-        ],
+        messages=_messages_for(resume, jd, ANALYSIS_JSON_SCHEMA),
     )
-    return resp.choices[0].message.content
+    content = resp.choices[0].message.content
+    result = validate_and_repair(client, model, temperature, resume, jd, salvage_json(content))
+    if result.data:
+        content = json.dumps(result.data, ensure_ascii=False)
+    # only complete, valid results are worth replaying
+    if key is not None and result.ok:
+        cache.set(key, content)
+    return content, False
 
 def ask_followup(
     client,
@@ -45,17 +369,42 @@ def ask_followup(
     jd_text: str,
     analysis_json: Dict[str, Any],
     user_question: str,
+    index: Optional[FollowupIndex] = None,
+    semantic_cache=None,
 ) -> str:
-    context_blob = json.dumps(analysis_json, ensure_ascii=False)
-    resp = client.chat.completions.create(
+    """
+    Answers from retrieved context only: the analysis fields the question is about and the
+    top BM25 chunks of the resume/JD (indexed once per resume/JD pair, see retrieval.py).
+    With a `semantic_cache`, a close enough earlier question about the same analysis is
+    answered from the cache without a completion.
+    """
+    scope = followup_cache_scope(model, temperature, resume_text, jd_text, analysis_json) \
+        if semantic_cache is not None else None
+    if scope is not None:
+        with span("semantic_cache") as sp:
+            hit = semantic_cache.lookup(scope, user_question)
+            if sp is not None:
+                sp.attrs.update(hit=hit is not None, similarity=round(hit.similarity, 3) if hit else None)
+        if hit is not None:
+            return hit.value
+    with span("retrieval") as sp:
+        fields, chunks = followup_context(analysis_json, user_question, resume_text, jd_text, model=model, index=index)
+        if sp is not None:
+            sp.attrs.update(fields=len(fields), chunks=len(chunks))
+    resp = timed_completion(
+        "followup",
+        client,
         model=model,
         temperature=temperature,
         messages=[
             {"role": "system", "content": FOLLOWUP_SYSTEM},
             {"role": "user", "content": f"User question: {user_question}"},
-            {"role": "user", "content": f"Analysis JSON: {context_blob}"},
-            {"role": "user", "content": f"Resume snippet:\n{resume_text[:4000]}"},
-            {"role": "user", "content": f"JD snippet:\n{jd_text[:4000]}"},
+            {"role": "user", "content": f"Analysis JSON (relevant fields): {json.dumps(fields, ensure_ascii=False)}"},
+            {"role": "user", "content": f"Resume excerpts:\n{format_chunks(chunks, 'resume')}"},
+            {"role": "user", "content": f"JD excerpts:\n{format_chunks(chunks, 'jd')}"},
         ],
     )
-    return resp.choices[0].message.content
+    answer = resp.choices[0].message.content
+    if scope is not None and answer:
+        semantic_cache.set(scope, user_question, answer)
+    return answer
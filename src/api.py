@@ -0,0 +1,422 @@
+"""
+Headless HTTP API for the analysis core, with an in-process job queue and a worker pool.
+
+    python -m src.api --port 8000 --workers 16
+    ATS_LLM_BACKEND=fake python -m src.api          # no API key / network needed
+
+Endpoints (JSON unless noted):
+    POST /v1/extract?filename=resume.pdf   raw file bytes -> {"text", "pages", ...}
+    POST /v1/analyze    {"resume_text", "jd_text", "model"?, "temperature"?, "decomposed"?}
+    POST /v1/rewrite    {"resume_text", "jd_text", "rewrite_goal", ...}
+    POST /v1/followup   {"resume_text", "jd_text", "analysis", "question", ...}
+        -> 202 {"job_id", "status_url", "stream_url"}; add ?wait=1 to get the finished job instead
+        any job may set "priority": "batch" to yield to interactive requests under rate limiting;
+        "model": "auto" routes the analysis through the cheap-first cascade (one "cascade" event);
+        rewrites/follow-ups close to an earlier goal/question are answered from the semantic cache
+        ("use_cache": false skips it)
+    GET  /v1/jobs/{id}          status, timings and result
+    GET  /v1/jobs/{id}/stream   NDJSON events: {"event": "field", ...} as analysis fields close, then "done"/"error"
+    GET  /healthz               queue depth, worker counts, LLM rate-limit, cascade and semantic cache metrics
+
+Requires starlette and uvicorn (listed in requirements.txt).
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from .analyzer import analyze_resume_against_jd, ask_followup
+from .cache import get_result_cache
+from .cascade import AUTO_MODEL, analyze_with_cascade, cascade_stats, parse_tiers
+from .config import get_settings, init_openai_client, semantic_cache
+from .heuristics import apply_local_heuristics
+from .keywords import apply_local_keywords
+from .parsing import extract_document
+from .ratelimit import BATCH, INTERACTIVE, rate_limit_stats, request_priority
+from .rewrite import generate_rewrites
+from .tracing import configure as configure_tracing, trace
+from .utils import safe_json
+
+MAX_FINISHED_JOBS = 1000
+EXTRACT_THREADS = 4  # /v1/extract requests in flight; PDFs are parsed in parsing.py's process pool
+
+class QueueFull(Exception):
+    pass
+
+@dataclass
+class Job:
+    kind: str
+    params: Dict[str, Any]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"  # queued | running | done | error
+    result: Any = None
+    error: str = ""
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    trace: Optional[Dict[str, Any]] = None
+    _changed: Optional[asyncio.Event] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "error")
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created": self.created,
+            "queued_seconds": (self.started or time.time()) - self.created if self.status != "queued" else None,
+            "run_seconds": (self.finished - self.started) if self.finished and self.started else None,
+        }
+        if self.status == "done":
+            out["result"] = self.result
+        if self.status == "error":
+            out["error"] = self.error
+        if self.trace:
+            out["tokens"] = {k: self.trace[k] for k in ("prompt_tokens", "completion_tokens", "cached_tokens", "cost_usd")}
+        return out
+
+class JobQueue:
+    """
+    Bounded asyncio queue drained by `workers` coroutines, each running one blocking job at
+    a time on a thread pool. Events emitted from worker threads are handed back to the loop
+    so stream readers wake up without polling.
+    """
+
+    def __init__(self, handlers: Dict[str, Callable[[Job, Callable[[Dict[str, Any]], None]], Any]],
+                 workers: int = 8, max_queue: int = 1000):
+        self.handlers = handlers
+        self.workers = max(1, int(workers))
+        self.max_queue = max_queue
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ats-api")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Job:
+        job = Job(kind, params, _changed=asyncio.Event())
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(f"queue is full ({self.max_queue} jobs waiting)") from None
+        self.jobs[job.id] = job
+        self._trim()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _trim(self) -> None:
+        finished = [jid for jid, j in self.jobs.items() if j.done]
+        for jid in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[jid]
+
+    def _notify(self, job: Job) -> None:
+        job._changed.set()
+
+    def _emit(self, job: Job, event: Dict[str, Any]) -> None:
+        # called from worker threads
+        job.events.append(event)
+        self._loop.call_soon_threadsafe(self._notify, job)
+
+    def _run(self, job: Job) -> Any:
+        # {"priority": "batch"} queues the job's LLM calls behind interactive work (see ratelimit.py)
+        priority = BATCH if job.params.get("priority") == "batch" else INTERACTIVE
+        with trace(f"api.{job.kind}") as tr, request_priority(priority):
+            try:
+                return self.handlers[job.kind](job, lambda ev: self._emit(job, ev))
+            finally:
+                job.trace = tr.to_dict()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started = time.time()
+            self.running += 1
+            self._notify(job)
+            try:
+                job.result = await self._loop.run_in_executor(self._pool, self._run, job)
+                job.status = "done"
+                self.completed += 1
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                job.status = "error"
+                self.failed += 1
+            finally:
+                self.running -= 1
+                job.finished = time.time()
+                self._notify(job)
+                self._queue.task_done()
+
+    async def wait(self, job: Job) -> Job:
+        while not job.done:
+            job._changed.clear()
+            if job.done:
+                break
+            await job._changed.wait()
+        return job
+
+    async def iter_events(self, job: Job):
+        sent = 0
+        while True:
+            job._changed.clear()
+            while sent < len(job.events):
+                yield job.events[sent]
+                sent += 1
+            if job.done:
+                break
+            await job._changed.wait()
+        if job.status == "done":
+            yield {"event": "done", "result": job.result}
+        else:
+            yield {"event": "error", "error": job.error}
+
+class Service:
+    """
+    The operations behind the endpoints, bound to one pooled LLM client, the result cache
+    and the semantic answer cache.
+    """
+
+    def __init__(self, client=None, cache=None):
+        self.settings = get_settings()
+        self.client = client
+        self.cache = cache
+        self.answers = semantic_cache(self.settings)
+
+    def _client(self):
+        if self.client is None:
+            self.client = init_openai_client(self.settings.OPENAI_API_KEY, backend=self.settings.LLM_BACKEND)
+        return self.client
+
+    def _common(self, p: Dict[str, Any]) -> Dict[str, Any]:
+        model = p.get("model") or self.settings.DEFAULT_MODEL
+        if model == AUTO_MODEL:
+            model = parse_tiers(self.settings.CASCADE_MODELS)[0]
+        return {"model": model, "temperature": float(p.get("temperature", 0.2))}
+
+    def analyze(self, job: Job, emit) -> Dict[str, Any]:
+        p = job.params
+        resume_text, jd_text = p["resume_text"], p["jd_text"]
+        if p.get("model") == AUTO_MODEL:
+            return self._analyze_cascade(p, emit)
+        stream = analyze_resume_against_jd(
+            client=self._client(),
+            resume_text=resume_text,
+            jd_text=jd_text,
+            resume_budget=self.settings.RESUME_TOKEN_BUDGET,
+            jd_budget=self.settings.JD_TOKEN_BUDGET,
+            cache=self.cache if p.get("use_cache", True) else None,
+            refresh=bool(p.get("refresh", False)),
+            stream=True,
+            decomposed=bool(p.get("decomposed", False)),
+            **self._common(p),
+        )
+        for name, value in stream:
+            emit({"event": "field", "field": name, "value": value})
+        data = safe_json(stream.raw)
+        if not data:
+            raise ValueError("The analyzer returned an unexpected format.")
+        return apply_local_heuristics(apply_local_keywords(data, resume_text, jd_text), resume_text)
+
+    def _analyze_cascade(self, p: Dict[str, Any], emit) -> Dict[str, Any]:
+        resume_text, jd_text = p["resume_text"], p["jd_text"]
+        routed = analyze_with_cascade(
+            client=self._client(),
+            temperature=float(p.get("temperature", 0.2)),
+            resume_text=resume_text,
+            jd_text=jd_text,
+            tiers=parse_tiers(self.settings.CASCADE_MODELS),
+            resume_budget=self.settings.RESUME_TOKEN_BUDGET,
+            jd_budget=self.settings.JD_TOKEN_BUDGET,
+            cache=self.cache if p.get("use_cache", True) else None,
+            refresh=bool(p.get("refresh", False)),
+            threshold=self.settings.CASCADE_THRESHOLD,
+        )
+        emit({"event": "cascade", "model": routed.model, "attempts": [asdict(a) for a in routed.attempts]})
+        data = safe_json(routed.raw)
+        if not data:
+            raise ValueError("The analyzer returned an unexpected format.")
+        for name, value in data.items():
+            emit({"event": "field", "field": name, "value": value})
+        return apply_local_heuristics(apply_local_keywords(data, resume_text, jd_text), resume_text)
+
+    def rewrite(self, job: Job, emit) -> Dict[str, Any]:
+        p = job.params
+        text = generate_rewrites(
+            self._client(), resume_text=p["resume_text"], jd_text=p["jd_text"], rewrite_goal=p["rewrite_goal"],
+            semantic_cache=self.answers if p.get("use_cache", True) else None, **self._common(p),
+        )
+        return {"rewrites": text}
+
+    def followup(self, job: Job, emit) -> Dict[str, Any]:
+        p = job.params
+        answer = ask_followup(
+            self._client(), resume_text=p["resume_text"], jd_text=p["jd_text"],
+            analysis_json=p.get("analysis") or {}, user_question=p["question"],
+            semantic_cache=self.answers if p.get("use_cache", True) else None, **self._common(p),
+        )
+        return {"answer": answer}
+
+    def handlers(self) -> Dict[str, Callable]:
+        return {"analyze": self.analyze, "rewrite": self.rewrite, "followup": self.followup}
+
+REQUIRED = {
+    "analyze": ("resume_text", "jd_text"),
+    "rewrite": ("resume_text", "jd_text", "rewrite_goal"),
+    "followup": ("resume_text", "jd_text", "question"),
+}
+
+def create_app(workers: int = 8, max_queue: int = 1000, client=None, cache=None):
+    """
+    Builds the Starlette app. `client` / `cache` override the configured ones (tests, benchmarks).
+    """
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, StreamingResponse
+    from starlette.routing import Route
+
+    settings = get_settings()
+    configure_tracing(settings.METRICS_PATH or None)
+    if cache is None and settings.CACHE_PATH:
+        cache = get_result_cache(settings.CACHE_PATH, settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+    service = Service(client=client, cache=cache)
+    queue = JobQueue(service.handlers(), workers=workers, max_queue=max_queue)
+    # extraction gets its own threads (created in lifespan), so uploads never wait behind LLM jobs
+    extract_pool: List[ThreadPoolExecutor] = []
+
+    def job_links(job: Job) -> Dict[str, Any]:
+        return {"job_id": job.id, "status": job.status,
+                "status_url": f"/v1/jobs/{job.id}", "stream_url": f"/v1/jobs/{job.id}/stream"}
+
+    def make_submit(kind: str):
+        async def submit(request):
+            try:
+                params = await request.json()
+            except ValueError:
+                return JSONResponse({"error": "body must be JSON"}, status_code=400)
+            if not isinstance(params, dict):
+                return JSONResponse({"error": "body must be a JSON object"}, status_code=400)
+            missing = [k for k in REQUIRED[kind] if not str(params.get(k) or "").strip()]
+            if missing:
+                return JSONResponse({"error": f"missing field(s): {', '.join(missing)}"}, status_code=422)
+            try:
+                job = queue.submit(kind, params)
+            except QueueFull as e:
+                return JSONResponse({"error": str(e)}, status_code=429, headers={"retry-after": "1"})
+            if request.query_params.get("wait") in ("1", "true"):
+                await queue.wait(job)
+                return JSONResponse(job.to_dict(), status_code=200 if job.status == "done" else 500)
+            return JSONResponse(job_links(job), status_code=202)
+        return submit
+
+    async def extract(request):
+        filename = request.query_params.get("filename", "")
+        if not filename:
+            return JSONResponse({"error": "pass ?filename= so the file type is known"}, status_code=422)
+        data = await request.body()
+        loop = asyncio.get_running_loop()
+        doc = await loop.run_in_executor(extract_pool[0], extract_document, filename, data)
+        return JSONResponse({
+            "text": doc.text, "pages": len(doc.pages), "page_count": doc.page_count,
+            "truncated": doc.truncated, "timed_out": doc.timed_out, "page_errors": doc.page_errors,
+            "seconds": doc.elapsed,
+            "from_cache": doc.from_cache,
+        })
+
+    async def job_status(request):
+        job = queue.get(request.path_params["job_id"])
+        if job is None:
+            return JSONResponse({"error": "unknown job"}, status_code=404)
+        return JSONResponse(job.to_dict())
+
+    async def job_stream(request):
+        job = queue.get(request.path_params["job_id"])
+        if job is None:
+            return JSONResponse({"error": "unknown job"}, status_code=404)
+
+        async def lines():
+            async for ev in queue.iter_events(job):
+                yield json.dumps(ev, ensure_ascii=False) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    async def health(request):
+        return JSONResponse({
+            "status": "ok", "workers": queue.workers, "running": queue.running, "queued": queue.depth,
+            "completed": queue.completed, "failed": queue.failed, "backend": settings.LLM_BACKEND,
+            "rate_limits": rate_limit_stats(), "cascade": cascade_stats(),
+            "semantic_cache": service.answers.stats() if service.answers is not None else None,
+        })
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await queue.start()
+        extract_pool[:] = [ThreadPoolExecutor(max_workers=EXTRACT_THREADS, thread_name_prefix="ats-extract")]
+        try:
+            yield
+        finally:
+            await queue.stop()
+            extract_pool.pop().shutdown(wait=False, cancel_futures=True)
+
+    app = Starlette(
+        routes=[
+            Route("/healthz", health),
+            Route("/v1/extract", extract, methods=["POST"]),
+            Route("/v1/analyze", make_submit("analyze"), methods=["POST"]),
+            Route("/v1/rewrite", make_submit("rewrite"), methods=["POST"]),
+            Route("/v1/followup", make_submit("followup"), methods=["POST"]),
+            Route("/v1/jobs/{job_id}", job_status),
+            Route("/v1/jobs/{job_id}/stream", job_stream),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.queue = queue
+    return app
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent LLM jobs")
+    parser.add_argument("--max-queue", type=int, default=1000, help="Waiting jobs before new ones get HTTP 429")
+    args = parser.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        print("The API server needs uvicorn and starlette: pip install uvicorn starlette", file=sys.stderr)
+        return 1
+    uvicorn.run(create_app(args.workers, args.max_queue), host=args.host, port=args.port, log_level="info")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
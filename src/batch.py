@@ -0,0 +1,316 @@
+import argparse
+import csv
+import io
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .analyzer import analyze_resume_against_jd
+from .cascade import AUTO_MODEL, DECISION_THRESHOLD, DEFAULT_TIERS, analyze_with_cascade, cascade_stats, parse_tiers
+from .compaction import JD_TOKEN_BUDGET, RESUME_TOKEN_BUDGET
+from .export import FORMATS, SECTION_KEYS, ReportZipWriter
+from .heuristics import apply_local_heuristics
+from .keywords import batch_keyword_fields, merge_keyword_fields
+from .parsing import extract_text_from_bytes
+from .ratelimit import BATCH, request_priority
+from .utils import safe_json
+
+SUPPORTED_SUFFIXES = (".pdf", ".docx", ".txt", ".md")
+
+@dataclass
+class BatchResult:
+    name: str
+    data: Optional[Dict[str, Any]] = None
+    error: str = ""
+    elapsed: float = 0.0
+    attempts: int = 0
+    model: str = ""          # with the cascade: the tier whose analysis was kept
+    escalated: bool = False
+    resume_text: str = field(default="", repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.data is not None
+
+    @property
+    def score(self) -> float:
+        try:
+            return float((self.data or {}).get("ats_score_overall", 0) or 0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def to_row(self) -> Dict[str, Any]:
+        data = self.data or {}
+        sec = data.get("section_scores", {}) or {}
+        row: Dict[str, Any] = {"Resume": self.name, "Overall": round(self.score) if self.ok else None}
+        for k in SECTION_KEYS:
+            row[k] = sec.get(k)
+        row["Missing (Critical)"] = ", ".join(data.get("missing_critical_keywords", []) or [])
+        row["Model"] = self.model
+        row["Seconds"] = round(self.elapsed, 2)
+        row["Error"] = self.error
+        return row
+
+def _is_supported(name: str) -> bool:
+    return name.lower().endswith(SUPPORTED_SUFFIXES) and not Path(name).name.startswith(".")
+
+def iter_zip_sources(zip_file) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yields (member name, bytes) for supported files in a zip (path or file-like).
+    Members are read one at a time so large archives don't sit in memory.
+    """
+    with zipfile.ZipFile(zip_file) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or not _is_supported(info.filename) or "__MACOSX" in info.filename:
+                continue
+            yield info.filename, zf.read(info)
+
+def iter_resume_sources(path: str | Path) -> Iterator[Tuple[str, bytes]]:
+    """
+    Accepts a folder (searched recursively), a .zip, or a single resume file.
+    """
+    p = Path(path)
+    if p.is_dir():
+        for f in sorted(p.rglob("*")):
+            if f.is_file() and _is_supported(f.name):
+                yield str(f.relative_to(p)), f.read_bytes()
+    elif p.suffix.lower() == ".zip":
+        yield from iter_zip_sources(p)
+    elif p.is_file():
+        yield p.name, p.read_bytes()
+    else:
+        raise FileNotFoundError(f"No resumes found at {p}")
+
+def _with_timeout(client, timeout: Optional[float]):
+    # openai>=1.0 clients support per-request overrides; anything else is used as-is
+    if timeout and hasattr(client, "with_options"):
+        return client.with_options(timeout=timeout, max_retries=0)
+    return client
+
+def score_resume(
+    client,
+    model: str,
+    temperature: float,
+    name: str,
+    data: bytes,
+    jd_text: str,
+    timeout: Optional[float] = 120.0,
+    retries: int = 2,
+    cache=None,
+    priority: int = BATCH,
+    tiers: Sequence[str] = DEFAULT_TIERS,
+    threshold: float = DECISION_THRESHOLD,
+    resume_budget: int = RESUME_TOKEN_BUDGET,
+    jd_budget: int = JD_TOKEN_BUDGET,
+    local_keywords: bool = True,
+) -> BatchResult:
+    """
+    Extracts and analyzes one resume. LLM calls are scheduled at batch priority by default,
+    behind interactive sessions (see ratelimit.py). With model AUTO_MODEL the analysis goes
+    through the `tiers` cascade (see cascade.py).
+
+    Transport errors and 429s are retried by the client's RetryPolicy only; `retries` here
+    re-runs the analysis when the model answered with something that isn't the JSON schema.
+    With `local_keywords=False` the keyword fields and local scores are left to the caller
+    (see apply_batch_keywords).
+    """
+    started = time.perf_counter()
+    result = BatchResult(name=name)
+    resume_text = result.resume_text = extract_text_from_bytes(name, data)
+    if not resume_text.strip():
+        result.error = "Could not extract text."
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    call_client = _with_timeout(client, timeout)
+    with request_priority(priority):
+        for attempt in range(retries + 1):
+            result.attempts = attempt + 1
+            try:
+                if model == AUTO_MODEL:
+                    routed = analyze_with_cascade(
+                        call_client, temperature, resume_text, jd_text, tiers,
+                        resume_budget=resume_budget, jd_budget=jd_budget, cache=cache, threshold=threshold,
+                    )
+                    raw, result.model, result.escalated = routed.raw, routed.model, routed.escalated
+                else:
+                    raw = analyze_resume_against_jd(
+                        client=call_client,
+                        model=model,
+                        temperature=temperature,
+                        resume_text=resume_text,
+                        jd_text=jd_text,
+                        resume_budget=resume_budget,
+                        jd_budget=jd_budget,
+                        cache=cache,
+                    )
+                    result.model = model
+            except Exception as e:
+                # the client already spent its retry budget on this call
+                result.error = f"{type(e).__name__}: {e}"
+                break
+            parsed = safe_json(raw)
+            if parsed:
+                result.data = parsed
+                result.error = ""
+                break
+            result.error = "Unexpected format from analyzer."
+    if local_keywords:
+        apply_batch_keywords([result], jd_text)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+def apply_batch_keywords(results: Sequence[BatchResult], jd_text: str) -> None:
+    """
+    Overlays the locally computed keyword fields and scores on every successful result,
+    counting all their resumes against the JD's matcher as one density matrix.
+    """
+    scored = [r for r in results if r.ok]
+    fields = batch_keyword_fields([r.resume_text for r in scored], jd_text)
+    for r, kw in zip(scored, fields):
+        r.data = apply_local_heuristics(merge_keyword_fields(r.data, kw), r.resume_text)
+
+def run_batch(
+    client,
+    model: str,
+    temperature: float,
+    sources: Iterable[Tuple[str, bytes]],
+    jd_text: str,
+    workers: int = 4,
+    timeout: Optional[float] = 120.0,
+    retries: int = 2,
+    cache=None,
+    tiers: Sequence[str] = DEFAULT_TIERS,
+    threshold: float = DECISION_THRESHOLD,
+    resume_budget: int = RESUME_TOKEN_BUDGET,
+    jd_budget: int = JD_TOKEN_BUDGET,
+) -> Iterator[BatchResult]:
+    """
+    Scores every (name, bytes) source against one JD on a thread pool and yields
+    results in completion order. At most 2 * workers documents are in flight.
+    Pass the configured token budgets so results (and cache keys) match the single-resume app.
+    Keyword fields are counted for each set of results that finish together, as one
+    resumes x keywords matrix (see keywords.batch_keyword_fields).
+    """
+    workers = max(1, int(workers))
+    it = iter(sources)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ats-batch") as pool:
+        pending = set()
+
+        def submit_next() -> bool:
+            try:
+                name, data = next(it)
+            except StopIteration:
+                return False
+            pending.add(pool.submit(
+                score_resume, client, model, temperature, name, data, jd_text,
+                timeout=timeout, retries=retries, cache=cache, tiers=tiers, threshold=threshold,
+                resume_budget=resume_budget, jd_budget=jd_budget, local_keywords=False,
+            ))
+            return True
+
+        while len(pending) < workers * 2 and submit_next():
+            pass
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            pending -= done
+            for _ in done:
+                submit_next()
+            finished = [fut.result() for fut in done]
+            apply_batch_keywords(finished, jd_text)
+            yield from finished
+
+def rank_results(results: Iterable[BatchResult]) -> List[Dict[str, Any]]:
+    ordered = sorted(results, key=lambda r: (not r.ok, -r.score, r.name))
+    rows = []
+    for i, r in enumerate(ordered, 1):
+        row = {"Rank": i if r.ok else None}
+        row.update(r.to_row())
+        rows.append(row)
+    return rows
+
+def rows_to_csv(rows: List[Dict[str, Any]]) -> str:
+    buff = io.StringIO()
+    if rows:
+        writer = csv.DictWriter(buff, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    return buff.getvalue()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .config import get_settings, init_openai_client
+    from .cache import get_result_cache
+
+    parser = argparse.ArgumentParser(description="Rank many resumes against one job description.")
+    parser.add_argument("resumes", help="Folder, .zip, or single resume file (PDF/DOCX/TXT)")
+    parser.add_argument("--jd", required=True, help="Path to the job description (.txt)")
+    parser.add_argument("--model", default=None, help=f"A model name, or {AUTO_MODEL!r} for the cheap-first cascade")
+    parser.add_argument("--temperature", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="Re-runs per resume when the model returns malformed output (network errors and "
+                             "429s are retried by the client)")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--out", default=None, help="Write the ranked table as CSV")
+    parser.add_argument("--export", default=None,
+                        help="Also stream per-candidate reports and CSV/JSONL summaries into this .zip")
+    args = parser.parse_args(argv)
+
+    settings = get_settings()
+    client = init_openai_client(settings.OPENAI_API_KEY, backend=settings.LLM_BACKEND)
+    cache = None if args.no_cache else get_result_cache(
+        settings.CACHE_PATH, settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS
+    )
+    jd_text = Path(args.jd).read_text(encoding="utf-8", errors="ignore")
+
+    results = []
+    exporter = ReportZipWriter(args.export, FORMATS) if args.export else None
+    started = time.perf_counter()
+    for r in run_batch(
+        client,
+        args.model or settings.DEFAULT_MODEL,
+        args.temperature,
+        iter_resume_sources(args.resumes),
+        jd_text,
+        workers=args.workers,
+        timeout=args.timeout,
+        retries=args.retries,
+        cache=cache,
+        tiers=parse_tiers(settings.CASCADE_MODELS),
+        threshold=settings.CASCADE_THRESHOLD,
+        resume_budget=settings.RESUME_TOKEN_BUDGET,
+        jd_budget=settings.JD_TOKEN_BUDGET,
+    ):
+        results.append(r)
+        if exporter is not None:
+            exporter.add(r.name, r.data, model=r.model, error=r.error)
+        status = f"{round(r.score):>3}" if r.ok else "ERR"
+        print(f"[{len(results):>4}] {status}  {r.name}  ({r.elapsed:.1f}s){'  ' + r.error if r.error else ''}",
+              file=sys.stderr, flush=True)
+    elapsed = time.perf_counter() - started
+    print(f"Scored {len(results)} resumes in {elapsed:.1f}s", file=sys.stderr)
+    if exporter is not None:
+        exported = exporter.close()
+        print(f"Exported {exported.reports} report(s) to {args.export} in {exported.seconds:.2f}s", file=sys.stderr)
+    routing = cascade_stats()
+    if routing["analyses"]:
+        print(f"Cascade: escalated {routing['escalations']}/{routing['analyses']} "
+              f"({routing['escalation_rate']:.0%})", file=sys.stderr)
+        for tier, t in routing["tiers"].items():
+            print(f"  {tier}: {t['runs']} run(s), kept {t['kept']}, ${t['cost_usd']:.4f}, "
+                  f"avg {t['avg_ms'] / 1000:.1f}s", file=sys.stderr)
+
+    table = rows_to_csv(rank_results(results))
+    if args.out:
+        Path(args.out).write_text(table, encoding="utf-8")
+    else:
+        sys.stdout.write(table)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+def content_key(*parts) -> str:
+    """
+    Stable sha256 over an ordered list of parts (str/bytes/anything repr-able).
+    Each part is length-prefixed so ("ab", "c") and ("a", "bc") never collide.
+    """
+    h = hashlib.sha256()
+    for p in parts:
+        if isinstance(p, str):
+            b = p.encode("utf-8")
+        elif isinstance(p, (bytes, bytearray)):
+            b = bytes(p)
+        else:
+            b = repr(p).encode("utf-8")
+        h.update(len(b).to_bytes(8, "big"))
+        h.update(b)
+    return h.hexdigest()
+
+class ResultCache:
+    """
+    Persistent key -> text cache backed by SQLite.
+    Entries expire after `ttl_seconds`; when more than `max_entries` remain,
+    the least recently used ones are evicted.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int = 500, ttl_seconds: float = 7 * 24 * 3600):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results(accessed)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                if row is not None:
+                    self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM results WHERE created < ?", (now - self.ttl_seconds,))
+        if self.max_entries:
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                " SELECT key FROM results ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+_caches: Dict[str, ResultCache] = {}
+_caches_lock = threading.Lock()
+
+def get_result_cache(path: str | Path, max_entries: int = 500, ttl_seconds: float = 7 * 24 * 3600) -> ResultCache:
+    """
+    Process-wide cache instance per file, so Streamlit reruns share counters and the connection.
+    """
+    resolved = str(Path(path).resolve())
+    with _caches_lock:
+        cache = _caches.get(resolved)
+        if cache is None:
+            cache = ResultCache(resolved, max_entries=max_entries, ttl_seconds=ttl_seconds)
+            _caches[resolved] = cache
+        return cache
@@ -0,0 +1,279 @@
+import json
+import threading
+import time
+from collections import Counter, deque
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from .analyzer import _compacted_inputs, _messages_for, analysis_cache_key, analyze_resume_against_jd, validate_and_repair
+from .compaction import JD_TOKEN_BUDGET, RESUME_TOKEN_BUDGET
+from .incremental import section_keyword_fields
+from .prompts import ANALYSIS_JSON_SCHEMA
+from .schema import ValidationResult, salvage_json, validate_analysis
+from .tracing import current_trace, span, timed_completion, trace
+
+# the "model" that means: route through the cascade below
+AUTO_MODEL = "auto"
+# cheapest first; each tier only runs when the one before it failed the checks
+DEFAULT_TIERS = ("gpt-4o-mini", "gpt-4o")
+
+DECISION_THRESHOLD = 70         # overall score that separates "shortlist" from "reject"
+BORDERLINE_MARGIN = 5           # scores this close to the threshold get a second opinion
+MAX_SECTION_SPREAD = 25         # overall vs. mean of the section scores
+MAX_KEYWORD_DISAGREEMENT = 35   # KeywordsMatch vs. locally counted keyword coverage
+LATENCY_SAMPLES = 512
+
+_SCORE_FIELDS = ("ats_score_overall", "section_scores")
+
+def parse_tiers(spec: str) -> Tuple[str, ...]:
+    """
+    "gpt-4o-mini,gpt-4o" -> ("gpt-4o-mini", "gpt-4o"); empty means DEFAULT_TIERS.
+    """
+    tiers = tuple(dict.fromkeys(m.strip() for m in (spec or "").split(",") if m.strip()))
+    return tiers or DEFAULT_TIERS
+
+def _raw_score(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def check_analysis(
+    raw: Dict[str, Any],
+    result: ValidationResult,
+    keyword_fields: Dict[str, Any],
+    threshold: float = DECISION_THRESHOLD,
+    margin: float = BORDERLINE_MARGIN,
+) -> List[str]:
+    """
+    Reasons not to trust a candidate analysis (empty = accept). `raw` is the model's JSON
+    before coercion, `result` the validated/repaired one and `keyword_fields` the local
+    keyword fields (keywords.local_keyword_fields) for the same resume and JD.
+    """
+    reasons = []
+    if not result.ok:
+        reasons.append(f"schema: {', '.join(result.invalid)} invalid")
+    regenerated = [f for f in result.repaired if f in _SCORE_FIELDS]
+    if regenerated:
+        reasons.append(f"schema: {', '.join(regenerated)} needed repair")
+
+    raw_scores = {"overall": raw.get("ats_score_overall")}
+    if isinstance(raw.get("section_scores"), dict):
+        raw_scores.update(raw["section_scores"])
+    out_of_range = [k for k, v in raw_scores.items() if (n := _raw_score(v)) is not None and not 0 <= n <= 100]
+    if out_of_range:
+        reasons.append(f"range: {', '.join(out_of_range)} outside 0-100")
+
+    data = result.data
+    overall = data.get("ats_score_overall")
+    sections = data.get("section_scores") or {}
+    if isinstance(overall, int) and sections:
+        mean = sum(sections.values()) / len(sections)
+        if abs(overall - mean) > MAX_SECTION_SPREAD:
+            reasons.append(f"consistency: overall {overall} vs section mean {mean:.0f}")
+
+    density = keyword_fields.get("keyword_density") or []
+    model_keywords = sections.get("KeywordsMatch")
+    if density and isinstance(model_keywords, int):
+        coverage = 100 * len(keyword_fields.get("matched_keywords") or []) / len(density)
+        if abs(model_keywords - coverage) > MAX_KEYWORD_DISAGREEMENT:
+            reasons.append(f"keywords: KeywordsMatch {model_keywords} vs local coverage {coverage:.0f}")
+
+    if isinstance(overall, int) and abs(overall - threshold) <= margin:
+        reasons.append(f"borderline: {overall} within {margin:g} of {threshold:g}")
+    return reasons
+
+@dataclass
+class TierAttempt:
+    model: str
+    reasons: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+    cost_usd: float = 0.0
+    from_cache: bool = False
+    valid: bool = False
+
+    @property
+    def passed(self) -> bool:
+        return not self.reasons
+
+@dataclass
+class CascadeResult:
+    raw: str
+    model: str                   # the tier whose analysis was kept
+    attempts: List[TierAttempt] = field(default_factory=list)
+
+    @property
+    def escalated(self) -> bool:
+        return len(self.attempts) > 1
+
+    @property
+    def cost_usd(self) -> float:
+        return sum(a.cost_usd for a in self.attempts)
+
+    @property
+    def seconds(self) -> float:
+        return sum(a.seconds for a in self.attempts)
+
+    def summary(self) -> str:
+        steps = []
+        for a in self.attempts:
+            verdict = "ok" if a.passed else "; ".join(a.reasons)
+            steps.append(f"{a.model}{' (cached)' if a.from_cache else ''}: {verdict}")
+        return " → ".join(steps)
+
+@dataclass
+class _TierStats:
+    runs: int = 0
+    escalated: int = 0           # runs whose result was handed to the next tier
+    kept: int = 0
+    cost_usd: float = 0.0
+    seconds: float = 0.0
+    recent: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES), repr=False)
+
+class CascadeStats:
+    """
+    Escalation rate plus cost and latency per tier, over every cascade run in the process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.analyses = 0
+        self.escalations = 0
+        self.reasons: Counter = Counter()
+        self.tiers: Dict[str, _TierStats] = {}
+
+    def record(self, result: CascadeResult) -> None:
+        with self._lock:
+            self.analyses += 1
+            self.escalations += result.escalated
+            for i, a in enumerate(result.attempts):
+                st = self.tiers.setdefault(a.model, _TierStats())
+                st.runs += 1
+                st.escalated += i < len(result.attempts) - 1
+                st.kept += a.model == result.model
+                st.cost_usd += a.cost_usd
+                st.seconds += a.seconds
+                st.recent.append(a.seconds)
+                if i < len(result.attempts) - 1:
+                    # "borderline: 72 within 5 of 70" -> "borderline"
+                    self.reasons.update(r.split(":", 1)[0] for r in a.reasons)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            tiers = {}
+            for model, st in self.tiers.items():
+                recent = sorted(st.recent)
+                tiers[model] = {
+                    "runs": st.runs,
+                    "kept": st.kept,
+                    "escalated": st.escalated,
+                    "cost_usd": st.cost_usd,
+                    "avg_cost_usd": st.cost_usd / st.runs if st.runs else 0.0,
+                    "avg_ms": st.seconds / st.runs * 1000 if st.runs else 0.0,
+                    "p95_ms": recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000 if recent else 0.0,
+                }
+            return {
+                "analyses": self.analyses,
+                "escalations": self.escalations,
+                "escalation_rate": self.escalations / self.analyses if self.analyses else 0.0,
+                "reasons": dict(self.reasons),
+                "tiers": tiers,
+            }
+
+STATS = CascadeStats()
+
+def cascade_stats() -> Dict[str, Any]:
+    return STATS.snapshot()
+
+def _run_tier(client, model: str, temperature: float, resume: str, jd: str) -> Tuple[Dict[str, Any], ValidationResult]:
+    resp = timed_completion(
+        "analysis",
+        client,
+        model=model,
+        temperature=temperature,
+        response_format={"type": "json_object"},
+        messages=_messages_for(resume, jd, ANALYSIS_JSON_SCHEMA),
+    )
+    raw = salvage_json(resp.choices[0].message.content)
+    return raw, validate_and_repair(client, model, temperature, resume, jd, raw)
+
+def analyze_with_cascade(
+    client,
+    temperature: float,
+    resume_text: str,
+    jd_text: str,
+    tiers: Sequence[str] = DEFAULT_TIERS,
+    resume_budget: int = RESUME_TOKEN_BUDGET,
+    jd_budget: int = JD_TOKEN_BUDGET,
+    cache=None,
+    refresh: bool = False,
+    threshold: float = DECISION_THRESHOLD,
+) -> CascadeResult:
+    """
+    Runs the analysis on the cheapest tier and moves up a tier only while check_analysis()
+    finds a reason to distrust the result. The last tier's answer is kept regardless (unless
+    it is schema-invalid and an earlier one wasn't). Each tier's valid result is cached under
+    that model's usual analysis key, so single-model runs and the cascade share entries.
+    """
+    tiers = list(tiers) or list(DEFAULT_TIERS)
+    keyword_fields = section_keyword_fields(resume_text, jd_text)
+    attempts: List[TierAttempt] = []
+    kept: Optional[Tuple[str, str]] = None  # (model, json)
+    kept_valid = False
+    with trace("analyze.cascade") if current_trace() is None else nullcontext() as own:
+        if own is not None:
+            own.persist = False  # only here to cost the calls; the caller's trace (if any) is the record
+        tr = current_trace()
+        for i, model in enumerate(tiers):
+            attempt = TierAttempt(model)
+            calls_before = len(tr.llm_calls)
+            started = time.perf_counter()
+            with span("cascade.tier", model=model, tier=i) as sp:
+                key = analysis_cache_key(model, temperature, resume_text, jd_text, resume_budget, jd_budget) \
+                    if cache is not None else None
+                cached = cache.get(key) if key is not None and not refresh else None
+                if cached is not None:
+                    raw = salvage_json(cached)
+                    result = validate_analysis(raw)
+                    attempt.from_cache = True
+                else:
+                    resume, jd = _compacted_inputs(model, resume_text, jd_text, resume_budget, jd_budget)
+                    raw, result = _run_tier(client, model, temperature, resume, jd)
+                    if key is not None and result.ok:
+                        cache.set(key, json.dumps(result.data, ensure_ascii=False))
+                attempt.valid = result.ok
+                attempt.reasons = check_analysis(raw, result, keyword_fields, threshold)
+                if sp is not None:
+                    sp.attrs.update(passed=attempt.passed, reasons=len(attempt.reasons))
+            attempt.seconds = time.perf_counter() - started
+            attempt.cost_usd = sum(c.cost_usd for c in tr.llm_calls[calls_before:])
+            attempts.append(attempt)
+            if result.data and (result.ok or not kept_valid):
+                kept = (model, json.dumps(result.data, ensure_ascii=False))
+                kept_valid = result.ok
+            if attempt.passed:
+                break
+    outcome = CascadeResult(raw=kept[1] if kept else "", model=kept[0] if kept else tiers[-1], attempts=attempts)
+    STATS.record(outcome)
+    return outcome
+
+def analyze_routed(
+    client,
+    model: str,
+    temperature: float,
+    resume_text: str,
+    jd_text: str,
+    tiers: Sequence[str] = DEFAULT_TIERS,
+    threshold: float = DECISION_THRESHOLD,
+    **kwargs,
+) -> str:
+    """
+    analyze_resume_against_jd() for a fixed model, or the cascade's JSON for AUTO_MODEL
+    (which never streams or decomposes).
+    """
+    if model == AUTO_MODEL:
+        kwargs.pop("decomposed", None)
+        kwargs.pop("stream", None)
+        return analyze_with_cascade(client, temperature, resume_text, jd_text, tiers, threshold=threshold, **kwargs).raw
+    return analyze_resume_against_jd(client, model, temperature, resume_text, jd_text, **kwargs)
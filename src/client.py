@@ -0,0 +1,284 @@
+import email.utils
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterator, Optional, Tuple
+
+from .ratelimit import RateLimiter, current_priority, estimate_tokens
+from .tracing import span
+
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+# exception class names that mean "the request never got a proper answer"
+_TRANSIENT_ERRORS = frozenset({
+    "APIConnectionError", "APITimeoutError", "FakeTimeoutError",
+    "TimeoutError", "ConnectionError", "ConnectTimeout", "ReadTimeout", "RemoteProtocolError",
+})
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 3
+    base_delay: float = 0.5          # first backoff, doubled per attempt
+    max_delay: float = 20.0
+    jitter: bool = True              # "full jitter": sleep uniform(0, backoff)
+    max_retry_after: float = 60.0    # never wait longer than this for a Retry-After header
+    hedge_after: Optional[float] = None  # seconds before firing a duplicate request (non-streaming only)
+    retry_status: FrozenSet[int] = field(default_factory=lambda: RETRYABLE_STATUS)
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+def is_retryable(exc: BaseException, policy: RetryPolicy) -> bool:
+    code = _status_code(exc)
+    if code is not None:
+        return code in policy.retry_status
+    return any(cls.__name__ in _TRANSIENT_ERRORS for cls in type(exc).__mro__)
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """
+    Server-suggested wait from `retry-after-ms` / `retry-after` (seconds or an HTTP date).
+    """
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return float(ms) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+        return max(0.0, when.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, policy: RetryPolicy, exc: Optional[BaseException] = None,
+                  rng: Callable[[float, float], float] = random.uniform) -> float:
+    hinted = retry_after_seconds(exc) if exc is not None else None
+    if hinted is not None:
+        return min(hinted, policy.max_retry_after)
+    delay = min(policy.max_delay, policy.base_delay * (2 ** attempt))
+    return rng(0, delay) if policy.jitter else delay
+
+def call_with_retry(fn: Callable[[], Any], policy: RetryPolicy, sleep: Callable[[float], None] = time.sleep,
+                    on_retry: Optional[Callable[[int, BaseException, float], None]] = None) -> Any:
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as exc:
+            if attempt >= policy.max_retries or not is_retryable(exc, policy):
+                raise
+            delay = backoff_delay(attempt, policy, exc)
+            if on_retry:
+                on_retry(attempt + 1, exc, delay)
+            sleep(delay)
+            attempt += 1
+
+_hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="ats-hedge")
+
+def call_hedged(fn: Callable[[], Any], hedge_after: float, on_hedge: Optional[Callable[[], None]] = None,
+                duplicate: Optional[Callable[[], Any]] = None) -> Any:
+    """
+    Runs fn(); if it hasn't finished after `hedge_after` seconds, starts a second copy
+    (`duplicate`, default fn) and returns whichever succeeds first. The loser is left to
+    finish in the background.
+    """
+    first = _hedge_pool.submit(fn)
+    done, _ = wait([first], timeout=hedge_after)
+    if done:
+        return first.result()
+    if on_hedge:
+        on_hedge()
+    second = _hedge_pool.submit(duplicate or fn)
+    pending = {first, second}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            if fut.exception() is None:
+                return fut.result()
+            error = fut.exception()
+    raise error
+
+@dataclass
+class ClientStats:
+    calls: int = 0
+    retries: int = 0
+    hedges: int = 0
+    failures: int = 0
+
+class _Completions:
+    def __init__(self, owner: "ResilientClient"):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        return self._owner._create(**kwargs)
+
+class _Chat:
+    def __init__(self, owner: "ResilientClient"):
+        self.completions = _Completions(owner)
+
+def _reconciling(stream, limiter: RateLimiter, model: str, estimated: int) -> Iterator[Any]:
+    # streamed usage only arrives with the last chunk (stream_options.include_usage); a stream
+    # that fails before its first chunk used nothing, one cut off later keeps its estimate
+    started = False
+    try:
+        for chunk in stream:
+            started = True
+            usage = getattr(chunk, "usage", None)
+            if usage is not None:
+                limiter.reconcile(model, estimated, int(getattr(usage, "total_tokens", 0) or 0))
+            yield chunk
+    except Exception:
+        if not started:
+            limiter.release(model, estimated)
+        raise
+
+class ResilientClient:
+    """
+    Wraps an OpenAI-compatible client: chat.completions.create gets retries with exponential
+    backoff + jitter (honoring Retry-After) and optional request hedging. With a
+    RateLimiter, every attempt first waits for its model's RPM/TPM budget (see ratelimit.py).
+    Other attributes are passed through to the wrapped client.
+    """
+
+    def __init__(self, client, policy: Optional[RetryPolicy] = None, stats: Optional[ClientStats] = None,
+                 limiter: Optional[RateLimiter] = None):
+        self._client = client
+        self.policy = policy or RetryPolicy()
+        self.stats = stats or ClientStats()
+        self.limiter = limiter
+        self._lock = threading.Lock()
+        self.chat = _Chat(self)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+    def with_options(self, **kwargs) -> "ResilientClient":
+        # retries are ours; keep the SDK from stacking its own on top
+        kwargs.setdefault("max_retries", 0)
+        inner = self._client.with_options(**kwargs) if hasattr(self._client, "with_options") else self._client
+        return ResilientClient(inner, self.policy, self.stats, self.limiter)
+
+    def _count(self, attr: str) -> None:
+        with self._lock:
+            setattr(self.stats, attr, getattr(self.stats, attr) + 1)
+
+    def _create(self, **kwargs):
+        self._count("calls")
+        if self.limiter is not None:
+            acquire, send = self._send_limited(kwargs)
+        else:
+            acquire = None
+
+            def send():
+                return self._client.chat.completions.create(**kwargs)
+        policy = self.policy
+        hedge = bool(policy.hedge_after) and not kwargs.get("stream")
+
+        def attempt():
+            # the rate-limit wait happens first, so the hedge clock only measures the request
+            if acquire is not None:
+                acquire()
+            if not hedge:
+                return send()
+            duplicate = None
+            if acquire is not None:
+                def duplicate():  # the hedged copy is a request of its own and needs a slot too
+                    acquire()
+                    return send()
+            return call_hedged(send, policy.hedge_after, lambda: self._count("hedges"), duplicate)
+        try:
+            return call_with_retry(attempt, policy, on_retry=self._on_retry(kwargs.get("model", "")))
+        except Exception:
+            self._count("failures")
+            raise
+
+    def _send_limited(self, kwargs: Dict[str, Any]) -> Tuple[Callable[[], float], Callable[[], Any]]:
+        """
+        (acquire, send): acquire() blocks for the model's RPM/TPM budget, send() makes the
+        call and reconciles the token estimate with the reported usage, or releases it when
+        the call fails.
+        """
+        limiter, model = self.limiter, kwargs.get("model", "")
+        estimated = estimate_tokens(kwargs)
+        priority = current_priority()  # captured here: hedged copies run on other threads
+
+        def acquire():
+            with span("rate_limit", priority=priority, tokens=estimated) as sp:
+                waited = limiter.acquire(model, estimated, priority)
+                if sp is not None:
+                    sp.attrs["waited_ms"] = round(waited * 1000, 1)
+            return waited
+
+        def send():
+            try:
+                resp = self._client.chat.completions.create(**kwargs)
+            except Exception:
+                limiter.release(model, estimated)
+                raise
+            if kwargs.get("stream"):
+                return _reconciling(resp, limiter, model, estimated)
+            usage = getattr(resp, "usage", None)
+            if usage is not None:
+                limiter.reconcile(model, estimated, int(getattr(usage, "total_tokens", 0) or 0))
+            return resp
+        return acquire, send
+
+    def _on_retry(self, model: str) -> Callable[[int, BaseException, float], None]:
+        def on_retry(attempt: int, exc: BaseException, delay: float) -> None:
+            self._count("retries")
+            if self.limiter is not None and _status_code(exc) == 429:
+                self.limiter.throttled(model, delay)
+        return on_retry
+
+_registry: Dict[str, ResilientClient] = {}
+_registry_lock = threading.Lock()
+
+def get_client(key: str, factory: Callable[[], Any], policy: Optional[RetryPolicy] = None,
+               limiter: Optional[RateLimiter] = None) -> ResilientClient:
+    """
+    Process-wide client per (backend, credentials) key. Reusing one SDK client keeps its
+    HTTP connection pool (and TLS sessions) alive across Streamlit reruns and sessions.
+    """
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    with _registry_lock:
+        client = _registry.get(digest)
+        if client is None:
+            client = ResilientClient(factory(), policy, limiter=limiter)
+            _registry[digest] = client
+        else:
+            if policy is not None:
+                client.policy = policy
+            client.limiter = limiter
+        return client
+
+def registry_stats() -> ClientStats:
+    """
+    Call/retry/hedge/failure counters summed over every pooled client in this process.
+    """
+    total = ClientStats()
+    with _registry_lock:
+        for client in _registry.values():
+            for name in ("calls", "retries", "hedges", "failures"):
+                setattr(total, name, getattr(total, name) + getattr(client.stats, name))
+    return total
+
+def clear_clients() -> None:
+    with _registry_lock:
+        _registry.clear()
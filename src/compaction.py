@@ -0,0 +1,201 @@
+import re
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from .parsing import UNSCORED_SECTIONS, Section, clean_lines, get_structured_resume, split_sections
+from .tracing import span
+
+RESUME_TOKEN_BUDGET = 8000
+JD_TOKEN_BUDGET = 4000
+
+# relative value of a section when the budget forces us to drop or trim something
+RESUME_SECTION_WEIGHTS = {
+    "experience": 1.0,
+    "skills": 0.95,
+    "summary": 0.9,
+    "projects": 0.8,
+    "certifications": 0.7,
+    "education": 0.7,
+    "publications": 0.5,
+    "awards": 0.5,
+    "volunteer": 0.3,
+    "interests": 0.1,
+    "references": 0.0,
+}
+
+JD_SECTION_WEIGHTS = {
+    "requirements": 1.0,
+    "responsibilities": 0.95,
+    "preferred": 0.8,
+    "role": 0.6,
+    "company": 0.2,
+    "experience": 0.9,
+    "skills": 0.9,
+    "education": 0.7,
+    "benefits": 0.0,
+    "eeo": 0.0,
+}
+
+# paragraph-level JD boilerplate that shows up outside clearly headed sections
+_JD_BOILERPLATE_RE = re.compile(
+    r"equal (employment )?opportunity|without regard to|reasonable accommodation|e-verify|"
+    r"background check|401\(?k\)?|paid time off|\bpto\b|parental leave|health,? dental|dental,? (and )?vision|"
+    r"drug[- ]free|at-will|protected veteran|sexual orientation|gender identity|pay transparency",
+    re.IGNORECASE,
+)
+
+@lru_cache(maxsize=8)
+def _encoder(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """
+    Exact count with tiktoken when installed, otherwise the usual ~4 chars/token estimate.
+    """
+    if not text:
+        return 0
+    enc = _encoder(model)
+    if enc is None:
+        return (len(text) + 3) // 4
+    return len(enc.encode(text, disallowed_special=()))
+
+@dataclass
+class CompactionResult:
+    text: str
+    tokens_before: int
+    tokens_after: int
+    dropped: List[str] = field(default_factory=list)
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_before - self.tokens_after)
+
+class CompactionStats:
+    """
+    Process-wide running totals, so the UI can report cumulative savings.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.last: Dict[str, CompactionResult] = {}
+
+    def record(self, label: str, result: CompactionResult) -> None:
+        with self._lock:
+            self.requests += 1
+            self.tokens_before += result.tokens_before
+            self.tokens_after += result.tokens_after
+            self.last[label] = result
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_before - self.tokens_after)
+
+STATS = CompactionStats()
+
+def _trim_to_budget(lines: List[str], budget: int, model: str) -> List[str]:
+    # largest prefix of lines that fits (binary search; token counts are monotone in prefix length)
+    lo, hi = 0, len(lines)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens("\n".join(lines[:mid]), model) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lines[:lo]
+
+def compact(
+    text: str,
+    budget: int,
+    weights: Dict[str, float],
+    model: str = "gpt-4o-mini",
+    drop_boilerplate: bool = False,
+    label: str = "",
+    sections: Optional[List[Section]] = None,
+) -> CompactionResult:
+    """
+    Cleans `text` and fits it into `budget` tokens. Zero-weight sections are always dropped;
+    otherwise sections are kept whole by descending weight and the first one that doesn't fit
+    is trimmed from the end. Output keeps the original section order. Pass `sections` when
+    `text` has already been cleaned and split.
+    """
+    with span("compaction", label=label) as sp:
+        result = _compact(text, budget, weights, model, drop_boilerplate, sections)
+        if sp is not None:
+            sp.attrs.update(tokens_before=result.tokens_before, tokens_after=result.tokens_after)
+    if label:
+        STATS.record(label, result)
+    return result
+
+def _compact(text: str, budget: int, weights: Dict[str, float], model: str, drop_boilerplate: bool,
+             split: Optional[List[Section]] = None) -> CompactionResult:
+    tokens_before = count_tokens(text, model)
+    dropped: List[str] = []
+    if split is None:
+        lines = clean_lines(text)
+        if drop_boilerplate:
+            kept = [ln for ln in lines if not _JD_BOILERPLATE_RE.search(ln)]
+            if len(kept) != len(lines):
+                dropped.append("boilerplate")
+            lines = kept
+        split = split_sections(lines)
+
+    sections = []
+    for sec in split:
+        w = weights.get(sec.kind, 0.6 if sec.kind == "preamble" else 0.5)
+        if w <= 0:
+            dropped.append(sec.kind)
+            continue
+        sections.append((sec, w))
+
+    section_tokens = [count_tokens("\n".join(sec.lines), model) for sec, _ in sections]
+    if sum(section_tokens) + len(sections) > budget:
+        remaining = budget
+        chosen: Dict[int, List[str]] = {}
+        overflow: List[int] = []
+        for idx in sorted(range(len(sections)), key=lambda i: -sections[i][1]):
+            cost = section_tokens[idx] + 1
+            if cost <= remaining:
+                chosen[idx] = sections[idx][0].lines
+                remaining -= cost
+            else:
+                overflow.append(idx)
+        # whatever budget is left goes to the most valuable sections that didn't fit whole
+        for idx in overflow:
+            sec = sections[idx][0]
+            if remaining > 32:
+                chosen[idx] = _trim_to_budget(sec.lines, remaining - 1, model)
+                remaining -= count_tokens("\n".join(chosen[idx]), model) + 1
+                dropped.append(f"{sec.kind} (trimmed)")
+            else:
+                dropped.append(sec.kind)
+        kept_lines = [ln for idx in sorted(chosen) for ln in chosen[idx]]
+    else:
+        kept_lines = [ln for sec, _ in sections for ln in sec.lines]
+
+    out = "\n".join(kept_lines).strip()
+    return CompactionResult(out, tokens_before, count_tokens(out, model), dropped)
+
+def compact_resume(text: str, budget: int = RESUME_TOKEN_BUDGET, model: str = "gpt-4o-mini", label: str = "",
+                   kinds: Optional[Iterable[str]] = None, exclude: Iterable[str] = UNSCORED_SECTIONS) -> CompactionResult:
+    """
+    Compacts the sections selected from the structured resume (see StructuredResume.select);
+    the others are never counted or sent.
+    """
+    doc = get_structured_resume(text)
+    return compact(doc.select(kinds, exclude), budget, RESUME_SECTION_WEIGHTS, model=model, label=label,
+                   sections=doc.as_sections(kinds, exclude))
+
+def compact_jd(text: str, budget: int = JD_TOKEN_BUDGET, model: str = "gpt-4o-mini", label: str = "") -> CompactionResult:
+    return compact(text, budget, JD_SECTION_WEIGHTS, model=model, drop_boilerplate=True, label=label)
@@ -1,22 +1,164 @@
+import hashlib
 import os
+import threading
 from dataclasses import dataclass
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
 
 @dataclass
 class Settings:
     OPENAI_API_KEY: str
     DEFAULT_MODEL: str = "gpt-4o-mini"
-    MAX_INPUT_CHARS: int = 60000  # generous for long resumes/JDs
+    RESUME_TOKEN_BUDGET: int = 8000  # after dedupe/boilerplate removal, see compaction.py
+    JD_TOKEN_BUDGET: int = 4000
+    CACHE_PATH: str = ".ats_cache/results.sqlite3"
+    CACHE_MAX_ENTRIES: int = 500
+    CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    METRICS_PATH: str = ".ats_cache/metrics.jsonl"  # per-action traces (JSONL); empty disables
+    JD_LIBRARY_PATH: str = ".ats_cache/jd_library.sqlite3"
+    HISTORY_PATH: str = ""  # e.g. .ats_cache/history.sqlite3 to persist past analyses; empty keeps them per session in memory
+    HISTORY_OWNER: str = ""  # fixed history id for a single-user install; empty = one id per browser link (?history=)
+    LLM_BACKEND: str = "openai"  # "fake" replays recorded responses without network (see fake_llm.py)
+    LLM_MAX_RETRIES: int = 3
+    LLM_TIMEOUT_SECONDS: float = 120.0
+    LLM_HEDGE_AFTER_SECONDS: float = 0.0  # 0 disables hedged (duplicate) requests
+    LLM_RATE_LIMIT: bool = True  # shared per-model RPM/TPM scheduler for the OpenAI backend (see ratelimit.py)
+    LLM_RPM: str = ""  # "10000" for every model or "gpt-4o=5000,gpt-4o-mini=30000"; empty = ratelimit.DEFAULT_LIMITS
+    LLM_TPM: str = ""
+    CASCADE_MODELS: str = "gpt-4o-mini,gpt-4o"  # model "auto": cheapest first, see cascade.py
+    CASCADE_THRESHOLD: float = 70.0  # scores near this decision line are escalated
+    SEMANTIC_CACHE: bool = True  # reuse answers to near-identical follow-ups/rewrite goals (see semcache.py)
+    SEMANTIC_THRESHOLD: float = 0.85  # cosine similarity a question needs to reuse an earlier answer
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 512
+    EXPORT_INLINE_MAX_MB: int = 200  # bigger batch report zips are not offered in the page; use the CLI
+
+_env_loaded = False
+_env_lock = threading.Lock()
+
+def load_env() -> None:
+    """
+    Reads .env into os.environ once per process. Called by get_settings() rather than at
+    import, so importing this module stays cheap on every Streamlit rerun.
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            _env_loaded = True
 
 def get_settings() -> Settings:
+    load_env()
     key = os.getenv("OPENAI_API_KEY", "").strip()
-    return Settings(OPENAI_API_KEY=key)
+    return Settings(
+        OPENAI_API_KEY=key,
+        RESUME_TOKEN_BUDGET=int(os.getenv("ATS_RESUME_TOKEN_BUDGET", Settings.RESUME_TOKEN_BUDGET)),
+        JD_TOKEN_BUDGET=int(os.getenv("ATS_JD_TOKEN_BUDGET", Settings.JD_TOKEN_BUDGET)),
+        CACHE_PATH=os.getenv("ATS_CACHE_PATH", Settings.CACHE_PATH),
+        CACHE_MAX_ENTRIES=int(os.getenv("ATS_CACHE_MAX_ENTRIES", Settings.CACHE_MAX_ENTRIES)),
+        CACHE_TTL_SECONDS=int(os.getenv("ATS_CACHE_TTL_SECONDS", Settings.CACHE_TTL_SECONDS)),
+        METRICS_PATH=os.getenv("ATS_METRICS_PATH", Settings.METRICS_PATH),
+        JD_LIBRARY_PATH=os.getenv("ATS_JD_LIBRARY_PATH", Settings.JD_LIBRARY_PATH),
+        HISTORY_PATH=os.getenv("ATS_HISTORY_PATH", Settings.HISTORY_PATH),
+        HISTORY_OWNER=os.getenv("ATS_HISTORY_OWNER", Settings.HISTORY_OWNER).strip(),
+        LLM_BACKEND=os.getenv("ATS_LLM_BACKEND", Settings.LLM_BACKEND).strip().lower(),
+        LLM_MAX_RETRIES=int(os.getenv("ATS_LLM_MAX_RETRIES", Settings.LLM_MAX_RETRIES)),
+        LLM_TIMEOUT_SECONDS=float(os.getenv("ATS_LLM_TIMEOUT_SECONDS", Settings.LLM_TIMEOUT_SECONDS)),
+        LLM_HEDGE_AFTER_SECONDS=float(os.getenv("ATS_LLM_HEDGE_AFTER_SECONDS", Settings.LLM_HEDGE_AFTER_SECONDS)),
+        LLM_RATE_LIMIT=os.getenv("ATS_LLM_RATE_LIMIT", "1").strip().lower() not in ("0", "false", "no", "off"),
+        LLM_RPM=os.getenv("ATS_LLM_RPM", Settings.LLM_RPM).strip(),
+        LLM_TPM=os.getenv("ATS_LLM_TPM", Settings.LLM_TPM).strip(),
+        CASCADE_MODELS=os.getenv("ATS_CASCADE_MODELS", Settings.CASCADE_MODELS),
+        CASCADE_THRESHOLD=float(os.getenv("ATS_CASCADE_THRESHOLD", Settings.CASCADE_THRESHOLD)),
+        SEMANTIC_CACHE=os.getenv("ATS_SEMANTIC_CACHE", "1").strip().lower() not in ("0", "false", "no", "off"),
+        SEMANTIC_THRESHOLD=float(os.getenv("ATS_SEMANTIC_THRESHOLD", Settings.SEMANTIC_THRESHOLD)),
+        SEMANTIC_CACHE_MAX_ENTRIES=int(os.getenv("ATS_SEMANTIC_CACHE_MAX_ENTRIES", Settings.SEMANTIC_CACHE_MAX_ENTRIES)),
+        EXPORT_INLINE_MAX_MB=int(os.getenv("ATS_EXPORT_INLINE_MAX_MB", Settings.EXPORT_INLINE_MAX_MB)),
+    )
+
+def retry_policy(settings: Settings | None = None):
+    from .client import RetryPolicy
+
+    settings = settings or get_settings()
+    return RetryPolicy(
+        max_retries=settings.LLM_MAX_RETRIES,
+        hedge_after=settings.LLM_HEDGE_AFTER_SECONDS or None,
+    )
+
+def rate_limiter(key: str, settings: Settings | None = None, backend: str = "openai"):
+    """
+    The process-wide scheduler for an account, or None when disabled. The fake backend
+    is only limited when ATS_LLM_RPM / ATS_LLM_TPM are set explicitly.
+    """
+    from .ratelimit import get_rate_limiter, parse_limits
+
+    settings = settings or get_settings()
+    if not settings.LLM_RATE_LIMIT or (backend == "fake" and not (settings.LLM_RPM or settings.LLM_TPM)):
+        return None
+    return get_rate_limiter(key, rpm=parse_limits(settings.LLM_RPM), tpm=parse_limits(settings.LLM_TPM))
 
-def init_openai_client(api_key: str | None = None) -> OpenAI:
-    key = (api_key or os.getenv("OPENAI_API_KEY", "")).strip()
+def semantic_cache(settings: Settings | None = None):
+    """
+    The process-wide semantic answer cache, or None when disabled.
+    """
+    from .semcache import get_semantic_cache
+
+    settings = settings or get_settings()
+    if not settings.SEMANTIC_CACHE:
+        return None
+    return get_semantic_cache(settings.SEMANTIC_THRESHOLD, settings.SEMANTIC_CACHE_MAX_ENTRIES)
+
+def init_fake_client():
+    """
+    Offline client for demos/benchmarks. Tunable via ATS_FAKE_LATENCY, ATS_FAKE_TOKENS_PER_SECOND,
+    ATS_FAKE_ERROR_RATE and ATS_FAKE_RECORDINGS (a JSON recordings file).
+    """
+    from .fake_llm import FakeLLMConfig, FakeOpenAI, load_recordings
+
+    config = FakeLLMConfig(
+        latency=float(os.getenv("ATS_FAKE_LATENCY", "0.5")),
+        tokens_per_second=float(os.getenv("ATS_FAKE_TOKENS_PER_SECOND", "0")),
+        error_rate=float(os.getenv("ATS_FAKE_ERROR_RATE", "0")),
+    )
+    recordings = os.getenv("ATS_FAKE_RECORDINGS", "").strip()
+    if recordings:
+        config.recordings = load_recordings(recordings) + config.recordings
+    return FakeOpenAI(config)
+
+def init_openai_client(api_key: str | None = None, backend: str | None = None):
+    """
+    Shared client for this key/backend: one SDK client (and its keep-alive connection pool)
+    per process, wrapped with retries/backoff, optional hedging (see client.py) and the
+    account's shared rate limiter (see ratelimit.py).
+    """
+    from .client import get_client
+
+    settings = get_settings()
+    backend = (backend or settings.LLM_BACKEND).strip().lower()
+    policy = retry_policy(settings)
+    if backend == "fake":
+        fake_env = [os.getenv(k, "") for k in (
+            "ATS_FAKE_LATENCY", "ATS_FAKE_TOKENS_PER_SECOND", "ATS_FAKE_ERROR_RATE", "ATS_FAKE_RECORDINGS"
+        )]
+        key = "fake:" + "|".join(fake_env)
+        return get_client(key, init_fake_client, policy, rate_limiter(key, settings, backend))
+    key = (api_key or settings.OPENAI_API_KEY).strip()
     if not key:
         raise RuntimeError("OPENAI_API_KEY is missing. Set it in your environment or sidebar.")
-    return OpenAI(api_key=key)
+    # OPENAI_BASE_URL (e.g. a local stub server) is honored by the SDK; keep clients apart per URL
+    base_url = os.getenv("OPENAI_BASE_URL", "")
+    account = f"openai:{base_url}:{key}"
+
+    def factory():
+        # the SDK takes ~1s to import; only the first real client in a process pays for it
+        from openai import OpenAI
+
+        return OpenAI(api_key=key, max_retries=0, timeout=settings.LLM_TIMEOUT_SECONDS)
+
+    return get_client(
+        account,
+        factory,
+        policy,
+        rate_limiter(hashlib.sha256(account.encode("utf-8")).hexdigest(), settings, backend),
+    )
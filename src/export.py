@@ -0,0 +1,227 @@
+"""
+Bulk export of many analyses into one zip, written incrementally:
+
+    reports/0001-jane-doe.md      per-candidate report (Markdown and/or HTML)
+    reports/0001-jane-doe.html
+    summary.csv                   one row per candidate: scores, section scores, missing critical keywords
+    summary.jsonl                 the same, one JSON object per line
+
+Reports are streamed into the archive as each analysis arrives and the summaries are spooled
+to temporary files until close(), so memory stays flat however many candidates there are
+(apart from the zip's own directory, a few hundred bytes per file).
+
+    python -m src.export out.zip --history       # every analysis in the history store
+    python -m src.export out.zip --jsonl analyses.jsonl --formats md
+"""
+import argparse
+import csv
+import json
+import re
+import sys
+import tempfile
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .utils import iter_html_report, iter_markdown_report
+
+FORMATS = ("md", "html")
+SECTION_KEYS = [
+    "ExperienceMatch",
+    "SkillsMatch",
+    "KeywordsMatch",
+    "Education",
+    "FormattingATS",
+    "ClarityReadability",
+    "ImpactQuantification",
+]
+SUMMARY_COLUMNS = ["Resume", "Overall", *SECTION_KEYS, "Missing (Critical)", "Model", "Error", "Report"]
+
+_CHUNK_BYTES = 64 * 1024
+_SPOOL_BYTES = 1024 * 1024  # summaries stay in memory up to this size, then move to a temp file
+_REPORTERS = {"md": iter_markdown_report, "html": iter_html_report}
+_SLUG_RE = re.compile(r"[^A-Za-z0-9]+")
+
+@dataclass
+class ExportStats:
+    candidates: int = 0
+    reports: int = 0
+    failed: int = 0           # candidates without an analysis (summary row only)
+    bytes_written: int = 0    # uncompressed
+    seconds: float = 0.0
+
+def _slug(name: str) -> str:
+    stem = Path(name).stem if name else ""
+    return _SLUG_RE.sub("-", stem).strip("-").lower()[:60] or "candidate"
+
+def _overall(data: Dict[str, Any]) -> Optional[int]:
+    try:
+        return round(float(data.get("ats_score_overall")))
+    except (TypeError, ValueError):
+        return None
+
+def summary_row(name: str, data: Optional[Dict[str, Any]], model: str = "", error: str = "", report: str = "") -> Dict[str, Any]:
+    data = data or {}
+    sections = data.get("section_scores") or {}
+    row: Dict[str, Any] = {"Resume": name, "Overall": _overall(data) if data else None}
+    for k in SECTION_KEYS:
+        row[k] = sections.get(k)
+    row["Missing (Critical)"] = ", ".join(data.get("missing_critical_keywords") or [])
+    row["Model"] = model
+    row["Error"] = error
+    row["Report"] = report
+    return row
+
+def _write_chunks(fh: IO[bytes], pieces: Iterable[str], sep: str = "\n") -> int:
+    # coalesce the report's small pieces so the compressor sees ~64 KB writes
+    buf: List[str] = []
+    size = written = 0
+    for piece in pieces:
+        buf.append(piece)
+        size += len(piece) + 1
+        if size >= _CHUNK_BYTES:
+            data = (sep.join(buf) + sep).encode("utf-8")
+            fh.write(data)
+            written += len(data)
+            buf, size = [], 0
+    if buf:
+        data = (sep.join(buf) + sep).encode("utf-8")
+        fh.write(data)
+        written += len(data)
+    return written
+
+class ReportZipWriter:
+    """
+    Streams per-candidate reports into a zip (path or binary file object) as analyses are
+    added; summary.csv / summary.jsonl are appended to spooled temp files and copied into
+    the archive on close(). Use as a context manager.
+    """
+
+    def __init__(self, dest: str | Path | IO[bytes], formats: Sequence[str] = FORMATS):
+        unknown = [f for f in formats if f not in _REPORTERS]
+        if unknown:
+            raise ValueError(f"unknown report format(s): {', '.join(unknown)}")
+        self.formats = tuple(formats)
+        self.stats = ExportStats()
+        self._started = time.perf_counter()
+        self._zip = zipfile.ZipFile(dest, "w", compression=zipfile.ZIP_DEFLATED)
+        self._csv_file = tempfile.SpooledTemporaryFile(_SPOOL_BYTES, mode="w+", encoding="utf-8", newline="")
+        self._jsonl_file = tempfile.SpooledTemporaryFile(_SPOOL_BYTES, mode="w+", encoding="utf-8")
+        self._csv = csv.DictWriter(self._csv_file, fieldnames=SUMMARY_COLUMNS)
+        self._csv.writeheader()
+        self._closed = False
+
+    def _entry(self, path: str) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(path, date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        return info
+
+    def add(self, name: str, data: Optional[Dict[str, Any]], model: str = "", error: str = "") -> None:
+        self.stats.candidates += 1
+        base = f"reports/{self.stats.candidates:04d}-{_slug(name)}"
+        paths = []
+        if data:
+            for fmt in self.formats:
+                path = f"{base}.{fmt}"
+                with self._zip.open(self._entry(path), "w") as fh:
+                    self.stats.bytes_written += _write_chunks(fh, _REPORTERS[fmt](data, title=f"ATS Report — {name}"))
+                paths.append(path)
+                self.stats.reports += 1
+        else:
+            self.stats.failed += 1
+        row = summary_row(name, data, model=model, error=error, report=paths[0] if paths else "")
+        self._csv.writerow(row)
+        self._jsonl_file.write(json.dumps({
+            "resume": name,
+            "overall": row["Overall"],
+            "section_scores": (data or {}).get("section_scores") or {},
+            "missing_critical_keywords": (data or {}).get("missing_critical_keywords") or [],
+            "model": model,
+            "error": error,
+            "reports": paths,
+        }, ensure_ascii=False) + "\n")
+
+    def close(self) -> ExportStats:
+        if self._closed:
+            return self.stats
+        self._closed = True
+        try:
+            for path, spool in (("summary.csv", self._csv_file), ("summary.jsonl", self._jsonl_file)):
+                spool.seek(0)
+                with self._zip.open(self._entry(path), "w") as fh:
+                    for chunk in iter(lambda: spool.read(_CHUNK_BYTES), ""):
+                        data = chunk.encode("utf-8")
+                        fh.write(data)
+                        self.stats.bytes_written += len(data)
+        finally:
+            self._csv_file.close()
+            self._jsonl_file.close()
+            self._zip.close()
+        self.stats.seconds = time.perf_counter() - self._started
+        return self.stats
+
+    def __enter__(self) -> "ReportZipWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def write_report_zip(
+    analyses: Iterable[Tuple[str, Optional[Dict[str, Any]]]],
+    dest: str | Path | IO[bytes],
+    formats: Sequence[str] = FORMATS,
+) -> ExportStats:
+    """
+    Consumes (name, analysis) pairs lazily, e.g. straight from a generator over a database.
+    """
+    with ReportZipWriter(dest, formats) as writer:
+        for name, data in analyses:
+            writer.add(name, data)
+    return writer.stats
+
+def iter_history_analyses(path: str | Path, limit: int = 10_000) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Saved analyses of every session, most recent first, loaded one record at a time.
+    """
+    from .history import get_history
+
+    history = get_history(path)
+    for summary in history.list(None, limit=limit):
+        record = history.get(summary.id, None)
+        if record is not None:
+            yield record.resume_name or record.title, record.data
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .config import get_settings
+
+    parser = argparse.ArgumentParser(description="Export many analyses as per-candidate reports plus CSV/JSONL summaries.")
+    parser.add_argument("out", help="Zip file to write")
+    parser.add_argument("--history", action="store_true", help="Export the saved analysis history")
+    parser.add_argument("--jsonl", default=None, help="Export analyses from a JSONL file of {\"name\", \"analysis\"} objects")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="Report formats: md, html (comma separated)")
+    args = parser.parse_args(argv)
+
+    if args.jsonl:
+        def source():
+            with open(args.jsonl, encoding="utf-8") as f:
+                for i, line in enumerate(f, 1):
+                    if line.strip():
+                        obj = json.loads(line)
+                        yield obj.get("name") or f"candidate-{i}", obj.get("analysis")
+        analyses = source()
+    elif args.history:
+        settings = get_settings()
+        if not settings.HISTORY_PATH:
+            parser.error("history is not persisted (set ATS_HISTORY_PATH)")
+        analyses = iter_history_analyses(settings.HISTORY_PATH)
+    else:
+        parser.error("pass --history or --jsonl")
+    stats = write_report_zip(analyses, args.out, [f.strip() for f in args.formats.split(",") if f.strip()])
+    print(f"Exported {stats.candidates} candidate(s), {stats.reports} report(s), "
+          f"{stats.bytes_written / 1e6:.1f} MB in {stats.seconds:.2f}s -> {args.out}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
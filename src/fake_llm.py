@@ -0,0 +1,267 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .compaction import count_tokens
+
+DEFAULT_ANALYSIS = {
+    "role_title_inferred": "Machine Learning Engineer",
+    "ats_score_overall": 74,
+    "section_scores": {
+        "ExperienceMatch": 78,
+        "SkillsMatch": 72,
+        "KeywordsMatch": 68,
+        "Education": 85,
+        "ClarityReadability": 75,
+    },
+    "missing_nice_to_have_keywords": ["terraform", "feature store"],
+    "hard_requirements": {
+        "met": True,
+        "details": ["5+ years Python: pass", "Cloud deployment experience: pass"],
+    },
+    "red_flags": ["Several bullets lack measurable outcomes."],
+    "recommendations": [
+        {
+            "area": "Bullets",
+            "severity": "high",
+            "suggestion": "Quantify the impact of the model deployment work.",
+            "example_rewrite": "Deployed 12 ranking models to Kubernetes, cutting p95 latency by 35%.",
+        },
+        {
+            "area": "Skills",
+            "severity": "med",
+            "suggestion": "Group cloud and MLOps tools under one Skills heading.",
+            "example_rewrite": "Cloud & MLOps: AWS (SageMaker, S3), Docker, Kubernetes, Airflow",
+        },
+    ],
+    "tailored_summary": "Machine learning engineer with 6 years shipping production models on AWS and Kubernetes.",
+    "tailored_bullets": [
+        "Built a feature pipeline in Spark serving 40M daily predictions.",
+        "Reduced model training cost 28% by moving to spot instances.",
+    ],
+    "top_action_verbs": ["Deployed", "Reduced", "Scaled"],
+}
+
+DEFAULT_REWRITE = (
+    "- Deployed [X] production ML models on Kubernetes, reducing inference latency by [Y]%\n"
+    "- Automated training pipelines in Airflow, cutting retraining time from [A] to [B] hours\n"
+    "- Partnered with product to ship [feature], lifting conversion by [Z]%"
+)
+
+DEFAULT_FOLLOWUP = (
+    "Focus on the missing critical keywords first: add a Skills line for them and back each one "
+    "with a bullet that shows where you used it and what changed as a result."
+)
+
+# (substring of the system prompt, recorded response) - first match wins
+DEFAULT_RECORDINGS = [
+    {"match": "specialized in precise rewrites", "response": DEFAULT_REWRITE},
+    {"match": "follow-up mode", "response": DEFAULT_FOLLOWUP},
+    {"match": "", "response": json.dumps(DEFAULT_ANALYSIS, ensure_ascii=False)},
+]
+
+class FakeAPIError(Exception):
+    """
+    Shaped like openai.APIStatusError: `status_code` plus `response.headers`.
+    """
+
+    def __init__(self, status_code: int, message: str = "", retry_after: Optional[float] = None):
+        super().__init__(message or f"simulated HTTP {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = _Obj(status_code=status_code, headers=headers)
+
+class FakeTimeoutError(Exception):
+    pass
+
+class _Obj:
+    def __init__(self, **kw):
+        self.__dict__.update(kw)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.__dict__!r})"
+
+def _project_to_schema(content: str, messages: List[Dict[str, Any]]) -> str:
+    """
+    A recorded JSON object reduced to the keys the prompt's schema asks for, so sub-prompts
+    (decomposed analysis, field repair) get partial answers of realistic length.
+    """
+    # only the messages that carry the schema; others may quote keys as context (incremental.py)
+    prompt = "\n".join(
+        str(m.get("content", "")) for m in messages if m.get("role") == "user" and "schema" in str(m.get("content", ""))
+    )
+    if not prompt:
+        return content
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return content
+    if not isinstance(data, dict):
+        return content
+    wanted = {k: v for k, v in data.items() if f'"{k}"' in prompt}
+    return json.dumps(wanted, ensure_ascii=False) if wanted else content
+
+# provider prompt caching as documented for OpenAI: prompts of 1024+ tokens, reused prefix
+# counted in 128-token steps
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_BLOCK = 128
+PROMPT_CACHE_PREFIXES = 4096
+
+@dataclass
+class FakeLLMConfig:
+    latency: float = 0.5              # seconds before the first token / full response
+    latency_jitter: float = 0.0       # uniform +/- jitter added to latency
+    tokens_per_second: float = 0.0    # 0 = whole response at once after `latency`
+    chunk_chars: int = 24             # streamed delta size
+    error_rate: float = 0.0           # probability of a simulated API error
+    error_status: int = 429
+    retry_after: Optional[float] = 1.0
+    seed: Optional[int] = None
+    prompt_cache: bool = True         # report usage.prompt_tokens_details.cached_tokens like the API
+    recordings: List[Dict[str, str]] = field(default_factory=lambda: list(DEFAULT_RECORDINGS))
+
+def load_recordings(path: str | Path) -> List[Dict[str, str]]:
+    """
+    Recordings file: a JSON list of {"match": "...", "response": "..."} objects
+    (as written by RecordingClient).
+    """
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return [{"match": r.get("match", ""), "response": r["response"]} for r in data]
+
+class FakeOpenAI:
+    """
+    In-process stand-in for openai.OpenAI covering what this app uses:
+    chat.completions.create (plain and stream=True), usage, and with_options(timeout=...).
+    Responses are replayed from recordings; latency, streaming speed and errors are simulated.
+    """
+
+    def __init__(self, config: Optional[FakeLLMConfig] = None, timeout: Optional[float] = None):
+        self.config = config or FakeLLMConfig()
+        self.timeout = timeout
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._prefixes: "OrderedDict[str, None]" = OrderedDict()
+        self.calls = 0
+        self.chat = _Obj(completions=_Obj(create=self._create))
+
+    def with_options(self, timeout: Optional[float] = None, **_) -> "FakeOpenAI":
+        clone = FakeOpenAI(self.config, timeout=timeout if timeout is not None else self.timeout)
+        clone._rng = self._rng
+        clone._lock = self._lock
+        clone._prefixes = self._prefixes
+        return clone
+
+    def _cached_tokens(self, model: str, messages: List[Dict[str, Any]], counts: List[int]) -> int:
+        """
+        Message-granular stand-in for the provider's prefix cache: the tokens of the longest
+        run of leading messages this client has already seen for the model.
+        """
+        if not self.config.prompt_cache or sum(counts) < PROMPT_CACHE_MIN_TOKENS:
+            return 0
+        h = hashlib.sha256(model.encode("utf-8"))
+        cached = tokens = 0
+        with self._lock:
+            for m, n in zip(messages, counts):
+                h.update(f"\0{m.get('role', '')}\0{m.get('content', '')}".encode("utf-8"))
+                key = h.hexdigest()
+                tokens += n
+                if key in self._prefixes:
+                    self._prefixes.move_to_end(key)
+                    cached = tokens
+                else:
+                    self._prefixes[key] = None
+            while len(self._prefixes) > PROMPT_CACHE_PREFIXES:
+                self._prefixes.popitem(last=False)
+        if cached < PROMPT_CACHE_MIN_TOKENS:
+            return 0
+        return cached // PROMPT_CACHE_BLOCK * PROMPT_CACHE_BLOCK
+
+    def _pick(self, messages: List[Dict[str, Any]]) -> str:
+        system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+        content = next((rec["response"] for rec in self.config.recordings if rec["match"] in system), "")
+        return _project_to_schema(content, messages)
+
+    def _sleep(self, seconds: float) -> None:
+        if self.timeout is not None and seconds > self.timeout:
+            time.sleep(self.timeout)
+            raise FakeTimeoutError(f"simulated timeout after {self.timeout:.1f}s")
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def _create(self, model: str, messages: List[Dict[str, Any]], stream: bool = False,
+                stream_options: Optional[Dict[str, Any]] = None, **_):
+        cfg = self.config
+        with self._lock:
+            self.calls += 1
+            fail = cfg.error_rate > 0 and self._rng.random() < cfg.error_rate
+            jitter = self._rng.uniform(-cfg.latency_jitter, cfg.latency_jitter) if cfg.latency_jitter else 0.0
+        latency = max(0.0, cfg.latency + jitter)
+        if fail:
+            self._sleep(min(latency, 0.05))
+            raise FakeAPIError(cfg.error_status, retry_after=cfg.retry_after)
+
+        content = self._pick(messages)
+        counts = [count_tokens(str(m.get("content", "")), model) for m in messages]
+        prompt_tokens = sum(counts)
+        completion_tokens = count_tokens(content, model)
+        usage = _Obj(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            prompt_tokens_details=_Obj(cached_tokens=self._cached_tokens(model, messages, counts)),
+        )
+        if stream:
+            include_usage = bool((stream_options or {}).get("include_usage"))
+            return self._stream(model, content, latency, usage if include_usage else None)
+
+        gen_seconds = completion_tokens / cfg.tokens_per_second if cfg.tokens_per_second else 0.0
+        self._sleep(latency + gen_seconds)
+        return _Obj(
+            model=model,
+            choices=[_Obj(index=0, finish_reason="stop", message=_Obj(role="assistant", content=content))],
+            usage=usage,
+        )
+
+    def _stream(self, model: str, content: str, latency: float, usage) -> Iterator[_Obj]:
+        cfg = self.config
+        self._sleep(latency)
+        step = max(1, cfg.chunk_chars)
+        per_char = (1.0 / (cfg.tokens_per_second * 4)) if cfg.tokens_per_second else 0.0
+        for i in range(0, len(content), step):
+            piece = content[i : i + step]
+            if per_char:
+                time.sleep(per_char * len(piece))
+            yield _Obj(model=model, choices=[_Obj(index=0, finish_reason=None, delta=_Obj(content=piece))], usage=None)
+        yield _Obj(model=model, choices=[_Obj(index=0, finish_reason="stop", delta=_Obj(content=None))], usage=None)
+        if usage is not None:
+            yield _Obj(model=model, choices=[], usage=usage)
+
+class RecordingClient:
+    """
+    Wraps a real client and appends every non-streamed completion to a recordings file,
+    keyed by the first line of the system prompt, for later replay with FakeOpenAI.
+    """
+
+    def __init__(self, client, path: str | Path):
+        self._client = client
+        self._path = Path(path)
+        self._lock = threading.Lock()
+        self.chat = _Obj(completions=_Obj(create=self._create))
+
+    def _create(self, **kwargs):
+        resp = self._client.chat.completions.create(**kwargs)
+        if kwargs.get("stream"):
+            return resp
+        system = next((m.get("content", "") for m in kwargs.get("messages", []) if m.get("role") == "system"), "")
+        entry = {"match": system.splitlines()[0] if system else "", "response": resp.choices[0].message.content}
+        with self._lock:
+            existing = json.loads(self._path.read_text(encoding="utf-8")) if self._path.exists() else []
+            existing.append(entry)
+            self._path.write_text(json.dumps(existing, indent=2, ensure_ascii=False), encoding="utf-8")
+        return resp
@@ -0,0 +1,92 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from .parsing import StructuredResume, get_structured_resume
+
+CORE_HEADINGS = ("experience", "skills", "education")
+MAX_LISTED_BULLETS = 5
+
+@dataclass
+class HeuristicScore:
+    score: int
+    findings: List[str] = field(default_factory=list)
+
+def impact_quantification(doc: StructuredResume) -> HeuristicScore:
+    """
+    Share of experience/project bullets that carry a number (%, $, 3x, 40M, team sizes...),
+    scaled to 20-100.
+    """
+    bullets = [b for b in doc.bullets if b.section in ("experience", "projects")] or list(doc.bullets)
+    if not bullets:
+        return HeuristicScore(40, ["No bullet points found to check for measurable results."])
+    quantified = sum(b.quantified for b in bullets)
+    score = round(20 + 80 * quantified / len(bullets))
+    findings = []
+    if quantified < len(bullets):
+        findings.append(f"{len(bullets) - quantified} of {len(bullets)} bullets have no numbers.")
+    return HeuristicScore(score, findings)
+
+def formatting_ats(doc: StructuredResume) -> HeuristicScore:
+    """
+    Deductions for what trips up ATS parsers: missing standard headings and contact
+    details, table/column layouts and undecodable glyphs left over from extraction.
+    """
+    score = 100
+    findings = []
+    kinds = set(doc.kinds)
+    for kind in CORE_HEADINGS:
+        if kind not in kinds:
+            score -= 15
+            findings.append(f"No '{kind.title()}' heading found.")
+    if doc.contact is None or not doc.contact.email:
+        score -= 10
+        findings.append("No email address near the top.")
+    elif not doc.contact.phone:
+        score -= 5
+        findings.append("No phone number near the top.")
+    tables = sum(a.kind == "table" for a in doc.artifacts)
+    if tables:
+        score -= min(30, 6 * tables)
+        findings.append(f"{tables} line(s) look like tables or multi-column layout.")
+    glyphs = sum(a.kind == "encoding" for a in doc.artifacts)
+    if glyphs:
+        score -= min(20, 4 * glyphs)
+        findings.append(f"{glyphs} line(s) contain icons or glyphs that did not extract as text.")
+    if any(b.section == "experience" and not b.marked for b in doc.bullets):
+        score -= 5
+        findings.append("Experience bullets have no bullet markers.")
+    return HeuristicScore(max(0, min(100, score)), findings)
+
+def local_heuristic_fields(resume_text: str) -> Dict[str, Any]:
+    """
+    Locally computed parts of the analysis: the two section scores above (which the model
+    is not asked for, see schema.LOCAL_SCORE_KEYS) plus the findings behind them, from the
+    shared structured resume (see parsing.py).
+    """
+    doc = get_structured_resume(resume_text)
+    impact = impact_quantification(doc)
+    formatting = formatting_ats(doc)
+    unquantified = [
+        doc.text_of(b).strip() for b in doc.bullets
+        if not b.quantified and b.section in ("experience", "projects")
+    ]
+    return {
+        "local_section_scores": {"ImpactQuantification": impact.score, "FormattingATS": formatting.score},
+        "formatting_issues": formatting.findings + impact.findings,
+        "unquantified_bullets": unquantified[:MAX_LISTED_BULLETS],
+    }
+
+def merge_heuristic_fields(data: Dict[str, Any], fields: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Overlays the local scores on the model's section_scores (once those exist) and adds
+    the findings lists.
+    """
+    merged = dict(data)
+    if isinstance(merged.get("section_scores"), dict):
+        merged["section_scores"] = {**merged["section_scores"], **fields["local_section_scores"]}
+    merged["formatting_issues"] = fields["formatting_issues"]
+    merged["unquantified_bullets"] = fields["unquantified_bullets"]
+    return merged
+
+def apply_local_heuristics(data: Dict[str, Any], resume_text: str) -> Dict[str, Any]:
+    return merge_heuristic_fields(data, local_heuristic_fields(resume_text))
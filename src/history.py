@@ -0,0 +1,155 @@
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+@dataclass
+class AnalysisRecord:
+    data: Dict[str, Any]
+    resume_text: str
+    jd_text: str
+    model: str
+    temperature: float
+    resume_name: str = ""
+    owner: str = ""  # user or history id the analysis belongs to; list()/get() filter on it
+    id: Optional[int] = None
+    created: float = field(default_factory=time.time)
+
+    @property
+    def title(self) -> str:
+        role = self.data.get("role_title_inferred") or "Untitled role"
+        score = self.data.get("ats_score_overall")
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.created))
+        return f"{when} • {role}" + (f" • {score}/100" if score is not None else "") + (
+            f" • {self.resume_name}" if self.resume_name else ""
+        )
+
+class AnalysisHistory:
+    """
+    Past analyses (result JSON plus the exact resume/JD text they were run on) in SQLite,
+    so any of them can be reloaded without another model call. Each owner keeps its
+    `max_entries` most recent analyses; older ones are dropped.
+
+    Rows carry the `owner` (user or history id) that saved them. list()/get()/delete() with an owner
+    only see that owner's rows; owner=None (the export CLI) sees all of them. A path of
+    ":memory:" keeps the history in-process, e.g. per Streamlit session.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int = 200):
+        self.path = Path(path)
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL NOT NULL,"
+            " model TEXT NOT NULL, temperature REAL NOT NULL, resume_name TEXT NOT NULL,"
+            " role TEXT NOT NULL, score INTEGER, data TEXT NOT NULL,"
+            " resume_text TEXT NOT NULL, jd_text TEXT NOT NULL, owner TEXT NOT NULL DEFAULT '')"
+        )
+        columns = {r[1] for r in self._conn.execute("PRAGMA table_info(analyses)")}
+        if "owner" not in columns:
+            # stores written before rows were scoped: old rows get no owner, so no session sees them
+            self._conn.execute("ALTER TABLE analyses ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_owner ON analyses (owner, created)")
+        self._conn.commit()
+
+    @staticmethod
+    def _scope(owner: Optional[str]) -> Tuple[str, tuple]:
+        return ("", ()) if owner is None else (" AND owner = ?", (owner,))
+
+    def save(self, record: AnalysisRecord) -> int:
+        score = record.data.get("ats_score_overall")
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO analyses (created, model, temperature, resume_name, role, score, data, resume_text, jd_text, owner)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.created, record.model, float(record.temperature), record.resume_name,
+                    str(record.data.get("role_title_inferred") or ""),
+                    int(score) if isinstance(score, (int, float)) else None,
+                    json.dumps(record.data, ensure_ascii=False), record.resume_text, record.jd_text, record.owner,
+                ),
+            )
+            if self.max_entries:
+                # per owner, so a busy session can't push everyone else's analyses out
+                self._conn.execute(
+                    "DELETE FROM analyses WHERE id IN ("
+                    " SELECT id FROM analyses WHERE owner = ? ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                    (record.owner, self.max_entries),
+                )
+            self._conn.commit()
+            record.id = cur.lastrowid
+            return record.id
+
+    def list(self, owner: Optional[str], limit: int = 50) -> List[AnalysisRecord]:
+        """
+        Most recent first. Only the summary columns are loaded; texts are filled by get().
+        """
+        where, args = self._scope(owner)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, created, model, temperature, resume_name, role, score, owner FROM analyses"
+                " WHERE 1 = 1" + where + " ORDER BY created DESC LIMIT ?",
+                (*args, limit),
+            ).fetchall()
+        return [
+            AnalysisRecord(
+                data={"role_title_inferred": r[5], "ats_score_overall": r[6]},
+                resume_text="", jd_text="", model=r[2], temperature=r[3], resume_name=r[4], owner=r[7],
+                id=r[0], created=r[1],
+            )
+            for r in rows
+        ]
+
+    def get(self, record_id: int, owner: Optional[str]) -> Optional[AnalysisRecord]:
+        where, args = self._scope(owner)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, created, model, temperature, resume_name, data, resume_text, jd_text, owner"
+                " FROM analyses WHERE id = ?" + where,
+                (record_id, *args),
+            ).fetchone()
+        if row is None:
+            return None
+        return AnalysisRecord(
+            data=json.loads(row[5]), resume_text=row[6], jd_text=row[7], model=row[2],
+            temperature=row[3], resume_name=row[4], owner=row[8], id=row[0], created=row[1],
+        )
+
+    def delete(self, record_id: int, owner: Optional[str]) -> None:
+        where, args = self._scope(owner)
+        with self._lock:
+            self._conn.execute("DELETE FROM analyses WHERE id = ?" + where, (record_id, *args))
+            self._conn.commit()
+
+    def clear(self, owner: Optional[str]) -> None:
+        where, args = self._scope(owner)
+        with self._lock:
+            self._conn.execute("DELETE FROM analyses WHERE 1 = 1" + where, args)
+            self._conn.commit()
+
+    def count(self, owner: Optional[str]) -> int:
+        where, args = self._scope(owner)
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM analyses WHERE 1 = 1" + where, args).fetchone()[0]
+
+    def __len__(self) -> int:
+        return self.count(None)
+
+_histories: Dict[str, AnalysisHistory] = {}
+_histories_lock = threading.Lock()
+
+def get_history(path: str | Path, max_entries: int = 200) -> AnalysisHistory:
+    resolved = str(Path(path).resolve())
+    with _histories_lock:
+        hist = _histories.get(resolved)
+        if hist is None:
+            hist = AnalysisHistory(resolved, max_entries=max_entries)
+            _histories[resolved] = hist
+        return hist
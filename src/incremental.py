@@ -0,0 +1,220 @@
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .cache import content_key
+from .compaction import JD_TOKEN_BUDGET, compact_jd
+from .history import AnalysisRecord
+from .keywords import KeywordMatcher, jd_keyword_matcher, keyword_fields_from_counts, merge_keyword_fields
+from .parsing import get_structured_resume
+from .prompts import ANALYSIS_SYSTEM, INCREMENTAL_PREVIOUS_TEMPLATE, INCREMENTAL_USER_TEMPLATE, PROMPT_VERSION
+from .schema import ANALYSIS_SPEC, salvage_json, schema_for_fields, validate_analysis
+from .tracing import span, timed_completion
+
+# above this share of changed resume text a cold analysis is cheaper to trust than a patch
+INCREMENTAL_MAX_CHANGED = 0.6
+
+# re-scored after any edit
+_ALWAYS_RESCORED = ("ats_score_overall", "section_scores")
+
+# the analysis fields an edit to each resume section can move; the rest are reused as they are
+SECTION_FIELDS: Dict[str, tuple] = {
+    "experience": ("hard_requirements", "red_flags", "recommendations", "tailored_bullets"),
+    "projects": ("recommendations", "tailored_bullets"),
+    "skills": ("hard_requirements", "missing_nice_to_have_keywords", "recommendations"),
+    "summary": ("recommendations", "tailored_summary"),
+    "preamble": ("recommendations", "tailored_summary"),
+    "education": ("hard_requirements", "red_flags"),
+    "certifications": ("hard_requirements", "missing_nice_to_have_keywords"),
+}
+_OTHER_FIELDS = ("recommendations",)
+
+def segment_resume(text: str) -> "OrderedDict[str, str]":
+    """
+    Resume text by section (see parsing.structure_resume), in document order. A repeated
+    heading kind gets a numbered name ("experience#2").
+    """
+    doc = get_structured_resume(text)
+    sections: "OrderedDict[str, str]" = OrderedDict()
+    for sec in doc.sections:
+        name, n = sec.kind, 1
+        while name in sections:
+            n += 1
+            name = f"{sec.kind}#{n}"
+        sections[name] = doc.text_of(sec).strip()
+    return sections
+
+def _normalized(text: str) -> str:
+    # re-extracting the same file can shift whitespace; that is not an edit
+    return " ".join(text.split())
+
+@dataclass
+class SectionDiff:
+    changed: List[str] = field(default_factory=list)
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    changed_chars: int = 0
+    total_chars: int = 0
+
+    @property
+    def edited(self) -> List[str]:
+        return self.changed + self.added + self.removed
+
+    @property
+    def changed_ratio(self) -> float:
+        return self.changed_chars / self.total_chars if self.total_chars else 0.0
+
+def diff_sections(before: Dict[str, str], after: Dict[str, str]) -> SectionDiff:
+    diff = SectionDiff()
+    for name, text in after.items():
+        diff.total_chars += len(text)
+        if name not in before:
+            diff.added.append(name)
+            diff.changed_chars += len(text)
+        elif _normalized(before[name]) != _normalized(text):
+            diff.changed.append(name)
+            diff.changed_chars += len(text)
+        else:
+            diff.unchanged.append(name)
+    for name, text in before.items():
+        if name not in after:
+            diff.removed.append(name)
+            diff.changed_chars += len(text)
+            diff.total_chars += len(text)
+    return diff
+
+def fields_to_rescore(diff: SectionDiff) -> List[str]:
+    wanted = set(_ALWAYS_RESCORED)
+    for name in diff.edited:
+        wanted.update(SECTION_FIELDS.get(name.split("#")[0], _OTHER_FIELDS))
+    return [k for k in ANALYSIS_SPEC if k in wanted]
+
+def _section_fields(matcher: KeywordMatcher, sections: Dict[str, str]) -> Dict[str, Any]:
+    return keyword_fields_from_counts(matcher.keywords, matcher.count_sections(sections.values()))
+
+def section_keyword_fields(resume_text: str, jd_text: str, top_k: int = 40) -> Dict[str, Any]:
+    """
+    Same fields as keywords.local_keyword_fields, counted per resume section and memoized
+    on the JD's shared matcher (keywords.jd_keyword_matcher).
+    """
+    return _section_fields(jd_keyword_matcher(jd_text, top_k), segment_resume(resume_text))
+
+@dataclass
+class IncrementalResult:
+    data: Dict[str, Any]
+    diff: SectionDiff
+    rescored: List[str] = field(default_factory=list)   # fields regenerated by the model
+    kept: List[str] = field(default_factory=list)       # fields the model returned invalid; prior value kept
+    seconds: float = 0.0
+    from_cache: bool = False
+
+def _format_changes(before: Dict[str, str], after: Dict[str, str], diff: SectionDiff) -> str:
+    blocks = []
+    for name in diff.changed:
+        blocks.append(f"### {name} (edited)\nBefore:\n{before[name]}\n\nAfter:\n{after[name]}")
+    for name in diff.added:
+        blocks.append(f"### {name} (new section)\n{after[name]}")
+    for name in diff.removed:
+        blocks.append(f"### {name} (removed)\nBefore:\n{before[name]}")
+    return "\n\n".join(blocks)
+
+def reanalyze_incremental(
+    client,
+    model: str,
+    temperature: float,
+    prior: AnalysisRecord,
+    resume_text: str,
+    jd_text: str,
+    jd_budget: int = JD_TOKEN_BUDGET,
+    cache=None,
+) -> Optional[IncrementalResult]:
+    """
+    Updates a previous analysis for an edited resume. The resume is diffed section by
+    section against `prior.resume_text`; keyword fields are recounted for the changed
+    sections only, and one small request re-scores the fields those sections affect
+    (see SECTION_FIELDS), with the previous analysis as context. Everything else is reused.
+    Returns None when a full analysis is needed instead: a different JD or model, more
+    than INCREMENTAL_MAX_CHANGED of the resume changed, or the re-scoring request failed
+    or came back unreadable.
+    """
+    started = time.perf_counter()
+    if jd_text != prior.jd_text or model != prior.model:
+        return None
+    with span("diff") as sp:
+        before, after = segment_resume(prior.resume_text), segment_resume(resume_text)
+        diff = diff_sections(before, after)
+        if sp is not None:
+            sp.attrs.update(edited=len(diff.edited), sections=len(after))
+    if diff.changed_ratio > INCREMENTAL_MAX_CHANGED:
+        return None
+    with span("keywords"):
+        keyword_fields = _section_fields(jd_keyword_matcher(jd_text), after)
+    result = IncrementalResult(data={}, diff=diff)
+    if not diff.edited:
+        result.data = merge_keyword_fields(prior.data, keyword_fields)
+        result.seconds = time.perf_counter() - started
+        return result
+
+    fields = fields_to_rescore(diff)
+    key = None
+    patch = None
+    if cache is not None:
+        # the previous analysis is part of the prompt, so two priors of the same text don't share a patch
+        key = content_key(
+            "incremental", PROMPT_VERSION, ANALYSIS_SYSTEM, INCREMENTAL_USER_TEMPLATE,
+            model, float(temperature), jd_budget, prior.resume_text, resume_text, jd_text,
+            json.dumps(prior.data, ensure_ascii=False, sort_keys=True), ",".join(fields),
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            patch = salvage_json(cached)
+            result.from_cache = True
+    if patch is None:
+        # context is the previous value of what is being re-scored, not the whole analysis
+        previous = {k: prior.data[k] for k in ("role_title_inferred", *fields) if k in prior.data}
+        jd = compact_jd(jd_text, jd_budget, model=model, label="incremental.jd").text
+        with span("patch") as sp:
+            try:
+                resp = timed_completion(
+                    "analysis.incremental",
+                    client,
+                    model=model,
+                    temperature=temperature,
+                    response_format={"type": "json_object"},
+                    messages=[
+                        {"role": "system", "content": ANALYSIS_SYSTEM},
+                        {"role": "user", "content": INCREMENTAL_PREVIOUS_TEMPLATE.format(
+                            previous=json.dumps(previous, ensure_ascii=False))},
+                        {"role": "user", "content": INCREMENTAL_USER_TEMPLATE.format(
+                            changes=_format_changes(before, after, diff), jd=jd, schema=schema_for_fields(fields))},
+                    ],
+                )
+                patch = salvage_json(resp.choices[0].message.content)
+            except Exception as e:
+                # not worth an error page: the caller falls back to a full analysis
+                if sp is not None:
+                    sp.attrs["error"] = f"{type(e).__name__}: {e}"
+                return None
+            if not patch:
+                if sp is not None:
+                    sp.attrs["error"] = "unreadable patch"
+                return None
+
+    with span("validate"):
+        merged = {k: v for k, v in prior.data.items() if k in ANALYSIS_SPEC}
+        merged.update((k, patch[k]) for k in fields if k in patch)
+        checked = validate_analysis(merged)
+        # a bad re-score falls back to the previous (valid) value rather than a repair call
+        result.kept = [k for k in checked.invalid if k in prior.data]
+        if result.kept:
+            merged.update((k, prior.data[k]) for k in result.kept)
+            checked = validate_analysis(merged)
+    result.rescored = [k for k in fields if k in patch and k not in result.kept]
+    if key is not None and not result.from_cache and not result.kept:
+        cache.set(key, json.dumps({k: patch[k] for k in fields if k in patch}, ensure_ascii=False))
+    result.data = merge_keyword_fields(checked.data, keyword_fields)
+    result.seconds = time.perf_counter() - started
+    return result
@@ -0,0 +1,264 @@
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .cache import content_key
+from .keywords import Keyword, extract_jd_keywords, stem, tokenize
+from .retrieval import BM25Index, terms
+
+PROFILE_KEYWORDS = 40
+# final score = BM25_WEIGHT * (bm25 / best bm25) + (1 - BM25_WEIGHT) * critical-keyword coverage
+BM25_WEIGHT = 0.4
+
+@dataclass
+class StoredJD:
+    id: int
+    title: str
+    text: str
+    keywords: List[Keyword] = field(default_factory=list)
+    source: str = ""
+    added: float = 0.0
+
+    @property
+    def critical(self) -> List[Keyword]:
+        return [k for k in self.keywords if k.critical]
+
+@dataclass
+class JDMatch:
+    jd: StoredJD
+    score: float
+    bm25: float
+    coverage: float
+    matched: List[str]
+    missing: List[str]
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            "ID": self.jd.id,
+            "Title": self.jd.title,
+            "Match": round(self.score * 100),
+            "Coverage": round(self.coverage * 100),
+            "Missing (Critical)": ", ".join(self.missing[:8]),
+        }
+
+def _title_of(text: str) -> str:
+    for ln in (text or "").splitlines():
+        if ln.strip():
+            return ln.strip()[:120]
+    return "Untitled posting"
+
+def _keyword_to_json(kw: Keyword) -> Dict[str, Any]:
+    return {"phrase": kw.phrase, "forms": [list(f) for f in kw.forms], "jd_freq": kw.jd_freq,
+            "critical": kw.critical, "is_skill": kw.is_skill}
+
+def _keyword_from_json(d: Dict[str, Any]) -> Keyword:
+    return Keyword(d["phrase"], [tuple(f) for f in d["forms"]], d.get("jd_freq", 0),
+                   d.get("critical", False), d.get("is_skill", False))
+
+def _ngrams(text: str, max_n: int = 3) -> Set[Tuple[str, ...]]:
+    toks = [stem(t) for t in tokenize(text)]
+    return {tuple(toks[i:i + n]) for n in range(1, max_n + 1) for i in range(len(toks) - n + 1)}
+
+class JDLibrary:
+    """
+    SQLite store of job postings. Keyword/requirement profiles and index term counts are
+    computed once at ingest, so ranking a resume against the whole library needs no LLM
+    call and no re-tokenizing of stored postings.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jds ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE NOT NULL,"
+            " title TEXT NOT NULL, source TEXT NOT NULL DEFAULT '', text TEXT NOT NULL,"
+            " profile TEXT NOT NULL, terms TEXT NOT NULL, added REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._index: Optional[BM25Index] = None
+        self._docs: List[StoredJD] = []
+
+    def add(self, text: str, title: str = "", source: str = "") -> Tuple[int, bool]:
+        """
+        Stores a posting (deduplicated by content). Returns (id, created).
+        """
+        text = (text or "").strip()
+        if not text:
+            raise ValueError("Empty job description.")
+        key = content_key(text)
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM jds WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                return row[0], False
+        profile = json.dumps([_keyword_to_json(k) for k in extract_jd_keywords(text, top_k=PROFILE_KEYWORDS)])
+        term_counts = json.dumps(Counter(terms(text)))
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO jds (key, title, source, text, profile, terms, added) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, title.strip() or _title_of(text), source, text, profile, term_counts, time.time()),
+            )
+            self._conn.commit()
+            self._index = None
+            if cur.rowcount == 0:
+                return self._conn.execute("SELECT id FROM jds WHERE key = ?", (key,)).fetchone()[0], False
+            return cur.lastrowid, True
+
+    def add_many(self, items: Iterable[Tuple[str, str, str]]) -> Tuple[int, int]:
+        """
+        Bulk ingest of (source, text, title) triples; an empty title falls back to the
+        posting's first line. Returns (added, duplicates).
+        """
+        added = dupes = 0
+        for source, text, title in items:
+            if not (text or "").strip():
+                continue
+            _, created = self.add(text, title=title, source=source)
+            added += created
+            dupes += not created
+        return added, dupes
+
+    def remove(self, jd_id: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM jds WHERE id = ?", (jd_id,))
+            self._conn.commit()
+            self._index = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM jds")
+            self._conn.commit()
+            self._index = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jds").fetchone()[0]
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT id, title, source, added FROM jds ORDER BY id").fetchall()
+        return [{"id": r[0], "title": r[1], "source": r[2], "added": r[3]} for r in rows]
+
+    def get(self, jd_id: int) -> Optional[StoredJD]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, title, text, profile, source, added FROM jds WHERE id = ?", (jd_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return StoredJD(row[0], row[1], row[2], [_keyword_from_json(k) for k in json.loads(row[3])], row[4], row[5])
+
+    def _ensure_index(self) -> Tuple[BM25Index, List[StoredJD]]:
+        with self._lock:
+            if self._index is None:
+                rows = self._conn.execute(
+                    "SELECT id, title, text, profile, source, added, terms FROM jds ORDER BY id"
+                ).fetchall()
+                self._docs = [
+                    StoredJD(r[0], r[1], r[2], [_keyword_from_json(k) for k in json.loads(r[3])], r[4], r[5])
+                    for r in rows
+                ]
+                self._index = BM25Index(self._docs, counts=[json.loads(r[6]) for r in rows])
+            return self._index, self._docs
+
+    def rank(self, resume_text: str, top_k: Optional[int] = 20) -> List[JDMatch]:
+        """
+        Ranks every stored posting for a resume: BM25 relevance of the resume against the
+        posting, blended with how many of the posting's critical keywords the resume covers.
+        """
+        index, docs = self._ensure_index()
+        if not docs:
+            return []
+        bm25 = dict(index.scores(resume_text))
+        best = max(bm25.values(), default=0.0) or 1.0
+        grams = _ngrams(resume_text)
+        matches = []
+        for i, jd in enumerate(docs):
+            critical = jd.critical or jd.keywords
+            matched = [k.phrase for k in critical if any(f in grams for f in k.forms)]
+            missing = [k.phrase for k in critical if k.phrase not in matched]
+            coverage = len(matched) / len(critical) if critical else 0.0
+            relevance = bm25.get(i, 0.0)
+            score = BM25_WEIGHT * relevance / best + (1 - BM25_WEIGHT) * coverage
+            matches.append(JDMatch(jd, score, relevance, coverage, matched, missing))
+        matches.sort(key=lambda m: (-m.score, m.jd.id))
+        return matches[:top_k] if top_k else matches
+
+_libraries: Dict[str, JDLibrary] = {}
+_libraries_lock = threading.Lock()
+
+def get_jd_library(path: str | Path) -> JDLibrary:
+    resolved = str(Path(path).resolve())
+    with _libraries_lock:
+        lib = _libraries.get(resolved)
+        if lib is None:
+            lib = JDLibrary(resolved)
+            _libraries[resolved] = lib
+        return lib
+
+def iter_jd_sources(path: str | Path) -> Iterable[Tuple[str, str, str]]:
+    """
+    (source, text, title) for every posting in a folder, .zip or single file; files have no
+    title of their own. A .jsonl file is read as one posting per line ({"title": ..., "text": ...},
+    optionally "source"), sourced as "<file>:<line>" by default.
+    """
+    from .batch import iter_resume_sources
+    from .parsing import extract_text_from_bytes
+
+    p = Path(path)
+    if p.suffix.lower() == ".jsonl":
+        with p.open("r", encoding="utf-8") as f:
+            for n, line in enumerate(f, 1):
+                if line.strip():
+                    rec = json.loads(line)
+                    yield rec.get("source") or f"{p.name}:{n}", rec.get("text", ""), rec.get("title") or ""
+        return
+    for name, data in iter_resume_sources(p):
+        yield name, extract_text_from_bytes(name, data), ""
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .config import get_settings
+    from .parsing import extract_text_from_bytes
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Job description library: ingest postings, rank them for a resume.")
+    parser.add_argument("--db", default=settings.JD_LIBRARY_PATH)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_add = sub.add_parser("add", help="Ingest postings from a folder, .zip, .jsonl or file")
+    p_add.add_argument("path")
+    p_rank = sub.add_parser("rank", help="Rank stored postings for a resume")
+    p_rank.add_argument("resume")
+    p_rank.add_argument("--top", type=int, default=10)
+    sub.add_parser("list", help="List stored postings")
+    args = parser.parse_args(argv)
+
+    lib = get_jd_library(args.db)
+    if args.cmd == "add":
+        t0 = time.perf_counter()
+        added, dupes = lib.add_many(iter_jd_sources(args.path))
+        print(f"Added {added} posting(s), {dupes} duplicate(s) in {time.perf_counter() - t0:.1f}s; library has {len(lib)}",
+              file=sys.stderr)
+    elif args.cmd == "rank":
+        resume = Path(args.resume)
+        text = extract_text_from_bytes(resume.name, resume.read_bytes())
+        t0 = time.perf_counter()
+        matches = lib.rank(text, top_k=args.top)
+        for m in matches:
+            print(json.dumps(m.to_row(), ensure_ascii=False))
+        print(f"Ranked {len(lib)} posting(s) in {(time.perf_counter() - t0) * 1000:.1f} ms", file=sys.stderr)
+    else:
+        for row in lib.list():
+            print(f"{row['id']}\t{row['title']}\t{row['source']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
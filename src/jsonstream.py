@@ -0,0 +1,70 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+class TopLevelFieldParser:
+    """
+    Incremental parser for a streamed JSON object.
+    feed() returns the top-level (key, value) pairs whose values closed in that chunk,
+    so callers can act on "ats_score_overall" long before the whole object is done.
+    Only top-level structure is tracked; nested values are decoded with json.loads once closed.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._key: Optional[str] = None
+        self._value_start = -1
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        if not chunk or self.done:
+            return []
+        self.buffer += chunk
+        out: List[Tuple[str, Any]] = []
+        buf = self.buffer
+        i = self._pos
+        n = len(buf)
+        while i < n:
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._value_start < 0:
+                        self._key = json.loads(buf[self._string_start : i + 1])
+            elif c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                if self._depth == 1:
+                    self._emit(buf, i, out)
+                    self.done = True
+                self._depth -= 1
+            elif self._depth == 1:
+                if c == ":" and self._value_start < 0:
+                    self._value_start = i + 1
+                elif c == ",":
+                    self._emit(buf, i, out)
+            i += 1
+            if self.done:
+                break
+        self._pos = i
+        return out
+
+    def _emit(self, buf: str, end: int, out: List[Tuple[str, Any]]) -> None:
+        if self._key is not None and self._value_start >= 0:
+            try:
+                out.append((self._key, json.loads(buf[self._value_start : end])))
+            except ValueError:
+                pass
+        self._key = None
+        self._value_start = -1
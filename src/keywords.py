@@ -0,0 +1,402 @@
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# canonical skill -> aliases (all compared after tokenizing + stemming)
+SKILL_ALIASES: Dict[str, List[str]] = {
+    "kubernetes": ["k8s"],
+    "javascript": ["js", "ecmascript"],
+    "typescript": [],
+    "python": [],
+    "java": [],
+    "golang": ["go lang"],
+    "c++": ["cpp"],
+    "c#": ["csharp"],
+    ".net": ["dotnet", "asp.net", "net core"],  # tokenize keeps the dot, so a bare "net" never matches
+    "node.js": ["nodejs", "node js"],
+    "react": ["react.js", "reactjs"],
+    "angular": ["angularjs"],
+    "vue": ["vue.js", "vuejs"],
+    "sql": [],
+    "nosql": [],
+    "postgresql": ["postgres"],
+    "mysql": [],
+    "mongodb": ["mongo"],
+    "redis": [],
+    "kafka": ["apache kafka"],
+    "spark": ["apache spark", "pyspark"],
+    "airflow": ["apache airflow"],
+    "hadoop": [],
+    "snowflake": [],
+    "databricks": [],
+    "docker": [],
+    "terraform": [],
+    "ansible": [],
+    "aws": ["amazon web services"],
+    "gcp": ["google cloud", "google cloud platform"],
+    "azure": ["microsoft azure"],
+    "ci/cd": ["ci cd", "cicd", "continuous integration", "continuous delivery"],
+    "git": ["github", "gitlab"],
+    "linux": [],
+    "rest api": ["rest apis", "restful", "restful api"],
+    "graphql": [],
+    "microservices": ["micro services"],
+    "machine learning": ["ml"],
+    "deep learning": [],
+    "artificial intelligence": ["ai"],
+    "generative ai": ["genai", "gen ai"],
+    "large language models": ["llm", "llms"],
+    "natural language processing": ["nlp"],
+    "computer vision": [],
+    "mlops": ["ml ops"],
+    "pytorch": ["torch"],
+    "tensorflow": [],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "pandas": [],
+    "numpy": [],
+    "tableau": [],
+    "power bi": ["powerbi"],
+    "excel": [],
+    "agile": ["scrum"],
+    "project management": ["pmp"],
+    "data analysis": ["data analytics"],
+    "data engineering": [],
+    "etl": ["elt"],
+    "statistics": ["statistical"],
+    "a/b testing": ["ab testing", "a b testing"],
+}
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each etc few for from further had has have
+having he her here hers him his how i if in into is it its itself just like may me more most must my
+no nor not of off on once only or other our ours out over own per plus same she should so some such
+than that the their theirs them then there these they this those through to too under until up upon
+us very via was we well were what when where which while who whom why will with within without would
+you your yours able ability across based bring excellent good great ideal including new one preferred
+required requirement requirements responsibilities responsible role seeking strong team teams two using
+work working years year experience experiences skill skills knowledge understanding proficiency
+proficient familiarity familiar candidate candidates job position company opportunity join looking
+various etc e.g i.e demonstrated proven solid deep hands-on least minimum related relevant equivalent
+degree bachelor master phd field similar environment environments make help build support ensure
+""".split())
+
+SECTION_COUNTS_SIZE = 512
+
+# ".net" keeps its leading dot so it isn't the word "net" ("grew net revenue")
+_TOKEN_RE = re.compile(r"(?<![a-z0-9])\.net(?![a-z0-9])|[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*[+#]*")
+_BOUNDARY_RE = re.compile(r"[\n;:,()\[\]{}|!?•·●▪–—]|\.(?:\s|$)")
+
+_CRITICAL_CUES = ("require", "must", "qualification", "essential", "minimum")
+_NICE_CUES = ("prefer", "nice to have", "nice-to-have", "bonus", "plus", "desirable", "ideally")
+
+def stem(token: str) -> str:
+    """
+    Tiny suffix stripper: good enough to fold plurals and common verb forms.
+    Only pure alphabetic tokens are touched so "k8s", "c++" or "s3" survive.
+    """
+    if len(token) <= 3 or not token.isalpha():
+        return token
+    for suffix, repl, min_len in (
+        ("ies", "y", 5),
+        ("sses", "ss", 6),
+        ("ing", "", 6),
+        ("ed", "", 5),
+        ("es", "", 5),
+        ("s", "", 4),
+    ):
+        if token.endswith(suffix) and len(token) >= min_len:
+            if suffix == "s" and token.endswith(("ss", "us", "is")):
+                return token
+            return token[: len(token) - len(suffix)] + repl
+    return token
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+def normalize_phrase(phrase: str) -> Tuple[str, ...]:
+    return tuple(stem(t) for t in tokenize(phrase))
+
+def _build_alias_index() -> Dict[Tuple[str, ...], str]:
+    index: Dict[Tuple[str, ...], str] = {}
+    for canonical, aliases in SKILL_ALIASES.items():
+        for form in [canonical, *aliases]:
+            key = normalize_phrase(form)
+            if key:
+                index.setdefault(key, canonical)
+    return index
+
+_ALIAS_INDEX = _build_alias_index()
+_SKILL_FORMS: Dict[str, List[Tuple[str, ...]]] = {}
+for _form, _canonical in _ALIAS_INDEX.items():
+    _SKILL_FORMS.setdefault(_canonical, []).append(_form)
+_MAX_ALIAS_LEN = max(len(k) for k in _ALIAS_INDEX)
+
+@dataclass
+class Keyword:
+    phrase: str
+    forms: List[Tuple[str, ...]]
+    jd_freq: int = 0
+    critical: bool = False
+    is_skill: bool = False
+
+@dataclass
+class KeywordMatcher:
+    """
+    Precompiled phrase matcher: every stemmed form (canonical + aliases) maps to a keyword column,
+    so a document is counted in one pass over its tokens.
+    """
+    keywords: List[Keyword]
+    _lookup: Dict[Tuple[str, ...], int] = field(default_factory=dict, repr=False)
+    _max_len: int = 1
+    _counts: "OrderedDict[str, List[int]]" = field(default_factory=OrderedDict, repr=False, compare=False)
+    _counts_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    counted: int = field(default=0, compare=False)  # texts tokenized by count_sections (memo misses)
+
+    def __post_init__(self):
+        for col, kw in enumerate(self.keywords):
+            for form in kw.forms:
+                self._lookup.setdefault(form, col)
+                self._max_len = max(self._max_len, len(form))
+
+    def iter_hits(self, text: str) -> Iterable[int]:
+        toks = [stem(t) for t in tokenize(text)]
+        lookup, max_len = self._lookup, self._max_len
+        for i in range(len(toks)):
+            for n in range(1, max_len + 1):
+                if i + n > len(toks):
+                    break
+                col = lookup.get(tuple(toks[i : i + n]))
+                if col is not None:
+                    yield col
+
+    def count(self, text: str) -> List[int]:
+        counts = [0] * len(self.keywords)
+        for col in self.iter_hits(text):
+            counts[col] += 1
+        return counts
+
+    def _memo_count(self, text: str) -> List[int]:
+        with self._counts_lock:
+            hit = self._counts.get(text)
+            if hit is not None:
+                self._counts.move_to_end(text)
+                return hit
+        counts = self.count(text)
+        with self._counts_lock:
+            self.counted += 1
+            self._counts[text] = counts
+            while len(self._counts) > SECTION_COUNTS_SIZE:
+                self._counts.popitem(last=False)
+        return counts
+
+    def count_sections(self, sections: Iterable[str]) -> List[int]:
+        """
+        Summed counts over a document's sections, each distinct section text counted once
+        and memoized, so after an edit only the changed sections are re-tokenized.
+        """
+        total = [0] * len(self.keywords)
+        for text in sections:
+            for col, n in enumerate(self._memo_count(text)):
+                total[col] += n
+        return total
+
+    def density_matrix(self, texts: Sequence[str], sparse: bool = False):
+        """
+        N documents x M keywords count matrix built in one pass.
+        Hits are collected as flat (row, col) index arrays and reduced with a single bincount;
+        `sparse=True` returns a scipy CSR matrix when scipy is installed.
+        """
+        import numpy as np
+
+        rows: List[int] = []
+        cols: List[int] = []
+        for r, text in enumerate(texts):
+            hits = list(self.iter_hits(text))
+            cols.extend(hits)
+            rows.extend([r] * len(hits))
+        n, m = len(texts), len(self.keywords)
+        rows_a = np.asarray(rows, dtype=np.int64)
+        cols_a = np.asarray(cols, dtype=np.int64)
+        if sparse:
+            try:
+                from scipy.sparse import coo_matrix
+                data = np.ones(len(rows_a), dtype=np.int32)
+                return coo_matrix((data, (rows_a, cols_a)), shape=(n, m)).tocsr()
+            except ImportError:
+                pass
+        flat = np.bincount(rows_a * m + cols_a, minlength=n * m) if m else np.zeros(0, dtype=np.int64)
+        return flat.reshape(n, m)
+
+def _line_cue(line: str) -> Optional[bool]:
+    """
+    True = requirement wording, False = preferred/bonus wording, None = neither.
+    """
+    low = line.lower()
+    if any(c in low for c in _NICE_CUES):
+        return False
+    if any(c in low for c in _CRITICAL_CUES):
+        return True
+    return None
+
+def _is_content(token: str) -> bool:
+    return len(token) > 1 and token not in STOPWORDS and any(c.isalpha() for c in token)
+
+def extract_jd_keywords(jd_text: str, top_k: int = 40) -> List[Keyword]:
+    """
+    Keyphrases from a JD: known skills (with aliases) plus recurring 1-3 word phrases
+    between stopwords/punctuation. Anything seen outside a "preferred/bonus" context is critical.
+    """
+    skill_freq: Counter = Counter()
+    skill_critical: Dict[str, bool] = {}
+    gram_freq: Counter = Counter()
+    gram_surface: Dict[Tuple[str, ...], Counter] = {}
+    gram_critical: Dict[Tuple[str, ...], bool] = {}
+
+    context: Optional[bool] = None
+    for raw_line in (jd_text or "").splitlines():
+        cue = _line_cue(raw_line)
+        stripped = raw_line.strip()
+        # short cue lines ("Requirements:", "Nice to have") are headings for what follows
+        if cue is not None and len(stripped) < 60:
+            context = cue
+        elif stripped.endswith(":"):
+            context = None
+        is_critical = (cue if cue is not None else context) is not False
+
+        for chunk in _BOUNDARY_RE.split(raw_line.lower()):
+            toks = tokenize(chunk)
+            stems = [stem(t) for t in toks]
+
+            # known skills / aliases, longest match first
+            i = 0
+            while i < len(stems):
+                step = 1
+                for n in range(min(_MAX_ALIAS_LEN, len(stems) - i), 0, -1):
+                    canonical = _ALIAS_INDEX.get(tuple(stems[i : i + n]))
+                    if canonical:
+                        skill_freq[canonical] += 1
+                        skill_critical[canonical] = skill_critical.get(canonical, False) or is_critical
+                        step = n
+                        break
+                i += step
+
+            # candidate n-grams inside stopword-free runs
+            run: List[int] = []
+            for j, t in enumerate(toks + [""]):
+                if _is_content(t):
+                    run.append(j)
+                    continue
+                for a in range(len(run)):
+                    for n in range(1, min(3, len(run) - a) + 1):
+                        idx = run[a : a + n]
+                        key = tuple(stems[k] for k in idx)
+                        gram_freq[key] += 1
+                        gram_surface.setdefault(key, Counter())[" ".join(toks[k] for k in idx)] += 1
+                        gram_critical[key] = gram_critical.get(key, False) or is_critical
+                run = []
+
+    keywords: Dict[Tuple[str, ...], Keyword] = {}
+    for canonical, freq in skill_freq.items():
+        keywords[normalize_phrase(canonical)] = Keyword(
+            phrase=canonical, forms=_SKILL_FORMS[canonical], jd_freq=freq,
+            critical=skill_critical.get(canonical, True), is_skill=True,
+        )
+    covered = {f for kw in keywords.values() for f in kw.forms}
+
+    for key, freq in gram_freq.items():
+        if key in covered or key in _ALIAS_INDEX:
+            continue
+        if freq < 2:
+            continue
+        keywords[key] = Keyword(
+            phrase=gram_surface[key].most_common(1)[0][0],
+            forms=[key],
+            jd_freq=freq,
+            critical=gram_critical.get(key, True),
+        )
+
+    # drop grams that only ever appear inside a longer kept phrase
+    longer = [kw for kw in keywords.values() if len(kw.forms[0]) > 1]
+    for key in list(keywords):
+        kw = keywords[key]
+        if kw.is_skill:
+            continue
+        for other in longer:
+            if other is kw or other.jd_freq < kw.jd_freq:
+                continue
+            form = other.forms[0]
+            if len(form) > len(key) and any(form[i : i + len(key)] == key for i in range(len(form) - len(key) + 1)):
+                del keywords[key]
+                break
+
+    ranked = sorted(
+        keywords.values(),
+        key=lambda k: (not k.is_skill, not k.critical, -k.jd_freq, -len(k.forms[0]), k.phrase),
+    )
+    return ranked[:top_k]
+
+@lru_cache(maxsize=32)
+def jd_keyword_matcher(jd_text: str, top_k: int = 40) -> KeywordMatcher:
+    """
+    The JD's keywords and their matcher, built once per JD and shared by every caller
+    (single analyses, batch density matrices, per-section counts for incremental re-analysis):
+    a batch or library run scores many resumes against the same few JDs.
+    """
+    return KeywordMatcher(extract_jd_keywords(jd_text, top_k=top_k))
+
+def local_keyword_fields(resume_text: str, jd_text: str, top_k: int = 40) -> Dict[str, Any]:
+    """
+    Deterministic replacements for the keyword fields of the analysis JSON.
+    """
+    matcher = jd_keyword_matcher(jd_text, top_k)
+    return keyword_fields_from_counts(matcher.keywords, matcher.count(resume_text))
+
+def batch_keyword_fields(resume_texts: Sequence[str], jd_text: str, top_k: int = 40) -> List[Dict[str, Any]]:
+    """
+    local_keyword_fields for many resumes against one JD, counted as a single density matrix.
+    """
+    if not resume_texts:
+        return []
+    matcher = jd_keyword_matcher(jd_text, top_k)
+    matrix = matcher.density_matrix(resume_texts)
+    return [keyword_fields_from_counts(matcher.keywords, row.tolist()) for row in matrix]
+
+def keyword_fields_from_counts(keywords: List[Keyword], resume_counts: Sequence[int]) -> Dict[str, Any]:
+    """
+    The keyword fields for per-keyword resume counts (aligned with `keywords`).
+    """
+    matched, missing_critical, density = [], [], []
+    for kw, freq in zip(keywords, resume_counts):
+        if freq:
+            matched.append(kw.phrase)
+        elif kw.critical:
+            missing_critical.append(kw.phrase)
+        density.append({"keyword": kw.phrase, "resume_freq": freq, "jd_freq": kw.jd_freq})
+    density.sort(key=lambda r: (-r["jd_freq"], r["keyword"]))
+    return {
+        "matched_keywords": matched,
+        "missing_critical_keywords": missing_critical,
+        "keyword_density": density,
+    }
+
+def merge_keyword_fields(data: Dict[str, Any], fields: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Overlays locally computed keyword fields; the model's nice-to-have list is kept
+    but cleaned of anything already matched or flagged critical.
+    """
+    taken = {normalize_phrase(k) for k in fields["matched_keywords"] + fields["missing_critical_keywords"]}
+    nice = [
+        k for k in (data.get("missing_nice_to_have_keywords") or [])
+        if isinstance(k, str) and normalize_phrase(k) not in taken
+    ]
+    merged = dict(data)
+    merged.update(fields)
+    merged["missing_nice_to_have_keywords"] = nice
+    return merged
+
+def apply_local_keywords(data: Dict[str, Any], resume_text: str, jd_text: str, top_k: int = 40) -> Dict[str, Any]:
+    return merge_keyword_fields(data, local_keyword_fields(resume_text, jd_text, top_k=top_k))
@@ -1,41 +1,602 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
 from io import BytesIO
-from typing import Optional
-from pdfminer.high_level import extract_text as pdf_extract_text
-import docx2txt
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .tracing import span
+
+PDF_MAX_PAGES = 50
+PDF_TIMEOUT_SECONDS = 30.0
+PDF_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+CACHE_MAX_DOCUMENTS = 64
+STRUCTURE_CACHE_SIZE = 64
+# resume sections no stage sends to the model: nothing in an analysis, rewrite or answer depends on them
+UNSCORED_SECTIONS = ("interests", "references")
+
+@dataclass
+class ExtractedDocument:
+    text: str
+    pages: List[str] = field(default_factory=list)
+    page_seconds: List[float] = field(default_factory=list)
+    elapsed: float = 0.0
+    page_count: int = 0  # pages in the file, which may exceed len(pages) when capped
+    truncated: bool = False
+    timed_out: bool = False
+    page_errors: Dict[int, str] = field(default_factory=dict)  # 1-based page -> error; its text is ""
+    sha256: str = ""
+    from_cache: bool = False
+
+    @property
+    def slowest_page(self) -> Optional[Tuple[int, float]]:
+        if not self.page_seconds:
+            return None
+        i = max(range(len(self.page_seconds)), key=self.page_seconds.__getitem__)
+        return i + 1, self.page_seconds[i]
+
+# pdfminer / docx2txt are imported by the readers that need them: a TXT upload or a
+# Streamlit rerun never pays for them, and neither does starting a PDF worker process
+
+def _pdf_page_count(b: bytes) -> int:
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
 
-def _read_pdf_bytes(b: bytes) -> str:
     try:
         with BytesIO(b) as buff:
-            return pdf_extract_text(buff) or ""
+            doc = PDFDocument(PDFParser(buff))
+            return sum(1 for _ in PDFPage.create_pages(doc))
+    except Exception:
+        return 0
+
+def _extract_pdf_pages(b: bytes, page_numbers: List[int]) -> List[Tuple[int, str, float, str]]:
+    """
+    Runs in a worker process. Lays out one page at a time and keeps only its text,
+    so memory is bounded by the largest page rather than the whole document.
+    Returns (page, text, seconds, error) per page; a page that fails to lay out comes
+    back empty with its error and the rest of the chunk is still read.
+    """
+    from pdfminer.converter import PDFPageAggregator
+    from pdfminer.layout import LAParams, LTTextContainer
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+
+    out = []
+    wanted = set(page_numbers)
+    try:
+        with BytesIO(b) as buff:
+            resources = PDFResourceManager(caching=False)
+            device = PDFPageAggregator(resources, laparams=LAParams())
+            interpreter = PDFPageInterpreter(resources, device)
+            for page_no, page in enumerate(PDFPage.create_pages(PDFDocument(PDFParser(buff)))):
+                if page_no not in wanted:
+                    continue
+                started = time.perf_counter()
+                try:
+                    interpreter.process_page(page)
+                    text = "".join(el.get_text() for el in device.get_result() if isinstance(el, LTTextContainer))
+                    error = ""
+                except Exception as e:
+                    text, error = "", f"{type(e).__name__}: {e}"
+                out.append((page_no, text, time.perf_counter() - started, error))
+                del page
+                if len(out) == len(wanted):
+                    break
+    except Exception as e:
+        # the document itself could not be walked any further
+        error = f"{type(e).__name__}: {e}"
+        done = {r[0] for r in out}
+        out.extend((page_no, "", 0.0, error) for page_no in sorted(wanted - done))
+    return out
+
+class _WorkerPool:
+    """
+    A spawn process pool plus the number of extractions currently using it.
+    """
+
+    def __init__(self, workers: int):
+        # spawn: forking a multi-threaded Streamlit server is unsafe
+        self.pool = multiprocessing.get_context("spawn").Pool(processes=workers)
+        self.users = 0
+        self.retired = False
+
+_pool: Optional[_WorkerPool] = None
+_pool_lock = threading.Lock()
+
+def _acquire_pool(workers: int) -> _WorkerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _WorkerPool(workers)
+        _pool.users += 1
+        return _pool
+
+def _release_pool(wp: _WorkerPool, stuck: bool = False) -> None:
+    """
+    The only way to stop a runaway pdfminer call is to kill its process. A pool holding one
+    is retired instead of killed right away: new extractions get a fresh pool, the ones
+    already running on the old pool finish there, and the last of them terminates it.
+    """
+    global _pool
+    with _pool_lock:
+        wp.users -= 1
+        if stuck and not wp.retired:
+            wp.retired = True
+            if _pool is wp:
+                _pool = None
+        terminate = wp.retired and wp.users == 0
+    if terminate:
+        wp.pool.terminate()
+
+def _read_pdf_document(b: bytes, max_pages: int, timeout: float, workers: int) -> ExtractedDocument:
+    doc = ExtractedDocument(text="")
+    deadline = time.monotonic() + timeout
+    if workers <= 0:
+        doc.page_count = _pdf_page_count(b)
+        wanted = list(range(min(doc.page_count, max_pages)))
+        results = _extract_pdf_pages(b, wanted)
+    else:
+        wp = _acquire_pool(workers)
+        stuck = False
+        try:
+            doc.page_count = wp.pool.apply_async(_pdf_page_count, (b,)).get(timeout=timeout)
+            wanted = list(range(min(doc.page_count, max_pages)))
+            size = max(1, -(-len(wanted) // workers))
+            chunks = [wanted[i : i + size] for i in range(0, len(wanted), size)]
+            pending = [wp.pool.apply_async(_extract_pdf_pages, (b, chunk)) for chunk in chunks]
+            results = []
+            for p in pending:
+                results.extend(p.get(timeout=max(0.0, deadline - time.monotonic())))
+        except multiprocessing.TimeoutError:
+            doc.timed_out = True
+            results = []
+            stuck = True
+        finally:
+            _release_pool(wp, stuck)
+    results.sort()
+    doc.pages = [text for _, text, _, _ in results]
+    doc.page_seconds = [secs for _, _, secs, _ in results]
+    doc.page_errors = {page_no + 1: error for page_no, _, _, error in results if error}
+    doc.truncated = doc.page_count > max_pages
+    doc.text = "\f".join(doc.pages)
+    return doc
+
+def _read_pdf_bytes(b: bytes) -> str:
+    try:
+        return _read_pdf_document(b, PDF_MAX_PAGES, PDF_TIMEOUT_SECONDS, PDF_WORKERS).text
     except Exception:
         return ""
 
 def _read_docx_bytes(b: bytes) -> str:
+    import docx2txt
+
     try:
         with BytesIO(b) as buff:
             return docx2txt.process(buff) or ""
     except Exception:
         return ""
 
-def extract_text_from_upload(uploaded_file) -> str:
+def _decode_text(data: bytes) -> str:
+    try:
+        return data.decode("utf-8", errors="ignore")
+    except Exception:
+        return data.decode("latin-1", errors="ignore")
+
+_cache: "OrderedDict[str, ExtractedDocument]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def clear_extraction_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+def extract_document(
+    filename: str,
+    data: bytes,
+    max_pages: int = PDF_MAX_PAGES,
+    timeout: float = PDF_TIMEOUT_SECONDS,
+    workers: int = PDF_WORKERS,
+) -> ExtractedDocument:
     """
-    Accepts Streamlit UploadedFile (pdf/docx/txt).
-    Tries robust extraction and returns plain text.
+    Extracts text plus per-page text/timings. Results are cached by content hash, so
+    Streamlit reruns with the same upload skip pdfminer entirely.
+    PDFs are parsed page by page in a process pool (`workers=0` parses in-process),
+    stopping at `max_pages` and giving up after `timeout` seconds.
     """
-    filename = (uploaded_file.name or "").lower()
-    data = uploaded_file.read()
+    with span("extract", file_type=(filename or "").rsplit(".", 1)[-1].lower()) as sp:
+        doc = _extract_document(filename, data, max_pages, timeout, workers)
+        if sp is not None:
+            sp.attrs.update(cached=doc.from_cache, pages=len(doc.pages), timed_out=doc.timed_out,
+                            page_errors=len(doc.page_errors))
+    return doc
+
+def _extract_document(filename: str, data: bytes, max_pages: int, timeout: float, workers: int) -> ExtractedDocument:
+    filename = (filename or "").lower()
+    digest = hashlib.sha256(data).hexdigest()
+    key = f"{digest}:{filename.rsplit('.', 1)[-1]}:{max_pages}"
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return ExtractedDocument(**{**hit.__dict__, "from_cache": True})
+
+    started = time.perf_counter()
     if filename.endswith(".pdf"):
-        return _read_pdf_bytes(data)
-    elif filename.endswith(".docx"):
-        return _read_docx_bytes(data)
-    elif filename.endswith(".txt") or filename.endswith(".md"):
         try:
-            return data.decode("utf-8", errors="ignore")
+            doc = _read_pdf_document(data, max_pages, timeout, workers)
         except Exception:
-            return data.decode("latin-1", errors="ignore")
+            doc = ExtractedDocument(text="")
+    elif filename.endswith(".docx"):
+        text = _read_docx_bytes(data)
+        doc = ExtractedDocument(text=text, pages=[text], page_count=1)
     else:
-        # last resort: try utf-8 decode
-        try:
-            return data.decode("utf-8", errors="ignore")
-        except Exception:
-            return ""
+        # .txt/.md, and as a last resort anything else
+        text = _decode_text(data)
+        doc = ExtractedDocument(text=text, pages=[text], page_count=1)
+    doc.elapsed = time.perf_counter() - started
+    doc.sha256 = digest
+
+    # timeouts are not cached so a retry gets a fresh chance
+    if not doc.timed_out:
+        with _cache_lock:
+            _cache[key] = doc
+            while len(_cache) > CACHE_MAX_DOCUMENTS:
+                _cache.popitem(last=False)
+    return doc
+
+def extract_text_from_upload(uploaded_file) -> str:
+    """
+    Accepts Streamlit UploadedFile (pdf/docx/txt).
+    Tries robust extraction and returns plain text.
+    """
+    return extract_document_from_upload(uploaded_file).text
+
+def extract_document_from_upload(uploaded_file, **kwargs) -> ExtractedDocument:
+    # getvalue() is rerun-safe; read() returns b"" once the buffer was consumed
+    data = uploaded_file.getvalue() if hasattr(uploaded_file, "getvalue") else uploaded_file.read()
+    return extract_document(uploaded_file.name or "", data, **kwargs)
+
+def extract_text_from_bytes(filename: str, data: bytes) -> str:
+    """
+    Same as extract_text_from_upload, for raw bytes (batch jobs, zip members, CLI).
+    """
+    return extract_document(filename, data).text
+
+# --------------------------- Lines and sections ---------------------------
+# Line cleaning and heading detection shared by the structured resume, compaction and retrieval.
+
+# checked in order, so the more specific kinds ("preferred qualifications") come first
+HEADING_ALIASES = {
+    "preferred": ("preferred", "nice to have", "bonus", "bonus points", "pluses"),
+    "role": ("about the role", "overview", "position summary", "job summary"),
+    "company": ("about us", "about the company", "who we are", "our mission", "company overview"),
+    "benefits": ("benefits", "perks", "what we offer", "compensation", "salary range", "pay range"),
+    "eeo": ("equal opportunity", "eeo", "diversity", "eeo statement"),
+    "requirements": ("requirements", "qualifications", "what you bring", "what we're looking for",
+                     "what we are looking for", "must have", "must haves", "you have", "who you are"),
+    "responsibilities": ("responsibilities", "what you'll do", "what you will do", "the role", "duties",
+                         "day to day", "your impact"),
+    "experience": ("experience", "employment", "work history", "professional background", "career history"),
+    "skills": ("skills", "technical skills", "core competencies", "technologies", "tech stack", "toolkit"),
+    "summary": ("summary", "profile", "objective", "about me"),
+    "projects": ("projects", "selected projects"),
+    "certifications": ("certifications", "certificates", "licenses"),
+    "education": ("education", "academic background"),
+    "publications": ("publications", "papers", "patents"),
+    "awards": ("awards", "honors", "achievements"),
+    "volunteer": ("volunteer", "volunteering", "community involvement"),
+    "interests": ("interests", "hobbies"),
+    "references": ("references",),
+}
+
+
+_PAGE_ARTIFACT_RE = re.compile(
+    r"^\s*(page\s*\d+(\s*(of|/)\s*\d+)?|\d+\s*(of|/)\s*\d+|-+\s*\d+\s*-+|\d{1,3})\s*$",
+    re.IGNORECASE,
+)
+
+
+def clean_lines(text: str) -> List[str]:
+    """
+    Normalizes whitespace, drops PDF page artifacts (page numbers, form feeds) and
+    repeated lines such as running headers/footers, keeping the first occurrence.
+    """
+    return [ln for _, _, ln in clean_line_spans(text)]
+
+def clean_line_spans(text: str) -> List[Tuple[int, int, str]]:
+    """
+    clean_lines() with each kept line's (start, end) character offsets into `text`.
+    Blank separators are ("", at the offset of the blank line).
+    """
+    text = text or ""
+    raw: List[Tuple[int, int, str]] = []
+    pos = 0
+    # splitlines() also breaks on form feeds, so PDF page boundaries end a line
+    for ln in text.splitlines(keepends=True):
+        body = ln.splitlines()[0]
+        raw.append((pos, pos + len(body), re.sub(r"[ \t\u00a0]+", " ", body).strip()))
+        pos += len(ln)
+    counts = Counter(ln.lower() for _, _, ln in raw if ln)
+    seen = set()
+    out: List[Tuple[int, int, str]] = []
+    for start, end, ln in raw:
+        if not ln:
+            if out and out[-1][2]:
+                out.append((start, start, ""))
+            continue
+        low = ln.lower()
+        if _PAGE_ARTIFACT_RE.match(ln):
+            continue
+        if low in seen and (counts[low] > 2 or len(ln) > 20):
+            continue
+        seen.add(low)
+        out.append((start, end, ln))
+    while out and not out[-1][2]:
+        out.pop()
+    return out
+
+def heading_kind(line: str) -> Optional[str]:
+    """
+    A heading is a short line that is an alias, optionally with a couple of qualifier
+    words ("Professional Experience", "Minimum Qualifications").
+    """
+    stripped = line.strip().strip("#*:-—=| ").lower()
+    if not stripped or len(stripped) > 40 or "," in stripped or stripped.endswith("."):
+        return None
+    words = stripped.split()
+    for kind, aliases in HEADING_ALIASES.items():
+        for a in aliases:
+            n = len(a.split())
+            if len(words) <= n + 2 and (stripped == a or f" {a} " in f" {stripped} "):
+                return kind
+    return None
+
+@dataclass
+class Section:
+    kind: str
+    lines: List[str]
+
+def split_sections(lines: List[str]) -> List[Section]:
+    sections = [Section("preamble", [])]
+    for ln in lines:
+        kind = heading_kind(ln)
+        if kind is not None:
+            sections.append(Section(kind, [ln]))
+        else:
+            sections[-1].lines.append(ln)
+    return [s for s in sections if any(s.lines)]
+
+# --------------------------- Structured resume ---------------------------
+# Built once per resume text (get_structured_resume) and shared by compaction, retrieval,
+# incremental re-analysis and the local heuristics. Records hold character offsets into
+# the original text rather than copies of it.
+
+_BULLET_RE = re.compile(r"\s*(?:[-•*·●▪◦‣–—>]|\(cid:\d+\)|\d{1,2}[.)])\s+")
+_QUANTITY_RE = re.compile(
+    r"(?P<money>[$€£]\s?\d[\d,.]*(?:\s?(?:[kmb]n?|million|billion)\b)?)"
+    r"|(?P<percent>\d[\d,.]*\s?(?:%|percent\b|pct\b))"
+    r"|(?P<multiplier>\b\d+(?:\.\d+)?\s?x\b)"
+    r"|(?P<number>\b\d[\d,.]*(?:\s?(?:[km]|million|billion)\b)?\+?)",
+    re.IGNORECASE,
+)
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH}\s+)?(?<![\d-])(?:19|20)\d{{2}}(?!\d)|\b\d{{1,2}}/(?:19|20)\d{{2}}(?!\d)"
+_DATE_RANGE_RE = re.compile(
+    rf"(?P<start>{_DATE})(?:\s*(?:-|–|—|to)\s*(?P<end>{_DATE}|present|current|now))?",
+    re.IGNORECASE,
+)
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE_RE = re.compile(r"(?:\+?\d{1,3}[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}")
+_LINK_RE = re.compile(r"(?:https?://|www\.)\S+|\b(?:linkedin\.com|github\.com)/\S+", re.IGNORECASE)
+# text that survives PDF extraction of tables, multi-column layouts and custom fonts;
+# a couple of pipes ("email | phone | link") is an ordinary separator, not a table
+_ARTIFACT_RES = {
+    "table": re.compile(r"[│┃┆┊┌┐└┘├┤┬┴┼─━]|\|(?:[^|\n]*\|){2}|\t[^\n]*\t|\S {4,}\S[^\n]* {4,}\S"),
+    "encoding": re.compile(r"\(cid:\d+\)|\ufffd|[\ue000-\uf8ff]"),
+}
+_CONTACT_LINES = 8
+
+@dataclass(slots=True, frozen=True)
+class Quantity:
+    start: int
+    end: int
+    kind: str   # "money" | "percent" | "multiplier" | "number"
+
+@dataclass(slots=True, frozen=True)
+class DateRange:
+    start: int
+    end: int
+    section: str
+    current: bool = False  # "... - Present"
+
+@dataclass(slots=True, frozen=True)
+class Bullet:
+    start: int
+    end: int
+    section: str
+    quantities: Tuple[Quantity, ...] = ()
+    marked: bool = True  # False when inferred from layout (no bullet glyph)
+
+    @property
+    def quantified(self) -> bool:
+        return bool(self.quantities)
+
+@dataclass(slots=True, frozen=True)
+class Artifact:
+    start: int
+    end: int
+    kind: str   # "table" | "encoding"
+
+@dataclass(slots=True, frozen=True)
+class ContactBlock:
+    start: int
+    end: int
+    email: str = ""
+    phone: str = ""
+    links: Tuple[str, ...] = ()
+
+@dataclass(slots=True, frozen=True)
+class ResumeSection:
+    kind: str
+    start: int
+    end: int
+    heading: str = ""
+    lines: Tuple[Tuple[int, int, str], ...] = ()  # cleaned lines: (start, end, normalized text)
+
+@dataclass(slots=True)
+class StructuredResume:
+    text: str
+    sections: Tuple[ResumeSection, ...] = ()
+    bullets: Tuple[Bullet, ...] = ()
+    dates: Tuple[DateRange, ...] = ()
+    quantities: Tuple[Quantity, ...] = ()
+    artifacts: Tuple[Artifact, ...] = ()
+    contact: Optional[ContactBlock] = None
+
+    def text_of(self, record) -> str:
+        return self.text[record.start:record.end]
+
+    def section(self, kind: str) -> Optional[ResumeSection]:
+        return next((s for s in self.sections if s.kind == kind), None)
+
+    @property
+    def kinds(self) -> List[str]:
+        return [s.kind for s in self.sections]
+
+    def _selected(self, kinds: Optional[Iterable[str]], exclude: Iterable[str]) -> List[ResumeSection]:
+        wanted = None if kinds is None else set(kinds)
+        skipped = set(exclude)
+        return [s for s in self.sections if (wanted is None or s.kind in wanted) and s.kind not in skipped]
+
+    def as_sections(self, kinds: Optional[Iterable[str]] = None, exclude: Iterable[str] = ()) -> List[Section]:
+        """
+        The cleaned lines per section, in the shape compaction and retrieval work on;
+        `kinds` / `exclude` select sections as in select().
+        """
+        return [Section(s.kind, [ln for _, _, ln in s.lines]) for s in self._selected(kinds, exclude)]
+
+    def select(self, kinds: Optional[Iterable[str]] = None, exclude: Iterable[str] = ()) -> str:
+        """
+        Original text of the sections of the given kinds (all by default) minus `exclude`,
+        in document order.
+        """
+        return "\n\n".join(self.text_of(s).strip() for s in self._selected(kinds, exclude))
+
+def _find_quantities(text: str, start: int, end: int, dates: List[DateRange]) -> Tuple[Quantity, ...]:
+    marker = _BULLET_RE.match(text, start, end)
+    if marker:
+        start = marker.end()  # "1." numbering is not a result
+    return tuple(
+        Quantity(m.start(), m.end(), m.lastgroup)
+        for m in _QUANTITY_RE.finditer(text, start, end)
+        # "2021", "03/2020" are dates, not results
+        if not any(d.start <= m.start() < d.end for d in dates)
+    )
+
+def _find_contact(text: str, spans: List[Tuple[int, int, str]]) -> Optional[ContactBlock]:
+    email = phone = ""
+    links: List[str] = []
+    first = last = None
+    for start, end, ln in [sp for sp in spans if sp[2]][:_CONTACT_LINES]:
+        hit = False
+        if not email and (m := _EMAIL_RE.search(ln)):
+            email, hit = m.group(), True
+        if not phone and (m := _PHONE_RE.search(ln)):
+            phone, hit = m.group(), True
+        for m in _LINK_RE.finditer(ln):
+            links.append(m.group().rstrip(".,;)"))
+            hit = True
+        if hit:
+            first = start if first is None else first
+            last = end
+    if first is None:
+        return None
+    return ContactBlock(first, last, email, phone, tuple(links))
+
+def structure_resume(text: str) -> StructuredResume:
+    """
+    Parses resume text into sections (by heading), bullets with their quantities, date
+    ranges, the contact block and extraction artifacts, all as offsets into `text`.
+    """
+    text = text or ""
+    spans = clean_line_spans(text)
+
+    grouped: List[Tuple[str, List[Tuple[int, int, str]]]] = [("preamble", [])]
+    for sp in spans:
+        kind = heading_kind(sp[2]) if sp[2] else None
+        if kind is not None:
+            grouped.append((kind, [sp]))
+        else:
+            grouped[-1][1].append(sp)
+    sections = []
+    for kind, lines in grouped:
+        content = [sp for sp in lines if sp[2]]
+        if not content:
+            continue
+        heading = content[0][2] if kind != "preamble" else ""
+        sections.append(ResumeSection(kind, content[0][0], content[-1][1], heading, tuple(lines)))
+
+    bullets: List[Bullet] = []
+    dates: List[DateRange] = []
+    quantities: List[Quantity] = []
+    for sec in sections:
+        marked_any = any(_BULLET_RE.match(text, a, b) for a, b, ln in sec.lines if ln)
+        for a, b, ln in sec.lines:
+            if not ln or ln == sec.heading:
+                continue
+            line_dates = [
+                DateRange(m.start(), m.end(), sec.kind, (m.group("end") or "").lower() in ("present", "current", "now"))
+                for m in _DATE_RANGE_RE.finditer(text, a, b)
+            ]
+            dates.extend(line_dates)
+            found = _find_quantities(text, a, b, line_dates)
+            quantities.extend(found)
+            marked = bool(_BULLET_RE.match(text, a, b))
+            # without any bullet glyphs (common after PDF extraction), long undated lines
+            # in experience-like sections are read as bullets
+            inferred = (not marked_any and sec.kind in ("experience", "projects")
+                        and not line_dates and len(ln) >= 40)
+            if marked or inferred:
+                bullets.append(Bullet(a, b, sec.kind, found, marked))
+
+    artifacts = [
+        Artifact(a, b, kind)
+        for a, b, ln in spans if ln
+        for kind, rx in _ARTIFACT_RES.items() if rx.search(text, a, b)
+    ]
+    return StructuredResume(
+        text=text,
+        sections=tuple(sections),
+        bullets=tuple(bullets),
+        dates=tuple(dates),
+        quantities=tuple(quantities),
+        artifacts=tuple(artifacts),
+        contact=_find_contact(text, spans),
+    )
+
+_structures: "OrderedDict[str, StructuredResume]" = OrderedDict()
+_structures_lock = threading.Lock()
+
+def get_structured_resume(text: str) -> StructuredResume:
+    """
+    structure_resume() memoized by content, so every stage of one upload shares a single parse.
+    """
+    key = hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+    with _structures_lock:
+        hit = _structures.get(key)
+        if hit is not None:
+            _structures.move_to_end(key)
+            return hit
+    with span("structure"):
+        doc = structure_resume(text)
+    with _structures_lock:
+        _structures[key] = doc
+        while len(_structures) > STRUCTURE_CACHE_SIZE:
+            _structures.popitem(last=False)
+    return doc
@@ -1,3 +1,12 @@
+# Bump whenever ANALYSIS_SYSTEM / ANALYSIS_CONTEXT_TEMPLATE / ANALYSIS_USER_TEMPLATE /
+# ANALYSIS_JSON_SCHEMA change, so cached analyses produced by older prompts are not reused.
+# matched/missing-critical keywords and keyword_density are computed locally (see keywords.py).
+# 2024.3: JD-first layout (system, schema + JD, then the resume) for provider prefix caching.
+# 2024.4: interests/references sections are no longer sent (parsing.UNSCORED_SECTIONS).
+# 2024.5: FormattingATS / ImpactQuantification left out of the schema; they are computed locally
+# (heuristics.py) and would be overwritten anyway.
+PROMPT_VERSION = "2024.5"
+
 ANALYSIS_SYSTEM = """You are ATS-ChatGPT, a brutally honest, detail-oriented resume evaluator.
 Your job: compare a candidate's resume to a given Job Description (JD), detect gaps, and propose improvements.
 You MUST return STRICT JSON matching the schema, with no extra commentary.
@@ -11,16 +20,20 @@ Be unique: provide concrete rewrites (with quantified placeholders if needed), n
 Keep the tone constructive.
 """
 
-ANALYSIS_USER_TEMPLATE = """Resume (plain text):
---------------------
-{resume}
+# Layout: everything that is the same for every resume screened against one JD comes first and
+# is byte-for-byte stable (no timestamps, ids or per-candidate text), so the provider's prompt
+# cache can reuse it; the resume is the last message. Keep it that way when editing.
+ANALYSIS_CONTEXT_TEMPLATE = """Output JSON with this exact schema (no additional keys):
+{schema}
 
 Job Description:
 ----------------
 {jd}
+"""
 
-Output JSON with this exact schema (no additional keys):
-{schema}
+ANALYSIS_USER_TEMPLATE = """Resume (plain text):
+--------------------
+{resume}
 """
 
 ANALYSIS_JSON_SCHEMA = r"""
@@ -32,16 +45,9 @@ ANALYSIS_JSON_SCHEMA = r"""
     "SkillsMatch": 0-100,
     "KeywordsMatch": 0-100,
     "Education": 0-100,
-    "FormattingATS": 0-100,
-    "ClarityReadability": 0-100,
-    "ImpactQuantification": 0-100
+    "ClarityReadability": 0-100
   },
-  "matched_keywords": ["string", "..."],
-  "missing_critical_keywords": ["string", "..."],
   "missing_nice_to_have_keywords": ["string", "..."],
-  "keyword_density": [
-    {"keyword": "string", "resume_freq": int, "jd_freq": int}
-  ],
   "hard_requirements": {
     "met": true/false,
     "details": ["string explanation of each check and pass/fail"]
@@ -61,6 +67,83 @@ ANALYSIS_JSON_SCHEMA = r"""
 }
 """
 
+# Decomposed mode (analyzer.analyze_resume_against_jd(decomposed=True)): each part is requested
+# concurrently with the same system prompt and template, and the results are merged into the
+# shape of ANALYSIS_JSON_SCHEMA. Keep the fields here in sync with it.
+ANALYSIS_PART_SCHEMAS = {
+    "scores": r"""
+{
+  "role_title_inferred": "string",
+  "ats_score_overall": 0-100 integer,
+  "section_scores": {
+    "ExperienceMatch": 0-100,
+    "SkillsMatch": 0-100,
+    "KeywordsMatch": 0-100,
+    "Education": 0-100,
+    "ClarityReadability": 0-100
+  }
+}
+""",
+    "requirements": r"""
+{
+  "hard_requirements": {
+    "met": true/false,
+    "details": ["string explanation of each check and pass/fail"]
+  },
+  "red_flags": ["string", "..."],
+  "missing_nice_to_have_keywords": ["string", "..."]
+}
+""",
+    "recommendations": r"""
+{
+  "recommendations": [
+    {
+      "area": "string (e.g., Skills, Formatting, Bullets, Summary)",
+      "severity": "low|med|high",
+      "suggestion": "specific steps to improve",
+      "example_rewrite": "a concrete example rewrite (1-3 lines)"
+    }
+  ]
+}
+""",
+    "tailored": r"""
+{
+  "tailored_summary": "2-3 line professional summary tailored to JD",
+  "tailored_bullets": ["max 5 powerful bullet suggestions"],
+  "top_action_verbs": ["Drive", "Optimize", "Scale"]
+}
+""",
+}
+
+ANALYSIS_PART_FIELDS = {
+    "scores": ("role_title_inferred", "ats_score_overall", "section_scores"),
+    "requirements": ("hard_requirements", "red_flags", "missing_nice_to_have_keywords"),
+    "recommendations": ("recommendations",),
+    "tailored": ("tailored_summary", "tailored_bullets", "top_action_verbs"),
+}
+
+# appended after the analysis messages when only some fields need regenerating (see schema.py)
+ANALYSIS_REPAIR_NOTE = """A previous answer was missing these fields or had invalid values for them.
+Return ONLY the fields in the schema above, complete and valid."""
+
+# incremental re-analysis (see incremental.py): only the edited resume sections are sent, with the
+# previous analysis as context, and the returned fields are merged over the previous analysis.
+INCREMENTAL_PREVIOUS_TEMPLATE = """Previous analysis of this candidate's resume against the same job description:
+{previous}"""
+
+INCREMENTAL_USER_TEMPLATE = """The candidate has since edited their resume. Only the sections below changed;
+everything else is identical to what the previous analysis saw.
+
+{changes}
+
+Job Description:
+----------------
+{jd}
+
+Update the analysis for these edits. Output JSON with this exact schema (no additional keys):
+{schema}
+"""
+
 FOLLOWUP_SYSTEM = """You are ATS-ChatGPT in follow-up mode.
 Use the prior analysis JSON + provided resume/JD to answer user questions concretely and concisely.
 Focus on specific, actionable guidance aligned to the JD. Avoid generic tips."""
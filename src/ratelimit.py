@@ -0,0 +1,291 @@
+import heapq
+import itertools
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+# lower runs first; requests of equal priority are served in arrival order
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+# OpenAI usage-tier-1 limits; set ATS_LLM_RPM / ATS_LLM_TPM (per model) for higher tiers
+@dataclass(frozen=True)
+class ModelLimits:
+    rpm: int
+    tpm: int
+
+DEFAULT_LIMITS = {
+    "gpt-4o-mini": ModelLimits(500, 200_000),
+    "gpt-4o": ModelLimits(500, 30_000),
+    "gpt-4.1-mini": ModelLimits(500, 200_000),
+    "gpt-4.1": ModelLimits(500, 30_000),
+}
+FALLBACK_LIMITS = ModelLimits(500, 30_000)
+
+HEADROOM = 0.9                  # schedule up to this share of the account limit
+COMPLETION_ESTIMATE = 800       # output tokens assumed when a request sets no max_tokens
+MESSAGE_OVERHEAD_TOKENS = 4     # role/separator tokens per chat message
+WAIT_SAMPLES = 512              # recent waits kept per model for percentiles
+
+_priority: ContextVar[int] = ContextVar("ats_llm_priority", default=INTERACTIVE)
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """
+    LLM calls made inside this block (in this thread/context) are scheduled at `priority`.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def current_priority() -> int:
+    return _priority.get()
+
+_SNAPSHOT_RE = re.compile(r"-\d{4}-\d{2}-\d{2}$")
+
+# an override is one number for every model, or per model: {"gpt-4o": 5000, "*": 500}
+Override = Union[int, Mapping[str, int]]
+
+def _for_model(table: Mapping[str, Any], model: str, default: Any = None) -> Any:
+    # dated snapshots ("gpt-4o-mini-2024-07-18") share their base model's limits; a plain
+    # prefix would also give "gpt-4o-mini" the limits set for "gpt-4o"
+    for name in (model, _SNAPSHOT_RE.sub("", model)):
+        if name in table:
+            return table[name]
+    return table.get("*", default)
+
+def parse_limits(value: str) -> Dict[str, int]:
+    """
+    ATS_LLM_RPM / ATS_LLM_TPM: "gpt-4o=5000,gpt-4o-mini=30000" sets single models and a bare
+    number ("10000", or "10000,gpt-4o=5000") every other one. Empty means the defaults.
+    """
+    out: Dict[str, int] = {}
+    for item in (value or "").split(","):
+        model, sep, n = item.strip().rpartition("=")
+        if n.strip():
+            out[model.strip() if sep else "*"] = int(n)
+    return out
+
+def limits_for(model: str, rpm: Override = 0, tpm: Override = 0) -> ModelLimits:
+    base = _for_model(DEFAULT_LIMITS, model, FALLBACK_LIMITS)
+    rpm = _for_model(rpm, model, 0) if isinstance(rpm, Mapping) else rpm
+    tpm = _for_model(tpm, model, 0) if isinstance(tpm, Mapping) else tpm
+    return ModelLimits(rpm or base.rpm, tpm or base.tpm)
+
+def estimate_tokens(kwargs: Dict[str, Any]) -> int:
+    """
+    What a chat.completions request counts against TPM before it is sent: prompt tokens
+    plus max_tokens (or COMPLETION_ESTIMATE when unset).
+    """
+    from .compaction import count_tokens
+
+    model = kwargs.get("model") or "gpt-4o-mini"
+    prompt = 3
+    for m in kwargs.get("messages") or []:
+        content = m.get("content") if isinstance(m, dict) else getattr(m, "content", "")
+        prompt += MESSAGE_OVERHEAD_TOKENS + count_tokens(content if isinstance(content, str) else str(content or ""), model)
+    completion = kwargs.get("max_completion_tokens") or kwargs.get("max_tokens") or COMPLETION_ESTIMATE
+    return prompt + int(completion)
+
+class TokenBucket:
+    """
+    Continuously refilling bucket: `per_minute` units per minute, holding at most one
+    minute's worth. The level may go negative when actual usage exceeds an estimate.
+    """
+
+    def __init__(self, per_minute: float, now: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self._updated = time.monotonic() if now is None else now
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount: float) -> float:
+        missing = amount - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+@dataclass
+class RateStats:
+    granted: int = 0
+    delayed: int = 0                 # requests that had to wait at all
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    tokens_estimated: int = 0
+    tokens_used: int = 0             # from response usage, when reported
+    tokens_refunded: int = 0         # estimates given back by requests that failed
+    throttled: int = 0               # 429s seen despite scheduling
+    recent_waits: Deque[float] = field(default_factory=lambda: deque(maxlen=WAIT_SAMPLES), repr=False)
+
+class _ModelState:
+    def __init__(self, limits: ModelLimits, headroom: float):
+        self.limits = limits
+        self.requests = TokenBucket(limits.rpm * headroom)
+        self.tokens = TokenBucket(limits.tpm * headroom)
+        self.paused_until = 0.0
+        self.waiters: List[Tuple[int, int]] = []
+        self.depth: Dict[int, int] = {}
+        self.stats = RateStats()
+
+    def delay(self, now: float, tokens: int) -> float:
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return max(self.paused_until - now, self.requests.time_until(1), self.tokens.time_until(tokens))
+
+class RateLimiter:
+    """
+    Shared RPM/TPM scheduler for one account. Callers block in acquire() until both of
+    the model's buckets can cover the request; waiting requests are granted strictly by
+    priority (interactive before batch), then arrival order. After a response, reconcile()
+    swaps the estimate for the real usage, release() returns it when the request failed, and
+    throttled() pauses the model for everyone when the server still answers 429.
+    `rpm` / `tpm` override the defaults for every model (a number) or per model (a mapping).
+    """
+
+    def __init__(self, rpm: Override = 0, tpm: Override = 0, headroom: float = HEADROOM):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.headroom = headroom
+        self._cond = threading.Condition()
+        self._models: Dict[str, _ModelState] = {}
+        self._seq = itertools.count()
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            state = _ModelState(limits_for(model, self.rpm, self.tpm), self.headroom)
+            self._models[model] = state
+        return state
+
+    def acquire(self, model: str, tokens: int, priority: Optional[int] = None) -> float:
+        """
+        Blocks until the request may be sent; returns the seconds spent waiting.
+        """
+        priority = current_priority() if priority is None else priority
+        started = time.monotonic()
+        with self._cond:
+            state = self._state(model)
+            # a request larger than the bucket would never fit; let it drain the bucket instead
+            tokens = int(min(tokens, state.tokens.capacity))
+            entry = (priority, next(self._seq))
+            heapq.heappush(state.waiters, entry)
+            state.depth[priority] = state.depth.get(priority, 0) + 1
+            self._cond.notify_all()  # a new head may have arrived
+            try:
+                while True:
+                    timeout = None
+                    if state.waiters[0] == entry:
+                        timeout = state.delay(time.monotonic(), tokens)
+                        if timeout <= 0:
+                            state.requests.level -= 1
+                            state.tokens.level -= tokens
+                            break
+                    self._cond.wait(timeout)
+            finally:
+                state.waiters.remove(entry)
+                heapq.heapify(state.waiters)
+                state.depth[priority] -= 1
+                self._cond.notify_all()
+            waited = time.monotonic() - started
+            st = state.stats
+            st.granted += 1
+            st.tokens_estimated += tokens
+            st.wait_seconds += waited
+            st.max_wait_seconds = max(st.max_wait_seconds, waited)
+            st.recent_waits.append(waited)
+            if waited > 0.001:
+                st.delayed += 1
+        return waited
+
+    def reconcile(self, model: str, estimated: int, used: int) -> None:
+        """
+        Corrects the token bucket once the real usage of a granted request is known.
+        """
+        with self._cond:
+            state = self._state(model)
+            state.tokens.level = min(state.tokens.capacity, state.tokens.level + estimated - used)
+            state.stats.tokens_used += used
+            self._cond.notify_all()
+
+    def release(self, model: str, estimated: int) -> None:
+        """
+        A granted request failed before using its tokens: gives the estimate back.
+        """
+        with self._cond:
+            state = self._state(model)
+            estimated = int(min(estimated, state.tokens.capacity))  # what acquire() deducted
+            state.tokens.level = min(state.tokens.capacity, state.tokens.level + estimated)
+            state.stats.tokens_refunded += estimated
+            self._cond.notify_all()
+
+    def throttled(self, model: str, seconds: float) -> None:
+        """
+        The server rejected a request: hold every caller of this model for `seconds`.
+        """
+        with self._cond:
+            state = self._state(model)
+            state.paused_until = max(state.paused_until, time.monotonic() + seconds)
+            state.stats.throttled += 1
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-model queue depth, limits and wait-time metrics.
+        """
+        out = {}
+        with self._cond:
+            for model, state in self._models.items():
+                st = state.stats
+                waits = sorted(st.recent_waits)
+                out[model] = {
+                    "rpm": state.limits.rpm,
+                    "tpm": state.limits.tpm,
+                    "queued": sum(state.depth.values()),
+                    **{f"queued_{PRIORITY_NAMES.get(p, p)}": n for p, n in sorted(state.depth.items())},
+                    "granted": st.granted,
+                    "delayed": st.delayed,
+                    "throttled": st.throttled,
+                    "wait_avg_ms": st.wait_seconds / st.granted * 1000 if st.granted else 0.0,
+                    "wait_p95_ms": waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000 if waits else 0.0,
+                    "wait_max_ms": st.max_wait_seconds * 1000,
+                    "tokens_estimated": st.tokens_estimated,
+                    "tokens_used": st.tokens_used,
+                    "tokens_refunded": st.tokens_refunded,
+                }
+        return out
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(key: str, rpm: Override = 0, tpm: Override = 0) -> RateLimiter:
+    """
+    One limiter per account key for the whole process, shared by every session, batch
+    job and API worker using it.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None or (limiter.rpm, limiter.tpm) != (rpm, tpm):
+            limiter = RateLimiter(rpm=rpm, tpm=tpm)
+            _limiters[key] = limiter
+        return limiter
+
+def rate_limit_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    snapshot() of every limiter in this process, by model.
+    """
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    out: Dict[str, Dict[str, Any]] = {}
+    for limiter in limiters:
+        out.update(limiter.snapshot())
+    return out
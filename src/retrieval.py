@@ -0,0 +1,232 @@
+import json
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import content_key
+from .compaction import count_tokens
+from .keywords import _ALIAS_INDEX, STOPWORDS, stem, tokenize
+from .parsing import UNSCORED_SECTIONS, Section, clean_lines, get_structured_resume, split_sections
+
+CHUNK_TOKENS = 120           # target chunk size; a section's lines are packed up to this
+RETRIEVAL_TOKEN_BUDGET = 1200  # retrieved chunks per follow-up, resume + JD together
+RETRIEVAL_TOP_K = 8
+INDEX_CACHE_SIZE = 32
+
+# always sent: cheap and they anchor every answer
+_BASE_FIELDS = ("role_title_inferred", "ats_score_overall")
+# used when the question doesn't point at any particular part of the analysis
+_DEFAULT_FIELDS = ("section_scores", "recommendations")
+
+FIELD_HINTS: Dict[str, Tuple[str, ...]] = {
+    "section_scores": ("score", "section", "format", "formatting", "education", "impact", "clarity",
+                       "readability", "rating", "rate", "low", "weak", "quantification"),
+    "matched_keywords": ("keyword", "match", "matched", "cover", "covered"),
+    "missing_critical_keywords": ("keyword", "missing", "lack", "gap", "critical", "add"),
+    "missing_nice_to_have_keywords": ("keyword", "missing", "nice", "bonus", "add", "optional"),
+    "keyword_density": ("density", "keyword", "often", "frequency", "mention", "repeat"),
+    "hard_requirements": ("requirement", "require", "must", "qualify", "qualification", "meet", "eligible"),
+    "red_flags": ("flag", "risk", "concern", "gap", "problem", "issue", "worry", "weakness"),
+    "recommendations": ("improve", "recommend", "recommendation", "fix", "change", "better", "next", "priority"),
+    "tailored_summary": ("summary", "tailor", "rewrite", "objective", "profile", "intro"),
+    "tailored_bullets": ("bullet", "tailor", "rewrite", "achievement", "accomplishment"),
+    "top_action_verbs": ("verb", "action", "wording", "word", "phrase", "language"),
+    "formatting_issues": ("format", "formatting", "layout", "table", "column", "heading", "parse", "ats"),
+    "unquantified_bullets": ("number", "metric", "quantify", "quantification", "impact", "measurable", "bullet"),
+}
+_HINT_TERMS = {name: {stem(h) for h in hints} for name, hints in FIELD_HINTS.items()}
+
+def terms(text: str) -> List[str]:
+    """
+    Index terms: lowercase tokens minus stopwords, stemmed, with skill aliases folded
+    onto their canonical name ("k8s" and "kubernetes" hit the same postings).
+    """
+    out = []
+    for tok in tokenize(text):
+        if tok in STOPWORDS:
+            continue
+        s = stem(tok)
+        out.append(_ALIAS_INDEX.get((s,), s))
+    return out
+
+@dataclass
+class Chunk:
+    source: str      # "resume" | "jd"
+    section: str
+    text: str
+    tokens: int
+
+def chunk_text(text: str, source: str, max_tokens: int = CHUNK_TOKENS, model: str = "gpt-4o-mini",
+               sections: Optional[List[Section]] = None) -> List[Chunk]:
+    """
+    Section-aware chunks: lines are packed up to `max_tokens`, never across a heading.
+    Continuation chunks repeat the section heading so each chunk stands on its own.
+    `sections` skips re-splitting text that has already been parsed.
+    """
+    chunks: List[Chunk] = []
+    for sec in sections if sections is not None else split_sections(clean_lines(text)):
+        lines = [ln for ln in sec.lines if ln]
+        heading = lines[0] if sec.kind != "preamble" and lines else ""
+        buf: List[str] = []
+        size = 0
+        for ln in lines:
+            n = count_tokens(ln, model) + 1
+            if buf and size + n > max_tokens:
+                chunks.append(Chunk(source, sec.kind, "\n".join(buf), size))
+                buf, size = ([heading], count_tokens(heading, model) + 1) if heading and ln != heading else ([], 0)
+            buf.append(ln)
+            size += n
+        if buf:
+            chunks.append(Chunk(source, sec.kind, "\n".join(buf), size))
+    return chunks
+
+class BM25Index:
+    """
+    Okapi BM25 with an inverted index, so a query only touches documents that share a
+    term with it. Items are anything with a `.text`, unless their term counts are passed in.
+    """
+
+    def __init__(self, chunks: List[Any], k1: float = 1.5, b: float = 0.75,
+                 counts: Optional[List[Dict[str, int]]] = None):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+        for i, ch in enumerate(chunks):
+            tf = counts[i] if counts is not None else Counter(terms(ch.text))
+            self._lengths.append(sum(tf.values()))
+            for term, n in tf.items():
+                self._postings.setdefault(term, []).append((i, n))
+        self._avg_len = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        n_docs = len(chunks)
+        self._idf = {
+            t: math.log(1 + (n_docs - len(p) + 0.5) / (len(p) + 0.5)) for t, p in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K) -> List[Tuple[Any, float]]:
+        return [(self.chunks[i], s) for i, s in self.scores(query, k)]
+
+    def scores(self, query: str, k: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        (position, score) for every matching item, best first; each query term counts once.
+        """
+        scores: Dict[int, float] = {}
+        for term in set(terms(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self._postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / (self._avg_len or 1))
+                scores[i] = scores.get(i, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return ranked[:k] if k is not None else ranked
+
+@dataclass
+class FollowupIndex:
+    index: BM25Index
+    resume_chunks: int = 0
+    jd_chunks: int = 0
+    build_seconds: float = 0.0
+    queries: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def retrieve(self, question: str, k: int = RETRIEVAL_TOP_K, token_budget: int = RETRIEVAL_TOKEN_BUDGET) -> List[Chunk]:
+        """
+        Top-k chunks for the question within `token_budget`, returned in document order.
+        Falls back to the opening chunk of each document when nothing matches.
+        """
+        with self._lock:
+            self.queries += 1
+        hits = [ch for ch, _ in self.index.search(question, k)]
+        if not hits:
+            hits = [next(ch for ch in self.index.chunks if ch.source == src)
+                    for src in ("resume", "jd") if any(ch.source == src for ch in self.index.chunks)]
+        picked, used = [], 0
+        for ch in hits:
+            if used + ch.tokens > token_budget and picked:
+                continue
+            picked.append(ch)
+            used += ch.tokens
+        order = {id(ch): i for i, ch in enumerate(self.index.chunks)}
+        return sorted(picked, key=lambda ch: order[id(ch)])
+
+_indexes: "OrderedDict[str, FollowupIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+def build_followup_index(resume_text: str, jd_text: str, model: str = "gpt-4o-mini") -> FollowupIndex:
+    t0 = time.perf_counter()
+    resume_sections = get_structured_resume(resume_text).as_sections(exclude=UNSCORED_SECTIONS)
+    resume_chunks = chunk_text(resume_text, "resume", model=model, sections=resume_sections)
+    jd_chunks = chunk_text(jd_text, "jd", model=model)
+    return FollowupIndex(
+        index=BM25Index(resume_chunks + jd_chunks),
+        resume_chunks=len(resume_chunks),
+        jd_chunks=len(jd_chunks),
+        build_seconds=time.perf_counter() - t0,
+    )
+
+def get_followup_index(resume_text: str, jd_text: str, model: str = "gpt-4o-mini") -> FollowupIndex:
+    """
+    Chunks and indexes a resume/JD pair once; later questions about the same pair reuse it.
+    """
+    key = content_key(resume_text, jd_text)
+    with _indexes_lock:
+        hit = _indexes.get(key)
+        if hit is not None:
+            _indexes.move_to_end(key)
+            return hit
+    idx = build_followup_index(resume_text, jd_text, model)
+    with _indexes_lock:
+        _indexes[key] = idx
+        while len(_indexes) > INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return idx
+
+def clear_followup_indexes() -> None:
+    with _indexes_lock:
+        _indexes.clear()
+
+def select_analysis_fields(analysis: Dict[str, Any], question: str) -> Dict[str, Any]:
+    """
+    The analysis fields a question is about: fields whose hint words or values share a
+    term with the question, plus the role and overall score.
+    """
+    q = set(terms(question)) | {stem(t) for t in tokenize(question)}
+    picked = []
+    for name, value in analysis.items():
+        if name in _BASE_FIELDS:
+            continue
+        if q & _HINT_TERMS.get(name, set()):
+            picked.append(name)
+            continue
+        value_terms = set(terms(value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)))
+        if q & value_terms:
+            picked.append(name)
+    if not picked:
+        picked = [f for f in _DEFAULT_FIELDS if f in analysis]
+    keep = set(picked) | set(_BASE_FIELDS)
+    return {k: v for k, v in analysis.items() if k in keep}
+
+def format_chunks(chunks: List[Chunk], source: str) -> str:
+    parts = [ch.text for ch in chunks if ch.source == source]
+    return "\n...\n".join(parts) if parts else "(no relevant excerpt)"
+
+def followup_context(
+    analysis: Dict[str, Any],
+    question: str,
+    resume_text: str,
+    jd_text: str,
+    model: str = "gpt-4o-mini",
+    k: int = RETRIEVAL_TOP_K,
+    token_budget: int = RETRIEVAL_TOKEN_BUDGET,
+    index: Optional[FollowupIndex] = None,
+) -> Tuple[Dict[str, Any], List[Chunk]]:
+    idx = index or get_followup_index(resume_text, jd_text, model)
+    return select_analysis_fields(analysis or {}, question), idx.retrieve(question, k, token_budget)
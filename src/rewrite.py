@@ -1,3 +1,10 @@
+from .cache import content_key
+from .compaction import compact_jd, compact_resume
+from .prompts import PROMPT_VERSION
+from .tracing import span, timed_completion
+
+REWRITE_TOKEN_BUDGET = 3000
+
 REWRITE_SYSTEM = """You are ATS-ChatGPT specialized in precise rewrites.
 Return plain text with concise, high-impact bullets or summary paragraphs tailored to the JD and the user's rewrite goal.
 Prioritize specificity, action verbs, outcomes, and (X/Y/Z) quantification placeholders if the resume lacks numbers."""
@@ -18,17 +25,43 @@ Output:
 - Avoid generic phrasing; emphasize tools, skills, and outcomes relevant to the JD.
 """
 
-def generate_rewrites(client, model: str, temperature: float, resume_text: str, jd_text: str, rewrite_goal: str) -> str:
-    resp = client.chat.completions.create(
+def rewrite_cache_scope(model: str, temperature: float, resume_text: str, jd_text: str) -> str:
+    """
+    Everything but the goal that shapes a rewrite (see semcache.py).
+    """
+    return content_key(
+        "rewrite", PROMPT_VERSION, REWRITE_SYSTEM, REWRITE_USER_TPL, REWRITE_TOKEN_BUDGET,
+        model, float(temperature), resume_text, jd_text,
+    )
+
+def generate_rewrites(client, model: str, temperature: float, resume_text: str, jd_text: str, rewrite_goal: str,
+                      semantic_cache=None) -> str:
+    """
+    With a `semantic_cache`, a close enough earlier goal for the same resume/JD is served from it.
+    """
+    scope = rewrite_cache_scope(model, temperature, resume_text, jd_text) if semantic_cache is not None else None
+    if scope is not None:
+        with span("semantic_cache") as sp:
+            hit = semantic_cache.lookup(scope, rewrite_goal)
+            if sp is not None:
+                sp.attrs.update(hit=hit is not None, similarity=round(hit.similarity, 3) if hit else None)
+        if hit is not None:
+            return hit.value
+    resp = timed_completion(
+        "rewrite",
+        client,
         model=model,
         temperature=temperature,
         messages=[
             {"role": "system", "content": REWRITE_SYSTEM},
             {"role": "user", "content": REWRITE_USER_TPL.format(
                 goal=rewrite_goal,
-                resume=resume_text[:12000],
-                jd=jd_text[:12000]
+                resume=compact_resume(resume_text, REWRITE_TOKEN_BUDGET, model=model, label="rewrite.resume").text,
+                jd=compact_jd(jd_text, REWRITE_TOKEN_BUDGET, model=model, label="rewrite.jd").text
             )},
         ],
     )
-    return resp.choices[0].message.content
+    text = resp.choices[0].message.content
+    if scope is not None and text:
+        semantic_cache.set(scope, rewrite_goal, text)
+    return text
@@ -0,0 +1,252 @@
+import copy
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .jsonstream import TopLevelFieldParser
+from .prompts import ANALYSIS_JSON_SCHEMA
+
+SECTION_SCORE_KEYS = (
+    "ExperienceMatch",
+    "SkillsMatch",
+    "KeywordsMatch",
+    "Education",
+    "ClarityReadability",
+)
+# section_scores computed locally (heuristics.py) rather than asked of the model: checked when
+# present (a merged or stored analysis), never required
+LOCAL_SCORE_KEYS = ("ImpactQuantification", "FormattingATS")
+
+_SEVERITY = {"low": "low", "minor": "low", "med": "med", "medium": "med", "moderate": "med",
+             "high": "high", "critical": "high", "major": "high"}
+_TRUE = {"true", "yes", "y", "1", "met", "pass", "passed"}
+_FALSE = {"false", "no", "n", "0", "not met", "fail", "failed"}
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+class Invalid(ValueError):
+    pass
+
+# A checker takes a raw value and returns the coerced value or raises Invalid.
+Checker = Callable[[Any], Any]
+
+def _score(value: Any) -> int:
+    if isinstance(value, bool):
+        raise Invalid("expected a 0-100 number")
+    if isinstance(value, str):
+        m = _NUMBER_RE.search(value)  # "85", "85%", "85/100"
+        if not m:
+            raise Invalid(f"expected a 0-100 number, got {value!r}")
+        value = float(m.group())
+    if not isinstance(value, (int, float)) or (isinstance(value, float) and math.isnan(value)):
+        raise Invalid("expected a 0-100 number")
+    return int(round(min(100.0, max(0.0, float(value)))))
+
+def _text(value: Any) -> str:
+    if value is None:
+        raise Invalid("missing text")
+    if isinstance(value, (list, tuple)):
+        value = " ".join(str(v) for v in value)
+    text = str(value).strip()
+    if not text:
+        raise Invalid("empty text")
+    return text
+
+def _flag(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    low = str(value).strip().lower()
+    if low in _TRUE:
+        return True
+    if low in _FALSE:
+        return False
+    raise Invalid(f"expected true/false, got {value!r}")
+
+def _severity(value: Any) -> str:
+    sev = _SEVERITY.get(str(value or "").strip().lower())
+    if sev is None:
+        raise Invalid(f"unknown severity {value!r}")
+    return sev
+
+def _str_list(max_items: Optional[int] = None, min_items: int = 0) -> Checker:
+    def check(value: Any) -> List[str]:
+        if value is None:
+            value = []
+        if isinstance(value, str):
+            value = [ln.strip(" -•*\t") for ln in re.split(r"[\n;]", value)]
+        if not isinstance(value, (list, tuple)):
+            raise Invalid("expected a list")
+        items = [str(v).strip() for v in value if v is not None and str(v).strip()]
+        if len(items) < min_items:
+            raise Invalid(f"expected at least {min_items} item(s)")
+        return items[:max_items] if max_items else items
+    return check
+
+def _obj(fields: Dict[str, Checker], defaults: Optional[Dict[str, Any]] = None,
+         optional: Optional[Dict[str, Checker]] = None) -> Checker:
+    defaults = defaults or {}
+    optional = optional or {}
+
+    def check(value: Any) -> Dict[str, Any]:
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise Invalid("expected an object") from None
+        if not isinstance(value, dict):
+            raise Invalid("expected an object")
+        out = {}
+        for name, checker in fields.items():
+            if name not in value or value[name] is None:
+                if name in defaults:
+                    out[name] = defaults[name]
+                    continue
+                raise Invalid(f"missing {name!r}")
+            try:
+                out[name] = checker(value[name])
+            except Invalid as e:
+                raise Invalid(f"{name}: {e}") from None
+        for name, checker in optional.items():
+            if value.get(name) is not None:
+                try:
+                    out[name] = checker(value[name])
+                except Invalid:
+                    pass  # dropped; the caller recomputes it
+        return out
+    return check
+
+def _obj_list(item: Checker, min_items: int = 0, max_items: Optional[int] = None) -> Checker:
+    def check(value: Any) -> List[Any]:
+        if isinstance(value, dict):
+            value = [value]
+        if not isinstance(value, (list, tuple)):
+            raise Invalid("expected a list")
+        items = []
+        for v in value:
+            try:
+                items.append(item(v))
+            except Invalid:
+                continue  # drop a malformed entry rather than the whole list
+        if len(items) < min_items:
+            raise Invalid(f"expected at least {min_items} valid item(s)")
+        return items[:max_items] if max_items else items
+    return check
+
+@dataclass
+class FieldSpec:
+    check: Checker
+    default: Any = None        # used (without repair) when the field is missing
+    has_default: bool = False
+
+def _spec(check: Checker, *default) -> FieldSpec:
+    return FieldSpec(check, default[0] if default else None, bool(default))
+
+# compiled once: one checker per top-level field of ANALYSIS_JSON_SCHEMA
+ANALYSIS_SPEC: Dict[str, FieldSpec] = {
+    "role_title_inferred": _spec(_text, ""),
+    "ats_score_overall": _spec(_score),
+    "section_scores": _spec(_obj(
+        {k: _score for k in SECTION_SCORE_KEYS}, optional={k: _score for k in LOCAL_SCORE_KEYS},
+    )),
+    "missing_nice_to_have_keywords": _spec(_str_list(), []),
+    "hard_requirements": _spec(_obj({"met": _flag, "details": _str_list()}, defaults={"details": []})),
+    "red_flags": _spec(_str_list(), []),
+    "recommendations": _spec(_obj_list(_obj(
+        {"area": _text, "severity": _severity, "suggestion": _text, "example_rewrite": _text},
+        defaults={"area": "General", "severity": "med", "example_rewrite": ""},
+    ), min_items=1)),
+    "tailored_summary": _spec(_text),
+    "tailored_bullets": _spec(_str_list(max_items=5, min_items=1)),
+    "top_action_verbs": _spec(_str_list(), []),
+}
+
+@dataclass
+class ValidationResult:
+    data: Dict[str, Any]
+    invalid: List[str] = field(default_factory=list)     # fields that still need the model
+    errors: Dict[str, str] = field(default_factory=dict)
+    coerced: List[str] = field(default_factory=list)     # fields whose value was changed to fit
+    defaulted: List[str] = field(default_factory=list)   # optional fields that were missing
+    repaired: List[str] = field(default_factory=list)    # fields regenerated by a repair request
+    repair_error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.invalid
+
+def validate_analysis(data: Any, spec: Dict[str, FieldSpec] = ANALYSIS_SPEC) -> ValidationResult:
+    """
+    Checks and coerces an analysis dict field by field (numeric strings, clamping to 0-100,
+    severity synonyms, missing optional lists). Unknown keys are passed through untouched.
+    """
+    src = data if isinstance(data, dict) else {}
+    out: Dict[str, Any] = {k: v for k, v in src.items() if k not in spec}
+    result = ValidationResult(out)
+    for name, fs in spec.items():
+        if name not in src or src[name] is None:
+            if fs.has_default:
+                out[name] = copy.deepcopy(fs.default)
+                result.defaulted.append(name)
+                continue
+            result.invalid.append(name)
+            result.errors[name] = "missing"
+            continue
+        try:
+            value = fs.check(src[name])
+        except Invalid as e:
+            result.invalid.append(name)
+            result.errors[name] = str(e)
+            continue
+        if value != src[name]:
+            result.coerced.append(name)
+        out[name] = value
+    # keep schema order so re-serialized results are stable
+    ordered = {k: out[k] for k in spec if k in out}
+    ordered.update((k, v) for k, v in out.items() if k not in ordered)
+    result.data = ordered
+    return result
+
+def salvage_json(raw: Optional[str]) -> Dict[str, Any]:
+    """
+    Parses model output; when it is truncated or broken, keeps every top-level field
+    that closed before the damage.
+    """
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+        return data if isinstance(data, dict) else {}
+    except ValueError:
+        pass
+    start = raw.find("{")
+    if start < 0:
+        return {}
+    parser = TopLevelFieldParser()
+    return dict(parser.feed(raw[start:]))
+
+def _schema_blocks() -> Dict[str, str]:
+    # top-level fields sit at two-space indent in ANALYSIS_JSON_SCHEMA
+    blocks: Dict[str, List[str]] = {}
+    current = None
+    for line in ANALYSIS_JSON_SCHEMA.strip().splitlines()[1:-1]:
+        m = re.match(r'^  "(\w+)":', line)
+        if m:
+            current = m.group(1)
+            blocks[current] = []
+        if current:
+            blocks[current].append(line.rstrip().rstrip(","))
+    return {k: "\n".join(v) for k, v in blocks.items()}
+
+_SCHEMA_BLOCKS = _schema_blocks()
+
+def schema_for_fields(fields: List[str]) -> str:
+    """
+    The slice of ANALYSIS_JSON_SCHEMA covering only `fields`, for targeted repair prompts.
+    """
+    return "\n{\n" + ",\n".join(_SCHEMA_BLOCKS[f] for f in fields if f in _SCHEMA_BLOCKS) + "\n}\n"
+
+def changed_fields(before: Dict[str, Any], after: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    return [(k, v) for k, v in after.items() if k not in before or before[k] != v]
@@ -0,0 +1,220 @@
+import math
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .keywords import STOPWORDS, _ALIAS_INDEX, _MAX_ALIAS_LEN, stem, tokenize
+
+SIMILARITY_THRESHOLD = 0.85
+MAX_ENTRIES = 512
+
+# feature weights: whole words carry the meaning, bigrams keep some word order and
+# character trigrams absorb typos and inflections the stemmer misses ("metrcs", "quantify")
+_WORD_WEIGHT = 1.0
+_BIGRAM_WEIGHT = 0.5
+_TRIGRAM_WEIGHT = 0.25
+
+# kept (folded to "not") although STOPWORDS drops them: "no Docker" must not match "Docker"
+_NEGATIONS = frozenset({"no", "not", "nor", "never", "without", "don", "doesn", "didn", "isn", "aren", "shouldn"})
+# words every question about "my resume" carries; they say nothing about what is asked
+_QUERY_STOPWORDS = STOPWORDS | frozenset({
+    "resume", "cv", "jd", "description", "please", "tell", "give", "show", "want", "need", "get", "put",
+})
+
+def _fold(token: str) -> str:
+    # stem() leaves "emphasize" but strips "emphasizing" to "emphasiz"; drop the trailing e too
+    token = stem(token)
+    return token[:-1] if len(token) > 4 and token.endswith("e") and token.isalpha() else token
+
+@dataclass(frozen=True)
+class QueryVector:
+    """
+    A question/goal as an L2-normalized sparse vector of hashed features, plus the terms
+    two queries must share exactly to be interchangeable (skills, numbers, negation).
+    """
+    weights: Dict[int, float]
+    skills: FrozenSet[str]
+    numbers: FrozenSet[str]
+    negated: bool = False
+
+    def similarity(self, other: "QueryVector") -> float:
+        if (self.skills, self.numbers, self.negated) != (other.skills, other.numbers, other.negated):
+            return 0.0
+        small, large = sorted((self.weights, other.weights), key=len)
+        return sum(w * large.get(k, 0.0) for k, w in small.items())
+
+def _terms(text: str) -> Tuple[List[str], FrozenSet[str], FrozenSet[str]]:
+    tokens = tokenize(text)
+    stems = [stem(t) for t in tokens]
+    terms: List[str] = []
+    skills = set()
+    numbers = set()
+    i = 0
+    while i < len(tokens):
+        # longest skill alias first, on the unfiltered tokens ("a/b testing" starts with "a")
+        for n in range(min(_MAX_ALIAS_LEN, len(tokens) - i), 0, -1):
+            canonical = _ALIAS_INDEX.get(tuple(stems[i:i + n]))
+            if canonical is not None:
+                terms.append(f"skill:{canonical}")
+                skills.add(canonical)
+                i += n
+                break
+        else:
+            tok = tokens[i]
+            i += 1
+            if tok in _NEGATIONS:
+                terms.append("not")
+            elif any(c.isdigit() for c in tok):
+                terms.append(tok)
+                numbers.add(tok)
+            elif tok not in _QUERY_STOPWORDS and len(tok) > 1:
+                terms.append(_fold(tok))
+    return terms, frozenset(skills), frozenset(numbers)
+
+def _bucket(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8"))
+
+def vectorize(text: str) -> QueryVector:
+    """
+    Local, dependency-free text embedding: stemmed and skill-folded words, word bigrams and
+    character trigrams, hashed (crc32) into a sparse vector. Deterministic across processes.
+    """
+    terms, skills, numbers = _terms(text)
+    weights: Dict[int, float] = {}
+
+    def add(feature: str, weight: float) -> None:
+        k = _bucket(feature)
+        weights[k] = weights.get(k, 0.0) + weight
+
+    for term in terms:
+        add(f"w:{term}", _WORD_WEIGHT)
+        if not term.startswith("skill:"):
+            padded = f"^{term}$"
+            grams = [padded[j:j + 3] for j in range(len(padded) - 2)]
+            for g in grams:
+                add(f"c:{g}", _TRIGRAM_WEIGHT / math.sqrt(len(grams)))
+    for a, b in zip(terms, terms[1:]):
+        add(f"b:{a} {b}", _BIGRAM_WEIGHT)
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    if norm:
+        weights = {k: w / norm for k, w in weights.items()}
+    return QueryVector(weights, skills, numbers, "not" in terms)
+
+@dataclass
+class SemanticHit:
+    value: str
+    query: str           # the earlier question/goal whose answer is reused
+    similarity: float
+
+@dataclass
+class _Entry:
+    scope: str
+    query: str
+    vector: QueryVector = field(repr=False)
+    value: str
+
+class SemanticCache:
+    """
+    In-memory answers for free-text questions/goals, reused for later queries that are close
+    enough (cosine >= `threshold`) within the same scope. The scope is an exact fingerprint of
+    everything else that shapes the answer (prompt, model, resume, JD; see followup_cache_scope
+    and rewrite_cache_scope), so only the wording of the question is matched approximately.
+    The least recently used entries are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, max_entries: int = MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._similarity_sum = 0.0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._scopes: Dict[str, Dict[Tuple[str, str], _Entry]] = {}
+
+    @staticmethod
+    def _key(scope: str, query: str) -> Tuple[str, str]:
+        return scope, " ".join(query.lower().split())
+
+    def lookup(self, scope: str, query: str) -> Optional[SemanticHit]:
+        vector = vectorize(query)
+        key = self._key(scope, query)
+        with self._lock:
+            best: Optional[_Entry] = self._entries.get(key)
+            best_sim = 1.0 if best is not None else 0.0
+            if best is None:
+                for entry in self._scopes.get(scope, {}).values():
+                    sim = vector.similarity(entry.vector)
+                    if sim > best_sim:
+                        best, best_sim = entry, sim
+            best_sim = min(best_sim, 1.0)  # float noise on identical vectors
+            if best is None or best_sim < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(self._key(best.scope, best.query))
+            self.hits += 1
+            self._similarity_sum += best_sim
+            return SemanticHit(best.value, best.query, best_sim)
+
+    def get(self, scope: str, query: str) -> Optional[str]:
+        hit = self.lookup(scope, query)
+        return hit.value if hit is not None else None
+
+    def set(self, scope: str, query: str, value: str) -> None:
+        key = self._key(scope, query)
+        entry = _Entry(scope, query, vectorize(query), value)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._scopes.setdefault(scope, {})[key] = entry
+            while self.max_entries and len(self._entries) > self.max_entries:
+                old_key, old = self._entries.popitem(last=False)
+                siblings = self._scopes.get(old.scope, {})
+                siblings.pop(old_key, None)
+                if not siblings:
+                    self._scopes.pop(old.scope, None)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+            self.hits = self.misses = self.evictions = 0
+            self._similarity_sum = 0.0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "scopes": len(self._scopes),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "avg_hit_similarity": (self._similarity_sum / self.hits) if self.hits else 0.0,
+                "evictions": self.evictions,
+                "threshold": self.threshold,
+            }
+
+_cache: Optional[SemanticCache] = None
+_cache_lock = threading.Lock()
+
+def get_semantic_cache(threshold: float = SIMILARITY_THRESHOLD, max_entries: int = MAX_ENTRIES) -> SemanticCache:
+    """
+    The process-wide instance, so Streamlit sessions and API workers share answers and counters.
+    The latest threshold / size settings apply.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticCache(threshold, max_entries)
+        else:
+            _cache.threshold, _cache.max_entries = threshold, max_entries
+        return _cache
@@ -0,0 +1,257 @@
+import json
+import statistics
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# USD per 1M tokens (input, output, cached input); unknown models are costed at 0
+PRICING = {
+    "gpt-4o-mini": (0.15, 0.60, 0.075),
+    "gpt-4o": (2.50, 10.00, 1.25),
+    "gpt-4.1-mini": (0.40, 1.60, 0.10),
+    "gpt-4.1": (2.00, 8.00, 0.50),
+}
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """
+    `cached_tokens` is the part of `prompt_tokens` served from the provider's prompt cache.
+    """
+    price = PRICING.get(model)
+    if price is None:
+        # dated snapshots ("gpt-4o-mini-2024-07-18") price like their base model
+        price = next((p for m, p in sorted(PRICING.items(), key=lambda kv: -len(kv[0])) if model.startswith(m)), (0.0, 0.0, 0.0))
+    cached = min(cached_tokens, prompt_tokens)
+    return ((prompt_tokens - cached) * price[0] + cached * price[2] + completion_tokens * price[1]) / 1_000_000
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    duration_ms: float = 0.0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass
+class LLMCall:
+    label: str
+    model: str
+    duration_ms: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0  # prompt tokens the provider served from its prefix cache
+    first_token_ms: Optional[float] = None
+    cost_usd: float = 0.0
+
+@dataclass
+class Trace:
+    name: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    started_at: float = field(default_factory=time.time)
+    duration_ms: float = 0.0
+    spans: List[Span] = field(default_factory=list)
+    llm_calls: List[LLMCall] = field(default_factory=list)
+    persist: bool = True  # set False to keep a trace out of the metrics file (e.g. cache hits)
+    _t0: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(c.prompt_tokens for c in self.llm_calls)
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(c.completion_tokens for c in self.llm_calls)
+
+    @property
+    def cached_tokens(self) -> int:
+        return sum(c.cached_tokens for c in self.llm_calls)
+
+    @property
+    def cost_usd(self) -> float:
+        return sum(c.cost_usd for c in self.llm_calls)
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d.pop("_t0", None)
+        d.update(
+            prompt_tokens=self.prompt_tokens, completion_tokens=self.completion_tokens,
+            cached_tokens=self.cached_tokens, cost_usd=self.cost_usd,
+        )
+        return d
+
+_current: ContextVar[Optional[Trace]] = ContextVar("ats_trace", default=None)
+
+class MetricsSink:
+    """
+    Appends one JSON line per finished trace. Thread-safe; the file is opened per write
+    so several Streamlit sessions/processes can share it.
+    """
+
+    def __init__(self, path: Optional[str | Path] = None):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+
+    def write(self, tr: Trace) -> None:
+        if self.path is None:
+            return
+        line = json.dumps(tr.to_dict(), ensure_ascii=False)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+_sink = MetricsSink()
+
+def configure(metrics_path: Optional[str | Path]) -> None:
+    """
+    Sets the JSONL metrics file for finished traces (None disables writing).
+    """
+    global _sink
+    path = Path(metrics_path) if metrics_path else None
+    if path != _sink.path:
+        _sink = MetricsSink(path)
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+@contextmanager
+def trace(name: str) -> Iterator[Trace]:
+    """
+    Starts a trace for one user action; spans and LLM calls made inside it (in this thread)
+    are collected and the finished trace is written to the metrics file.
+    """
+    tr = Trace(name=name)
+    token = _current.set(tr)
+    try:
+        yield tr
+    finally:
+        _current.reset(token)
+        tr.duration_ms = (time.perf_counter() - tr._t0) * 1000
+        if tr.persist:
+            _sink.write(tr)
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Optional[Span]]:
+    """
+    Times a stage inside the current trace. Outside a trace this is a no-op.
+    """
+    tr = _current.get()
+    if tr is None:
+        yield None
+        return
+    sp = Span(name=name, start=(time.perf_counter() - tr._t0) * 1000, attrs=dict(attrs))
+    t0 = time.perf_counter()
+    try:
+        yield sp
+    finally:
+        sp.duration_ms = (time.perf_counter() - t0) * 1000
+        tr.spans.append(sp)
+
+def record_llm_call(label: str, model: str, usage, seconds: float, first_token_seconds: Optional[float] = None) -> Optional[LLMCall]:
+    """
+    Records `resp.usage` (or a streamed final usage chunk) for the current trace.
+    """
+    tr = _current.get()
+    if tr is None:
+        return None
+    prompt = int(getattr(usage, "prompt_tokens", 0) or 0) if usage is not None else 0
+    completion = int(getattr(usage, "completion_tokens", 0) or 0) if usage is not None else 0
+    # usage.prompt_tokens_details.cached_tokens; either level may be missing or None
+    details = getattr(usage, "prompt_tokens_details", None) if usage is not None else None
+    cached = int(getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+    call = LLMCall(
+        label=label,
+        model=model,
+        duration_ms=seconds * 1000,
+        prompt_tokens=prompt,
+        completion_tokens=completion,
+        cached_tokens=cached,
+        first_token_ms=first_token_seconds * 1000 if first_token_seconds is not None else None,
+        cost_usd=estimate_cost(model, prompt, completion, cached),
+    )
+    tr.llm_calls.append(call)
+    return call
+
+def timed_completion(label: str, client, **kwargs):
+    """
+    client.chat.completions.create(**kwargs) wrapped in an "llm.<label>" span with usage recorded.
+    """
+    with span(f"llm.{label}", model=kwargs.get("model")):
+        t0 = time.perf_counter()
+        resp = client.chat.completions.create(**kwargs)
+        record_llm_call(label, kwargs.get("model", ""), getattr(resp, "usage", None), time.perf_counter() - t0)
+    return resp
+
+def read_traces(path: str | Path, limit: int = 1000) -> List[Dict[str, Any]]:
+    p = Path(path)
+    if not p.exists():
+        return []
+    with p.open("r", encoding="utf-8") as f:
+        lines = f.readlines()[-limit:]
+    out = []
+    for ln in lines:
+        try:
+            out.append(json.loads(ln))
+        except ValueError:
+            continue
+    return out
+
+def _pct(values: List[float], q: float) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+def summarize(traces: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    p50/p95 per span name (and per trace name as "trace.<name>") in milliseconds.
+    """
+    buckets: Dict[str, List[float]] = {}
+    for tr in traces:
+        buckets.setdefault(f"trace.{tr.get('name')}", []).append(tr.get("duration_ms", 0.0))
+        for sp in tr.get("spans", []):
+            buckets.setdefault(sp["name"], []).append(sp["duration_ms"])
+        for call in tr.get("llm_calls", []):
+            if call.get("first_token_ms") is not None:
+                buckets.setdefault(f"ttft.{call['label']}", []).append(call["first_token_ms"])
+    return {
+        name: {"count": len(v), "p50_ms": _pct(sorted(v), 50), "p95_ms": _pct(sorted(v), 95)}
+        for name, v in buckets.items() if v
+    }
+
+_summaries: Dict[str, tuple] = {}
+_summaries_lock = threading.Lock()
+
+def summarize_file(path: str | Path, limit: int = 1000) -> Dict[str, Dict[str, float]]:
+    """
+    summarize(read_traces(path)), recomputed only when the file's size or mtime changed,
+    so Streamlit reruns don't re-read the metrics log for every widget interaction.
+    """
+    p = Path(path)
+    try:
+        stat = p.stat()
+    except OSError:
+        return {}
+    stamp = (stat.st_size, stat.st_mtime_ns, limit)
+    with _summaries_lock:
+        hit = _summaries.get(str(p))
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    summary = summarize(read_traces(p, limit))
+    with _summaries_lock:
+        _summaries[str(p)] = (stamp, summary)
+    return summary
+
+def to_prometheus(summary: Dict[str, Dict[str, float]], prefix: str = "ats") -> str:
+    """
+    Prometheus text exposition of a summarize() result (summary type, seconds).
+    """
+    lines = [f"# TYPE {prefix}_stage_seconds summary"]
+    for name, s in sorted(summary.items()):
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'{prefix}_stage_seconds{{stage="{label}",quantile="0.5"}} {s["p50_ms"] / 1000:.6f}')
+        lines.append(f'{prefix}_stage_seconds{{stage="{label}",quantile="0.95"}} {s["p95_ms"] / 1000:.6f}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{label}"}} {s["count"]}')
+    return "\n".join(lines) + "\n"
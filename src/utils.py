@@ -1,5 +1,6 @@
 import json
 import html
+from typing import Iterator
 
 def safe_json(s: str | dict | None) -> dict | None:
     if s is None:
@@ -31,58 +32,132 @@ def severity_color(sev: str) -> str:
         return "#D68910"
     return "#1E8449"
 
-def make_markdown_report(data: dict) -> str:
-    lines = []
-    lines.append(f"# ATS Report\n")
-    lines.append(f"**Overall ATS Score:** {round(data.get('ats_score_overall', 0))}/100\n")
+def iter_markdown_report(data: dict, title: str = "ATS Report") -> Iterator[str]:
+    """
+    The Markdown report one line at a time, so bulk exports can stream it (see export.py).
+    """
+    yield f"# {title}\n"
+    yield f"**Overall ATS Score:** {round(data.get('ats_score_overall', 0) or 0)}/100\n"
     role = data.get("role_title_inferred", "")
     if role:
-        lines.append(f"**Target Role (inferred):** {role}\n")
+        yield f"**Target Role (inferred):** {role}\n"
 
-    lines.append("## Section Scores")
+    yield "## Section Scores"
     for k, v in (data.get("section_scores", {}) or {}).items():
-        lines.append(f"- **{k}:** {v}")
+        yield f"- **{k}:** {v}"
 
-    lines.append("\n## Hard Requirements")
-    hr = data.get("hard_requirements", {})
-    lines.append(f"- Met: {'Yes' if hr.get('met') else 'No'}")
+    yield "\n## Hard Requirements"
+    hr = data.get("hard_requirements", {}) or {}
+    yield f"- Met: {'Yes' if hr.get('met') else 'No'}"
     for d in hr.get("details", []):
-        lines.append(f"  - {d}")
+        yield f"  - {d}"
 
-    lines.append("\n## Keywords")
-    lines.append(f"- **Matched:** {', '.join(data.get('matched_keywords', [])) or '—'}")
-    lines.append(f"- **Missing (Critical):** {', '.join(data.get('missing_critical_keywords', [])) or '—'}")
-    lines.append(f"- **Missing (Nice):** {', '.join(data.get('missing_nice_to_have_keywords', [])) or '—'}")
+    yield "\n## Keywords"
+    yield f"- **Matched:** {', '.join(data.get('matched_keywords', [])) or '—'}"
+    yield f"- **Missing (Critical):** {', '.join(data.get('missing_critical_keywords', [])) or '—'}"
+    yield f"- **Missing (Nice):** {', '.join(data.get('missing_nice_to_have_keywords', [])) or '—'}"
 
     kd = data.get("keyword_density", [])
     if kd:
-        lines.append("\n### Keyword Density (Resume vs JD)")
-        lines.append("| Keyword | Resume Freq | JD Freq |")
-        lines.append("|---|---:|---:|")
+        yield "\n### Keyword Density (Resume vs JD)"
+        yield "| Keyword | Resume Freq | JD Freq |"
+        yield "|---|---:|---:|"
         for row in kd:
-            lines.append(f"| {row.get('keyword','')} | {row.get('resume_freq',0)} | {row.get('jd_freq',0)} |")
+            yield f"| {row.get('keyword','')} | {row.get('resume_freq',0)} | {row.get('jd_freq',0)} |"
 
     if data.get("red_flags"):
-        lines.append("\n## Red Flags")
+        yield "\n## Red Flags"
         for r in data["red_flags"]:
-            lines.append(f"- {r}")
+            yield f"- {r}"
 
     if data.get("recommendations"):
-        lines.append("\n## Recommendations")
+        yield "\n## Recommendations"
         for r in data["recommendations"]:
-            lines.append(f"### {r.get('area','General')} ({r.get('severity','med').upper()})")
-            lines.append(r.get("suggestion",""))
+            yield f"### {r.get('area','General')} ({r.get('severity','med').upper()})"
+            yield r.get("suggestion","")
             if r.get("example_rewrite"):
-                lines.append("\n**Example rewrite**\n")
-                lines.append(r["example_rewrite"])
+                yield "\n**Example rewrite**\n"
+                yield r["example_rewrite"]
 
     if data.get("tailored_summary"):
-        lines.append("\n## Tailored Professional Summary\n")
-        lines.append(data["tailored_summary"])
+        yield "\n## Tailored Professional Summary\n"
+        yield data["tailored_summary"]
 
     if data.get("tailored_bullets"):
-        lines.append("\n## High-impact Bullet Suggestions")
+        yield "\n## High-impact Bullet Suggestions"
         for i, b in enumerate(data["tailored_bullets"], 1):
-            lines.append(f"{i}. {b}")
+            yield f"{i}. {b}"
+
+def make_markdown_report(data: dict) -> str:
+    return "\n".join(iter_markdown_report(data))
+
+def _html_list(items) -> Iterator[str]:
+    yield "<ul>"
+    for item in items:
+        yield f"<li>{html.escape(str(item))}</li>"
+    yield "</ul>"
+
+def iter_html_report(data: dict, title: str = "ATS Report") -> Iterator[str]:
+    """
+    The same report as iter_markdown_report() as a standalone HTML page, streamed in pieces.
+    """
+    esc = html.escape
+    yield "<!doctype html>"
+    yield f'<html><head><meta charset="utf-8"><title>{esc(title)}</title>'
+    yield ("<style>body{font-family:system-ui,sans-serif;max-width:860px;margin:2rem auto;line-height:1.45}"
+           "table{border-collapse:collapse}td,th{border:1px solid #ccc;padding:2px 8px}"
+           "td.n{text-align:right}</style></head><body>")
+    yield f"<h1>{esc(title)}</h1>"
+    yield f"<p><strong>Overall ATS Score:</strong> {round(data.get('ats_score_overall', 0) or 0)}/100</p>"
+    role = data.get("role_title_inferred", "")
+    if role:
+        yield f"<p><strong>Target Role (inferred):</strong> {esc(role)}</p>"
+
+    yield "<h2>Section Scores</h2>"
+    yield from _html_list(f"{k}: {v}" for k, v in (data.get("section_scores", {}) or {}).items())
+
+    yield "<h2>Hard Requirements</h2>"
+    hr = data.get("hard_requirements", {}) or {}
+    yield f"<p>Met: {'Yes' if hr.get('met') else 'No'}</p>"
+    if hr.get("details"):
+        yield from _html_list(hr["details"])
 
-    return "\n".join(lines)
+    yield "<h2>Keywords</h2><ul>"
+    for label, key in (("Matched", "matched_keywords"), ("Missing (Critical)", "missing_critical_keywords"),
+                       ("Missing (Nice)", "missing_nice_to_have_keywords")):
+        yield f"<li><strong>{label}:</strong> {esc(', '.join(data.get(key, [])) or '—')}</li>"
+    yield "</ul>"
+
+    kd = data.get("keyword_density", [])
+    if kd:
+        yield "<h3>Keyword Density (Resume vs JD)</h3>"
+        yield "<table><tr><th>Keyword</th><th>Resume Freq</th><th>JD Freq</th></tr>"
+        for row in kd:
+            yield (f"<tr><td>{esc(str(row.get('keyword', '')))}</td><td class=n>{row.get('resume_freq', 0)}</td>"
+                   f"<td class=n>{row.get('jd_freq', 0)}</td></tr>")
+        yield "</table>"
+
+    if data.get("red_flags"):
+        yield "<h2>Red Flags</h2>"
+        yield from _html_list(data["red_flags"])
+
+    if data.get("recommendations"):
+        yield "<h2>Recommendations</h2>"
+        for r in data["recommendations"]:
+            sev = r.get("severity", "med")
+            yield (f'<h3>{esc(r.get("area", "General"))} '
+                   f'<span style="color:{severity_color(sev)}">({esc(sev.upper())})</span></h3>')
+            yield f"<p>{esc(r.get('suggestion', ''))}</p>"
+            if r.get("example_rewrite"):
+                yield f"<p><strong>Example rewrite</strong></p><blockquote>{esc(r['example_rewrite'])}</blockquote>"
+
+    if data.get("tailored_summary"):
+        yield "<h2>Tailored Professional Summary</h2>"
+        yield f"<p>{esc(data['tailored_summary'])}</p>"
+
+    if data.get("tailored_bullets"):
+        yield "<h2>High-impact Bullet Suggestions</h2><ol>"
+        for b in data["tailored_bullets"]:
+            yield f"<li>{esc(str(b))}</li>"
+        yield "</ol>"
+    yield "</body></html>"
@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+@pytest.fixture(autouse=True)
+def isolated_settings(monkeypatch, tmp_path):
+    """
+    Every test runs on the fake backend with its caches, history and metrics under tmp_path,
+    so nothing is read from or written to the developer's .ats_cache.
+    """
+    monkeypatch.setenv("ATS_LLM_BACKEND", "fake")
+    monkeypatch.setenv("ATS_CACHE_PATH", str(tmp_path / "results.sqlite3"))
+    monkeypatch.setenv("ATS_METRICS_PATH", "")
+    monkeypatch.setenv("ATS_HISTORY_PATH", "")
+    monkeypatch.setenv("ATS_JD_LIBRARY_PATH", str(tmp_path / "jd_library.sqlite3"))
+    monkeypatch.delenv("OPENAI_BASE_URL", raising=False)
+    yield
+    from src.client import clear_clients
+
+    clear_clients()
+
+@pytest.fixture
+def fake_llm():
+    from src.fake_llm import FakeLLMConfig, FakeOpenAI
+
+    return FakeOpenAI(FakeLLMConfig(latency=0.0))
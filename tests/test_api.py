@@ -0,0 +1,105 @@
+import json
+import time
+
+import pytest
+
+pytest.importorskip("starlette")
+try:
+    from starlette.testclient import TestClient
+except RuntimeError:  # the test client's HTTP package is missing
+    pytest.skip("starlette.testclient needs httpx", allow_module_level=True)
+
+from benchmarks.fixtures import JD_TEXT, RESUME_TEXT, make_pdf
+from src.api import create_app
+from src.fake_llm import FakeLLMConfig, FakeOpenAI
+
+@pytest.fixture
+def api(fake_llm):
+    with TestClient(create_app(workers=2, client=fake_llm)) as client:
+        yield client
+
+def test_healthz(api):
+    body = api.get("/healthz").json()
+    assert body["status"] == "ok"
+    assert body["workers"] == 2
+    assert body["backend"] == "fake"
+
+def test_analyze_wait_returns_result(api):
+    r = api.post("/v1/analyze?wait=1", json={"resume_text": RESUME_TEXT, "jd_text": JD_TEXT})
+    assert r.status_code == 200
+    job = r.json()
+    assert job["status"] == "done"
+    assert job["result"]["ats_score_overall"] == 74
+    # keyword fields are computed locally, not taken from the model
+    assert "python" in job["result"]["matched_keywords"]
+    assert job["tokens"]["prompt_tokens"] > 0
+
+def test_analyze_stream_emits_fields_then_done(api):
+    r = api.post("/v1/analyze", json={"resume_text": RESUME_TEXT, "jd_text": JD_TEXT})
+    assert r.status_code == 202
+    with api.stream("GET", r.json()["stream_url"]) as s:
+        events = [json.loads(line) for line in s.iter_lines() if line]
+    assert [e["event"] for e in events[:-1]] == ["field"] * (len(events) - 1)
+    assert events[-1]["event"] == "done"
+    assert "ats_score_overall" in {e["field"] for e in events[:-1]}
+
+def test_followup_and_rewrite(api):
+    analysis = api.post("/v1/analyze?wait=1", json={"resume_text": RESUME_TEXT, "jd_text": JD_TEXT}).json()["result"]
+    r = api.post("/v1/followup?wait=1", json={
+        "resume_text": RESUME_TEXT, "jd_text": JD_TEXT, "analysis": analysis, "question": "Which certifications help?",
+    })
+    assert r.status_code == 200 and r.json()["result"]["answer"]
+    r = api.post("/v1/rewrite?wait=1", json={"resume_text": RESUME_TEXT, "jd_text": JD_TEXT, "rewrite_goal": "Emphasize MLOps"})
+    assert r.status_code == 200 and r.json()["result"]["rewrites"]
+
+@pytest.mark.parametrize("body", [[1, 2], "resume", 3, None])
+def test_non_object_body_is_rejected(api, body):
+    r = api.post("/v1/analyze", content=json.dumps(body), headers={"content-type": "application/json"})
+    assert r.status_code == 400
+
+def test_invalid_json_is_rejected(api):
+    r = api.post("/v1/analyze", content=b"{not json", headers={"content-type": "application/json"})
+    assert r.status_code == 400
+
+def test_missing_fields(api):
+    r = api.post("/v1/rewrite", json={"resume_text": RESUME_TEXT})
+    assert r.status_code == 422
+    assert "jd_text" in r.json()["error"] and "rewrite_goal" in r.json()["error"]
+
+def test_unknown_job(api):
+    assert api.get("/v1/jobs/nope").status_code == 404
+
+def test_extract_is_not_queued_behind_llm_jobs():
+    slow = FakeOpenAI(FakeLLMConfig(latency=1.5))
+    with TestClient(create_app(workers=1, client=slow)) as api:
+        for i in range(2):
+            api.post("/v1/analyze", json={"resume_text": f"{RESUME_TEXT} {i}", "jd_text": JD_TEXT})
+        started = time.perf_counter()
+        r = api.post("/v1/extract?filename=cv.txt", content=RESUME_TEXT.encode("utf-8"))
+        assert time.perf_counter() - started < 1.0
+    assert r.status_code == 200
+    assert r.json()["text"].startswith("Jane Doe")
+
+def test_extract_pdf(api):
+    r = api.post("/v1/extract?filename=cv.pdf", content=make_pdf(["Jane Doe", "Python and Kubernetes"]))
+    assert r.status_code == 200
+    assert r.json()["page_count"] == 2
+    assert "Kubernetes" in r.json()["text"]
+
+def test_end_to_end_through_stub_server(monkeypatch):
+    """
+    The real OpenAI SDK against the local stub server: the first request gets a 429 and is
+    retried by the client, the job still completes.
+    """
+    pytest.importorskip("openai")
+    from benchmarks.stub_server import StubBehavior, serve
+
+    with serve(StubBehavior(fail_first=1, retry_after=0.05)) as stub:
+        monkeypatch.setenv("ATS_LLM_BACKEND", "openai")
+        monkeypatch.setenv("OPENAI_API_KEY", "stub")
+        monkeypatch.setenv("OPENAI_BASE_URL", stub.base_url)
+        with TestClient(create_app(workers=2)) as api:
+            r = api.post("/v1/analyze?wait=1", json={"resume_text": RESUME_TEXT, "jd_text": JD_TEXT})
+        assert r.status_code == 200, r.json()
+        assert r.json()["result"]["ats_score_overall"] == 74
+        assert stub.requests == 2
@@ -0,0 +1,62 @@
+import io
+import zipfile
+
+from benchmarks.fixtures import JD_TEXT, RESUME_TEXT, resume_variant
+from src import batch
+from src.batch import iter_zip_sources, rank_results, rows_to_csv, run_batch, score_resume
+from src.client import ResilientClient, RetryPolicy
+from src.keywords import local_keyword_fields
+
+class Down:
+    def __init__(self):
+        self.calls = 0
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        raise ConnectionError("connection reset")
+
+def test_transport_errors_are_only_retried_by_the_client():
+    inner = Down()
+    client = ResilientClient(inner, RetryPolicy(max_retries=2, base_delay=0.0))
+    result = score_resume(client, "gpt-4o-mini", 0.2, "cv.txt", RESUME_TEXT.encode(), JD_TEXT, retries=2)
+    assert not result.ok and result.error.startswith("ConnectionError")
+    assert result.attempts == 1
+    assert inner.calls == 3  # 1 + the client's 2 retries, not multiplied by the batch
+
+def test_malformed_output_is_rerun(monkeypatch, fake_llm):
+    real = batch.analyze_resume_against_jd
+    outputs = iter(["Sorry, I can't produce JSON right now."])
+
+    def analyze(**kwargs):
+        return next(outputs, None) or real(**kwargs)
+
+    monkeypatch.setattr(batch, "analyze_resume_against_jd", analyze)
+    result = score_resume(fake_llm, "gpt-4o-mini", 0.2, "cv.txt", RESUME_TEXT.encode(), JD_TEXT, retries=2)
+    assert result.ok and result.attempts == 2
+    assert "python" in result.data["matched_keywords"]
+
+def test_run_batch_ranks_every_source(fake_llm):
+    sources = [(f"cv{i}.txt", resume_variant(i).encode()) for i in range(6)] + [("empty.txt", b"  ")]
+    results = list(run_batch(fake_llm, "gpt-4o-mini", 0.2, sources, JD_TEXT, workers=3,
+                             resume_budget=500, jd_budget=300))
+    assert len(results) == 7
+    rows = rank_results(results)
+    assert rows[-1]["Resume"] == "empty.txt" and rows[-1]["Rank"] is None
+    assert [r["Rank"] for r in rows[:6]] == [1, 2, 3, 4, 5, 6]
+    assert rows_to_csv(rows).splitlines()[0].startswith("Rank,Resume,Overall")
+    # keyword fields are counted together for each set of finished results
+    for r in results:
+        if r.ok:
+            assert r.data["matched_keywords"] == local_keyword_fields(r.resume_text, JD_TEXT)["matched_keywords"]
+
+def test_zip_sources_skip_unsupported_members():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("a.txt", "resume a")
+        zf.writestr("__MACOSX/._a.txt", "junk")
+        zf.writestr("notes.xlsx", "x")
+        zf.writestr("dir/b.md", "resume b")
+    buf.seek(0)
+    assert [name for name, _ in iter_zip_sources(buf)] == ["a.txt", "dir/b.md"]
@@ -0,0 +1,58 @@
+import time
+
+from src.cache import ResultCache, content_key
+
+def test_content_key_is_length_prefixed():
+    assert content_key("ab", "c") != content_key("a", "bc")
+    assert content_key("a", 1) == content_key("a", 1)
+
+def test_get_set_and_stats(tmp_path):
+    cache = ResultCache(tmp_path / "c.sqlite3")
+    assert cache.get("k") is None
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+def test_least_recently_used_is_evicted(tmp_path, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(time, "time", lambda: float(next(clock)))
+    cache = ResultCache(tmp_path / "c.sqlite3", max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # "b" is now the least recently used
+    cache.set("c", "3")
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = ResultCache(tmp_path / "c.sqlite3", ttl_seconds=60)
+    cache.set("old", "x")
+    now[0] += 30
+    cache.set("new", "y")
+    assert cache.get("old") == "x"  # reading does not extend the TTL
+    now[0] += 31
+    assert cache.get("old") is None
+    assert cache.get("new") == "y"
+    now[0] += 60
+    cache.set("newest", "z")  # writes purge everything expired
+    assert len(cache) == 1
+
+def test_zero_limits_disable_eviction(tmp_path):
+    cache = ResultCache(tmp_path / "c.sqlite3", max_entries=0, ttl_seconds=0)
+    for i in range(10):
+        cache.set(str(i), "v")
+    assert len(cache) == 10
+
+def test_run_analysis_reports_its_own_cache_hit(tmp_path, fake_llm):
+    from benchmarks.fixtures import JD_TEXT, RESUME_TEXT
+    from src.analyzer import run_analysis
+
+    cache = ResultCache(tmp_path / "c.sqlite3")
+    raw, hit = run_analysis(fake_llm, "gpt-4o-mini", 0.2, RESUME_TEXT, JD_TEXT, cache=cache)
+    assert not hit
+    cache.get("unrelated")  # another session's lookup does not flip this call's flag
+    assert run_analysis(fake_llm, "gpt-4o-mini", 0.2, RESUME_TEXT, JD_TEXT, cache=cache) == (raw, True)
+    assert run_analysis(fake_llm, "gpt-4o-mini", 0.2, RESUME_TEXT, JD_TEXT, cache=cache, refresh=True)[1] is False
@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from src.client import ResilientClient, RetryPolicy, backoff_delay, call_with_retry
+from src.fake_llm import FakeAPIError, FakeLLMConfig, FakeOpenAI
+from src.ratelimit import RateLimiter
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+class Scripted:
+    """
+    OpenAI-shaped client whose create() raises/sleeps per call from a script, then answers.
+    """
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.calls = 0
+        self.fake = FakeOpenAI(FakeLLMConfig(latency=0.0))
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        step = self.steps.pop(0) if self.steps else None
+        if isinstance(step, Exception):
+            raise step
+        if isinstance(step, float):
+            time.sleep(step)
+        return self.fake.chat.completions.create(**kwargs)
+
+def test_backoff_honors_retry_after_and_caps():
+    policy = RetryPolicy(jitter=False, base_delay=0.5, max_delay=4.0, max_retry_after=10.0)
+    assert [backoff_delay(a, policy) for a in range(5)] == [0.5, 1.0, 2.0, 4.0, 4.0]
+    assert backoff_delay(0, policy, FakeAPIError(429, retry_after=3)) == 3.0
+    assert backoff_delay(0, policy, FakeAPIError(429, retry_after=60)) == 10.0
+
+def test_retryable_errors_are_retried():
+    sleeps = []
+    fn_calls = iter([FakeAPIError(429, retry_after=0.5), ConnectionError("reset"), "ok"])
+
+    def fn():
+        step = next(fn_calls)
+        if isinstance(step, Exception):
+            raise step
+        return step
+
+    assert call_with_retry(fn, RetryPolicy(jitter=False), sleep=sleeps.append) == "ok"
+    assert sleeps == [0.5, 1.0]
+
+def test_other_errors_are_raised_at_once():
+    client = ResilientClient(Scripted(FakeAPIError(400)), RetryPolicy(base_delay=0.0))
+    with pytest.raises(FakeAPIError):
+        client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES)
+    assert client.stats.calls == 1 and client.stats.retries == 0 and client.stats.failures == 1
+
+def test_429_is_retried_and_pauses_the_limiter():
+    limiter = RateLimiter(rpm=600, headroom=1.0)
+    inner = Scripted(FakeAPIError(429, retry_after=0.05))
+    client = ResilientClient(inner, RetryPolicy(), limiter=limiter)
+    client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES)
+    assert inner.calls == 2 and client.stats.retries == 1
+    assert limiter.snapshot()["gpt-4o-mini"]["throttled"] == 1
+
+def test_failed_requests_refund_their_tokens():
+    limiter = RateLimiter(tpm=100_000, headroom=1.0)
+    client = ResilientClient(Scripted(FakeAPIError(400)), RetryPolicy(base_delay=0.0), limiter=limiter)
+    with pytest.raises(FakeAPIError):
+        client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES)
+    snap = limiter.snapshot()["gpt-4o-mini"]
+    assert snap["tokens_refunded"] == snap["tokens_estimated"] > 0
+    assert limiter._state("gpt-4o-mini").tokens.level == 100_000
+
+def test_slow_requests_are_hedged():
+    inner = Scripted(1.0)  # the first copy stalls, the duplicate answers at once
+    client = ResilientClient(inner, RetryPolicy(hedge_after=0.1))
+    started = time.perf_counter()
+    client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES)
+    assert time.perf_counter() - started < 0.8
+    assert client.stats.hedges == 1 and inner.calls == 2
+
+def test_rate_limit_wait_does_not_start_a_hedge():
+    limiter = RateLimiter(rpm=600, headroom=1.0)
+    limiter.throttled("gpt-4o-mini", 0.4)
+    inner = Scripted()
+    client = ResilientClient(inner, RetryPolicy(hedge_after=0.1), limiter=limiter)
+    client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES)
+    assert client.stats.hedges == 0 and inner.calls == 1
@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+import zipfile
+
+import pytest
+
+from src.export import SUMMARY_COLUMNS, ReportZipWriter, main, write_report_zip
+from src.fake_llm import DEFAULT_ANALYSIS
+from src.utils import iter_markdown_report, make_markdown_report
+
+def _analyses(n):
+    for i in range(n):
+        yield f"Candidate {i}.pdf", dict(DEFAULT_ANALYSIS, ats_score_overall=50 + i)
+
+def test_zip_layout_and_summaries():
+    buf = io.BytesIO()
+    stats = write_report_zip(_analyses(3), buf)
+    assert (stats.candidates, stats.reports, stats.failed) == (3, 6, 0)
+    with zipfile.ZipFile(buf) as zf:
+        names = zf.namelist()
+        assert "reports/0001-candidate-0.md" in names and "reports/0003-candidate-2.html" in names
+        assert names[-2:] == ["summary.csv", "summary.jsonl"]
+        assert zf.getinfo("summary.csv").date_time[0] > 1980
+        rows = list(csv.DictReader(io.StringIO(zf.read("summary.csv").decode("utf-8"))))
+        lines = [json.loads(ln) for ln in zf.read("summary.jsonl").decode("utf-8").splitlines()]
+        markdown = zf.read("reports/0002-candidate-1.md").decode("utf-8")
+    assert list(rows[0]) == SUMMARY_COLUMNS
+    assert [r["Overall"] for r in rows] == ["50", "51", "52"]
+    assert lines[1]["reports"] == ["reports/0002-candidate-1.md", "reports/0002-candidate-1.html"]
+    expected = "\n".join(iter_markdown_report(dict(DEFAULT_ANALYSIS, ats_score_overall=51),
+                                             title="ATS Report — Candidate 1.pdf"))
+    assert markdown.rstrip("\n") == expected
+
+def test_failed_candidates_get_a_summary_row_only():
+    buf = io.BytesIO()
+    with ReportZipWriter(buf, formats=["md"]) as writer:
+        writer.add("ok.pdf", DEFAULT_ANALYSIS, model="gpt-4o-mini")
+        writer.add("broken.pdf", None, error="Could not extract text.")
+    assert (writer.stats.reports, writer.stats.failed) == (1, 1)
+    with zipfile.ZipFile(buf) as zf:
+        assert [n for n in zf.namelist() if n.startswith("reports/")] == ["reports/0001-ok.md"]
+        rows = list(csv.DictReader(io.StringIO(zf.read("summary.csv").decode("utf-8"))))
+    assert rows[1]["Error"] == "Could not extract text." and rows[1]["Report"] == ""
+    assert rows[0]["Model"] == "gpt-4o-mini"
+
+def test_analyses_are_consumed_lazily():
+    seen = []
+
+    def source():
+        for name, data in _analyses(2):
+            seen.append(name)
+            yield name, data
+
+    with ReportZipWriter(io.BytesIO()) as writer:
+        for name, data in source():
+            writer.add(name, data)
+            assert len(seen) == writer.stats.candidates
+
+def test_markdown_report_is_streamed_in_pieces():
+    pieces = list(iter_markdown_report(DEFAULT_ANALYSIS))
+    assert len(pieces) > 10
+    assert "\n".join(pieces) == make_markdown_report(DEFAULT_ANALYSIS)
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        ReportZipWriter(io.BytesIO(), formats=["pdf"])
+
+def test_cli_exports_jsonl(tmp_path):
+    src = tmp_path / "analyses.jsonl"
+    src.write_text("\n".join(json.dumps({"name": n, "analysis": d}) for n, d in _analyses(2)), encoding="utf-8")
+    out = tmp_path / "out.zip"
+    assert main([str(out), "--jsonl", str(src), "--formats", "md"]) == 0
+    with zipfile.ZipFile(out) as zf:
+        assert len([n for n in zf.namelist() if n.endswith(".md")]) == 2
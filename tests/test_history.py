@@ -0,0 +1,50 @@
+import sqlite3
+
+from src.history import AnalysisHistory, AnalysisRecord
+
+def _record(owner, score=70):
+    return AnalysisRecord(data={"ats_score_overall": score, "role_title_inferred": "Engineer"},
+                          resume_text="resume", jd_text="jd", model="gpt-4o-mini", temperature=0.2, owner=owner)
+
+def test_sessions_only_see_their_own_analyses(tmp_path):
+    history = AnalysisHistory(tmp_path / "h.sqlite3")
+    mine = history.save(_record("alice"))
+    theirs = history.save(_record("bob"))
+    assert [r.id for r in history.list("alice")] == [mine]
+    assert history.get(theirs, "alice") is None
+    assert history.get(mine, "alice").resume_text == "resume"
+    history.delete(theirs, "alice")
+    history.clear("alice")
+    assert history.count("bob") == 1 and history.count("alice") == 0
+    # the export CLI reads every session's analyses
+    assert [r.owner for r in history.list(None)] == ["bob"]
+
+def test_in_memory_history(tmp_path):
+    history = AnalysisHistory(":memory:", max_entries=2)
+    for score in (1, 2, 3):
+        history.save(_record("s", score))
+    assert [r.data["ats_score_overall"] for r in history.list("s")] == [3, 2]
+
+def test_rows_saved_before_scoping_belong_to_nobody(tmp_path):
+    path = tmp_path / "old.sqlite3"
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE analyses (id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL NOT NULL,"
+        " model TEXT NOT NULL, temperature REAL NOT NULL, resume_name TEXT NOT NULL, role TEXT NOT NULL,"
+        " score INTEGER, data TEXT NOT NULL, resume_text TEXT NOT NULL, jd_text TEXT NOT NULL)"
+    )
+    conn.execute("INSERT INTO analyses (created, model, temperature, resume_name, role, score, data, resume_text, jd_text)"
+                 " VALUES (1, 'm', 0, '', '', 1, '{}', 'r', 'j')")
+    conn.commit()
+    conn.close()
+    history = AnalysisHistory(path)
+    assert history.list("anyone") == []
+    assert len(history) == 1
+
+def test_eviction_is_per_owner(tmp_path):
+    history = AnalysisHistory(tmp_path / "h.sqlite3", max_entries=2)
+    history.save(_record("quiet", 1))
+    for score in (2, 3, 4, 5):
+        history.save(_record("busy", score))
+    assert [r.data["ats_score_overall"] for r in history.list("busy")] == [5, 4]
+    assert [r.data["ats_score_overall"] for r in history.list("quiet")] == [1]
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from benchmarks.fixtures import JD_TEXT, RESUME_TEXT
+from src.analyzer import analyze_resume_against_jd
+from src.cache import ResultCache
+from src.history import AnalysisRecord
+from src.incremental import (
+    INCREMENTAL_MAX_CHANGED, diff_sections, reanalyze_incremental, section_keyword_fields, segment_resume,
+)
+from src.fake_llm import FakeLLMConfig, FakeOpenAI
+from src.keywords import apply_local_keywords, local_keyword_fields
+
+MODEL = "gpt-4o-mini"
+
+@pytest.fixture
+def prior(fake_llm):
+    data = json.loads(analyze_resume_against_jd(fake_llm, MODEL, 0.2, RESUME_TEXT, JD_TEXT))
+    return AnalysisRecord(apply_local_keywords(data, RESUME_TEXT, JD_TEXT), RESUME_TEXT, JD_TEXT, MODEL, 0.2)
+
+def test_section_counts_match_whole_document_counts():
+    assert section_keyword_fields(RESUME_TEXT, JD_TEXT) == local_keyword_fields(RESUME_TEXT, JD_TEXT)
+
+def test_unchanged_resume_needs_no_model_call(fake_llm, prior):
+    calls = fake_llm.calls
+    # whitespace-only differences are not edits
+    result = reanalyze_incremental(fake_llm, MODEL, 0.2, prior, RESUME_TEXT.replace("\n", " \n"), JD_TEXT)
+    assert result is not None and not result.diff.edited
+    assert fake_llm.calls == calls
+    assert result.data == prior.data
+
+def test_small_edit_rescores_affected_fields_only(fake_llm, prior):
+    edited = RESUME_TEXT.replace("Git", "Git, Terraform")
+    calls = fake_llm.calls
+    result = reanalyze_incremental(fake_llm, MODEL, 0.2, prior, edited, JD_TEXT)
+    assert result is not None
+    assert result.diff.changed == ["skills"]
+    assert fake_llm.calls == calls + 1
+    assert {"ats_score_overall", "section_scores"} <= set(result.rescored)
+    assert "tailored_summary" not in result.rescored
+    assert "terraform" in result.data["matched_keywords"]
+
+def test_falls_back_to_full_analysis(fake_llm, prior):
+    rewritten = "Completely different person\n" * 5
+    before, after = segment_resume(prior.resume_text), segment_resume(rewritten)
+    assert diff_sections(before, after).changed_ratio > INCREMENTAL_MAX_CHANGED
+    assert reanalyze_incremental(fake_llm, MODEL, 0.2, prior, rewritten, JD_TEXT) is None
+    edited = RESUME_TEXT.replace("Git", "Git, Terraform")
+    assert reanalyze_incremental(fake_llm, "gpt-4o", 0.2, prior, edited, JD_TEXT) is None
+    assert reanalyze_incremental(fake_llm, MODEL, 0.2, prior, edited, JD_TEXT + "\nRust") is None
+
+def test_incremental_results_are_cached(fake_llm, prior, tmp_path):
+    cache = ResultCache(tmp_path / "c.sqlite3")
+    edited = RESUME_TEXT.replace("Git", "Git, Terraform")
+    first = reanalyze_incremental(fake_llm, MODEL, 0.2, prior, edited, JD_TEXT, cache=cache)
+    calls = fake_llm.calls
+    second = reanalyze_incremental(fake_llm, MODEL, 0.2, prior, edited, JD_TEXT, cache=cache)
+    assert second.from_cache and fake_llm.calls == calls
+    assert second.data == first.data
+
+def test_cached_patches_are_keyed_on_the_prior_analysis(fake_llm, prior, tmp_path):
+    cache = ResultCache(tmp_path / "c.sqlite3")
+    edited = RESUME_TEXT.replace("Git", "Git, Terraform")
+    reanalyze_incremental(fake_llm, MODEL, 0.2, prior, edited, JD_TEXT, cache=cache)
+    other = AnalysisRecord({**prior.data, "ats_score_overall": 31}, RESUME_TEXT, JD_TEXT, MODEL, 0.2)
+    result = reanalyze_incremental(fake_llm, MODEL, 0.2, other, edited, JD_TEXT, cache=cache)
+    assert not result.from_cache
+
+def test_failed_patch_falls_back_to_full_analysis(prior):
+    edited = RESUME_TEXT.replace("Git", "Git, Terraform")
+
+    class Down:
+        def __init__(self):
+            self.chat = self.completions = self
+
+        def create(self, **kwargs):
+            raise ConnectionError("connection reset")
+
+    assert reanalyze_incremental(Down(), MODEL, 0.2, prior, edited, JD_TEXT) is None
+    garbled = FakeOpenAI(FakeLLMConfig(latency=0.0, recordings=[{"match": "", "response": "no JSON here"}]))
+    assert reanalyze_incremental(garbled, MODEL, 0.2, prior, edited, JD_TEXT) is None
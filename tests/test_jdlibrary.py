@@ -0,0 +1,24 @@
+import json
+
+from src.jdlibrary import JDLibrary, iter_jd_sources
+
+def test_jsonl_ingest_keeps_titles(tmp_path):
+    path = tmp_path / "postings.jsonl"
+    path.write_text("\n".join(json.dumps(rec) for rec in [
+        {"title": "Senior Data Engineer", "text": "We are hiring!\nSpark, Airflow and SQL."},
+        {"text": "Frontend Developer\nReact and TypeScript."},
+        {"title": "Senior Data Engineer", "text": "We are hiring!\nSpark, Airflow and SQL."},
+    ]) + "\n", encoding="utf-8")
+    library = JDLibrary(tmp_path / "jd.sqlite3")
+    assert library.add_many(iter_jd_sources(path)) == (2, 1)
+    assert [(r["title"], r["source"]) for r in library.list()] == [
+        ("Senior Data Engineer", "postings.jsonl:1"),
+        ("Frontend Developer", "postings.jsonl:2"),
+    ]
+
+def test_folder_ingest_titles_postings_by_first_line(tmp_path):
+    (tmp_path / "jds").mkdir()
+    (tmp_path / "jds" / "ml.txt").write_text("ML Engineer\nPyTorch and MLOps.", encoding="utf-8")
+    library = JDLibrary(tmp_path / "jd.sqlite3")
+    library.add_many(iter_jd_sources(tmp_path / "jds"))
+    assert [(r["title"], r["source"]) for r in library.list()] == [("ML Engineer", "ml.txt")]
@@ -0,0 +1,46 @@
+import json
+
+from src.fake_llm import DEFAULT_ANALYSIS
+from src.jsonstream import TopLevelFieldParser
+from src.schema import salvage_json
+
+def _feed_in_chunks(text, size):
+    parser = TopLevelFieldParser()
+    out = []
+    for i in range(0, len(text), size):
+        out.extend(parser.feed(text[i:i + size]))
+    return parser, out
+
+def test_fields_arrive_as_they_close():
+    parser = TopLevelFieldParser()
+    assert parser.feed('{"ats_score_overall": 8') == []
+    assert parser.feed('1, "section_scores": {"SkillsMatch"') == [("ats_score_overall", 81)]
+    assert parser.feed(': 70}, "red_flags": []}') == [("section_scores", {"SkillsMatch": 70}), ("red_flags", [])]
+    assert parser.done
+    assert parser.feed('{"more": 1}') == []
+
+def test_any_chunking_yields_the_whole_object():
+    text = json.dumps(DEFAULT_ANALYSIS, indent=2)
+    for size in (1, 3, 17, len(text)):
+        parser, out = _feed_in_chunks(text, size)
+        assert dict(out) == DEFAULT_ANALYSIS
+        assert [k for k, _ in out] == list(DEFAULT_ANALYSIS)
+        assert parser.done
+
+def test_structural_characters_inside_strings_are_ignored():
+    text = r'{"a": "x, y: {z}] \"q\" \\", "b": ["}", {"c": ","}]}'
+    _, out = _feed_in_chunks(text, 2)
+    assert out == [("a", 'x, y: {z}] "q" \\'), ("b", ["}", {"c": ","}])]
+
+def test_salvage_keeps_fields_closed_before_truncation():
+    text = json.dumps(DEFAULT_ANALYSIS)
+    cut = text[: text.index('"tailored_summary"') + 25]
+    salvaged = salvage_json("Here you go:\n" + cut)
+    assert "recommendations" in salvaged
+    assert "tailored_summary" not in salvaged
+    assert salvaged["ats_score_overall"] == DEFAULT_ANALYSIS["ats_score_overall"]
+
+def test_salvage_of_non_objects():
+    assert salvage_json("") == {}
+    assert salvage_json("[1, 2]") == {}
+    assert salvage_json("no json here") == {}
@@ -0,0 +1,59 @@
+from src.keywords import (
+    batch_keyword_fields, extract_jd_keywords, jd_keyword_matcher, local_keyword_fields, stem, tokenize,
+)
+
+JD = """Senior Backend Engineer
+Requirements:
+- 5+ years with .NET and C#
+- Kubernetes and AWS
+Nice to have:
+- Terraform
+"""
+
+def test_tokenize_keeps_symbols_in_skill_names():
+    assert tokenize("C++, C#, Node.js and .NET Core") == ["c++", "c#", "node.js", "and", ".net", "core"]
+
+def test_stem_folds_plurals_but_not_short_or_mixed_tokens():
+    assert stem("models") == "model"
+    assert stem("deployed") == "deploy"
+    assert stem("k8s") == "k8s"
+    assert stem("class") == "class"
+
+def test_dotnet_does_not_match_the_word_net():
+    fields = local_keyword_fields("Grew net revenue 20% as a C# developer", JD)
+    assert ".net" in fields["missing_critical_keywords"]
+    assert "c#" in fields["matched_keywords"]
+    for resume in ("Built .NET Core services", "ASP.NET MVC", "dotnet CLI tooling"):
+        assert ".net" in local_keyword_fields(resume, JD)["matched_keywords"], resume
+
+def test_aliases_count_for_the_canonical_skill():
+    fields = local_keyword_fields("Ran k8s clusters on Amazon Web Services", JD)
+    assert {"kubernetes", "aws"} <= set(fields["matched_keywords"])
+
+def test_preferred_skills_are_not_critical():
+    critical = {k.phrase: k.critical for k in extract_jd_keywords(JD) if k.is_skill}
+    assert critical["kubernetes"] and critical[".net"]
+    assert not critical["terraform"]
+    assert "terraform" not in local_keyword_fields("", JD)["missing_critical_keywords"]
+
+def test_jd_keywords_are_extracted_once_per_jd():
+    jd_keyword_matcher.cache_clear()
+    for resume in ("Python", "Java", "Go"):
+        local_keyword_fields(resume, JD)
+    info = jd_keyword_matcher.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+
+def test_density_matrix_matches_per_resume_counts():
+    resumes = ["Python and k8s", "", "C# on .NET, more C#", "Terraform"]
+    matcher = jd_keyword_matcher(JD)
+    matrix = matcher.density_matrix(resumes)
+    assert matrix.shape == (len(resumes), len(matcher.keywords))
+    assert [row.tolist() for row in matrix] == [matcher.count(r) for r in resumes]
+    assert batch_keyword_fields(resumes, JD) == [local_keyword_fields(r, JD) for r in resumes]
+
+def test_section_counts_are_memoized_on_the_shared_matcher():
+    jd_keyword_matcher.cache_clear()
+    matcher = jd_keyword_matcher(JD)
+    assert matcher.count_sections(["Kubernetes", "AWS"]) == matcher.count("Kubernetes AWS")
+    matcher.count_sections(["Kubernetes", "AWS and C#"])
+    assert matcher.counted == 3
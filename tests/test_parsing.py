@@ -0,0 +1,58 @@
+from benchmarks.fixtures import make_pdf
+from src.compaction import compact_resume
+from src.parsing import extract_document
+from src.parsing import get_structured_resume
+
+RESUME = """Jane Doe
+jane@example.com | +1 555 123 4567
+
+Experience
+Data Scientist, Acme (Mar 2021 - Present)
+- Cut churn 12% with a Python model
+- Built dashboards for the sales team
+Analyst, Initech (2018 - 2021)
+- Automated 40 weekly reports
+
+Skills
+Python, SQL
+
+Interests
+Chess, hiking
+"""
+
+def test_structured_resume_records():
+    doc = get_structured_resume(RESUME)
+    assert doc.kinds == ["preamble", "experience", "skills", "interests"]
+    assert [(doc.text_of(d), d.current) for d in doc.dates] == [("Mar 2021 - Present", True), ("2018 - 2021", False)]
+    assert [b.quantified for b in doc.bullets] == [True, False, True]
+    # years inside date ranges are not results
+    assert [doc.text_of(q) for b in doc.bullets for q in b.quantities] == ["12%", "40"]
+    assert doc.contact.email == "jane@example.com"
+
+def test_select_sections():
+    doc = get_structured_resume(RESUME)
+    assert doc.select(["skills"]) == "Skills\nPython, SQL"
+    assert "Chess" not in doc.select(exclude=["interests"])
+    assert [s.kind for s in doc.as_sections(exclude=["interests"])] == ["preamble", "experience", "skills"]
+
+def test_unscored_sections_are_not_sent():
+    compacted = compact_resume(RESUME)
+    assert "Python, SQL" in compacted.text and "Chess" not in compacted.text
+
+def test_failed_pdf_page_does_not_drop_the_rest(monkeypatch):
+    from pdfminer.pdfinterp import PDFPageInterpreter
+
+    process_page = PDFPageInterpreter.process_page
+    calls = []
+
+    def flaky(self, page):
+        calls.append(page)
+        if len(calls) == 2:
+            raise ValueError("bad content stream")
+        return process_page(self, page)
+
+    monkeypatch.setattr(PDFPageInterpreter, "process_page", flaky)
+    doc = extract_document("cv.pdf", make_pdf(["first page", "second page", "third page"]), workers=0)
+    assert len(doc.pages) == 3
+    assert "first page" in doc.pages[0] and doc.pages[1] == "" and "third page" in doc.pages[2]
+    assert doc.page_errors == {2: "ValueError: bad content stream"}
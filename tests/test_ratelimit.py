@@ -0,0 +1,90 @@
+import threading
+import time
+
+from src.ratelimit import (
+    BATCH, INTERACTIVE, RateLimiter, current_priority, estimate_tokens, limits_for, parse_limits, request_priority,
+)
+
+MODEL = "gpt-4o-mini"
+
+def _wait_for_queue(limiter, n, model=MODEL):
+    deadline = time.monotonic() + 5
+    while limiter.snapshot()[model]["queued"] < n:
+        assert time.monotonic() < deadline, "callers never queued"
+        time.sleep(0.005)
+
+def test_priority_context():
+    assert current_priority() == INTERACTIVE
+    with request_priority(BATCH):
+        assert current_priority() == BATCH
+    assert current_priority() == INTERACTIVE
+
+def test_limits_and_estimates():
+    assert limits_for("gpt-4o-mini-2024-07-18") == limits_for("gpt-4o-mini")
+    assert limits_for("unknown-model", rpm=7).rpm == 7
+    messages = [{"role": "user", "content": "word " * 100}]
+    assert estimate_tokens({"model": MODEL, "messages": messages, "max_tokens": 50}) < estimate_tokens(
+        {"model": MODEL, "messages": messages}
+    )
+
+def test_overrides_per_model():
+    rpm = parse_limits("100, gpt-4o=5000 ,gpt-4o-mini=30000")
+    assert rpm == {"*": 100, "gpt-4o": 5000, "gpt-4o-mini": 30000}
+    assert parse_limits("") == {}
+    assert limits_for("gpt-4o-mini-2024-07-18", rpm=rpm).rpm == 30000
+    assert limits_for("gpt-4o", rpm=rpm).rpm == 5000
+    assert limits_for("gpt-4.1", rpm=rpm).rpm == 100
+    tpm = parse_limits("gpt-4o=50000")
+    assert limits_for("gpt-4o", tpm=tpm).tpm == 50000
+    assert limits_for("gpt-4o-mini", tpm=tpm) == limits_for("gpt-4o-mini")
+
+def test_requests_within_budget_do_not_wait():
+    limiter = RateLimiter(rpm=600, tpm=100_000, headroom=1.0)
+    assert limiter.acquire(MODEL, 100) < 0.01
+    assert limiter.snapshot()[MODEL]["delayed"] == 0
+
+def test_interactive_requests_overtake_queued_batch_requests():
+    limiter = RateLimiter(tpm=600, headroom=1.0)  # 10 tokens/s: one 3-token request every 0.3s
+    # hold everyone while the queue forms, then start from an empty bucket so grants are spaced out
+    limiter.throttled(MODEL, 1.0)
+    limiter._state(MODEL).tokens.level = -10
+    order = []
+
+    def call(name, priority):
+        limiter.acquire(MODEL, 3, priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=call, args=(f"batch{i}", BATCH)) for i in range(2)]
+    for i, t in enumerate(threads):
+        t.start()
+        _wait_for_queue(limiter, i + 1)
+    late = threading.Thread(target=call, args=("interactive", INTERACTIVE))
+    late.start()
+    _wait_for_queue(limiter, 3)
+    snap = limiter.snapshot()[MODEL]
+    assert snap["queued_batch"] == 2 and snap["queued_interactive"] == 1
+    for t in [*threads, late]:
+        t.join(5)
+    assert order == ["interactive", "batch0", "batch1"]
+    assert limiter.snapshot()[MODEL]["delayed"] == 3
+
+def test_throttled_pauses_every_caller():
+    limiter = RateLimiter(rpm=600, headroom=1.0)
+    limiter.throttled(MODEL, 0.2)
+    waited = limiter.acquire(MODEL, 1)
+    assert 0.15 < waited < 1.0
+    assert limiter.snapshot()[MODEL]["throttled"] == 1
+
+def test_reconcile_returns_overestimated_tokens():
+    limiter = RateLimiter(tpm=1000, headroom=1.0)
+    limiter.acquire(MODEL, 900)
+    limiter.reconcile(MODEL, 900, 100)
+    assert limiter.acquire(MODEL, 800) < 0.05
+    assert limiter.snapshot()[MODEL]["tokens_used"] == 100
+
+def test_release_refunds_a_failed_request():
+    limiter = RateLimiter(tpm=1000, headroom=1.0)
+    limiter.acquire(MODEL, 900)
+    limiter.release(MODEL, 900)
+    assert limiter.acquire(MODEL, 900) < 0.05
+    assert limiter.snapshot()[MODEL]["tokens_refunded"] == 900
@@ -0,0 +1,91 @@
+import copy
+import json
+
+from src.analyzer import analyze_resume_against_jd, validate_and_repair
+from src.fake_llm import DEFAULT_ANALYSIS, FakeLLMConfig, FakeOpenAI
+from src.prompts import ANALYSIS_JSON_SCHEMA
+from src.schema import LOCAL_SCORE_KEYS, schema_for_fields, validate_analysis
+from src.tracing import trace
+
+def _analysis(**changes):
+    data = copy.deepcopy(DEFAULT_ANALYSIS)
+    data.update(changes)
+    return data
+
+def test_valid_analysis_passes_unchanged():
+    result = validate_analysis(_analysis())
+    assert result.ok and not result.coerced and not result.defaulted
+
+def test_locally_computed_scores_are_not_asked_for_or_required():
+    assert not any(k in ANALYSIS_JSON_SCHEMA for k in LOCAL_SCORE_KEYS)
+    assert not any(k in DEFAULT_ANALYSIS["section_scores"] for k in LOCAL_SCORE_KEYS)
+    # a merged analysis keeps them
+    merged = _analysis(section_scores={**DEFAULT_ANALYSIS["section_scores"], "FormattingATS": "85"})
+    result = validate_analysis(merged)
+    assert result.ok and result.data["section_scores"]["FormattingATS"] == 85
+
+def test_near_misses_are_coerced():
+    data = _analysis(
+        ats_score_overall="82%",
+        section_scores={**DEFAULT_ANALYSIS["section_scores"], "Education": 140},
+        recommendations=[{"area": "Skills", "severity": "Medium", "suggestion": "Add Terraform."}],
+        hard_requirements={"met": "yes"},
+    )
+    result = validate_analysis(data)
+    assert result.ok
+    assert result.data["ats_score_overall"] == 82
+    assert result.data["section_scores"]["Education"] == 100
+    assert result.data["recommendations"][0] == {
+        "area": "Skills", "severity": "med", "suggestion": "Add Terraform.", "example_rewrite": "",
+    }
+    assert result.data["hard_requirements"] == {"met": True, "details": []}
+    assert set(result.coerced) == {"ats_score_overall", "section_scores", "recommendations", "hard_requirements"}
+
+def test_missing_required_and_optional_fields():
+    data = _analysis()
+    del data["tailored_summary"], data["red_flags"]
+    data["tailored_bullets"] = []
+    result = validate_analysis(data)
+    assert set(result.invalid) == {"tailored_summary", "tailored_bullets"}
+    assert result.defaulted == ["red_flags"] and result.data["red_flags"] == []
+
+def test_schema_slice_covers_only_requested_fields():
+    block = schema_for_fields(["tailored_summary", "red_flags"])
+    assert '"tailored_summary"' in block and '"red_flags"' in block
+    assert '"section_scores"' not in block
+
+def test_repair_regenerates_only_the_broken_fields(fake_llm):
+    data = _analysis(ats_score_overall="not a number")
+    del data["tailored_summary"]
+    with trace("t") as tr:
+        result = validate_and_repair(fake_llm, "gpt-4o-mini", 0.2, "resume", "jd", data)
+    assert result.ok
+    assert sorted(result.repaired) == ["ats_score_overall", "tailored_summary"]
+    assert result.data["tailored_summary"] == DEFAULT_ANALYSIS["tailored_summary"]
+    [call] = tr.llm_calls
+    assert call.label == "repair"
+
+def test_failed_repair_keeps_the_validation_result():
+    broken = FakeOpenAI(FakeLLMConfig(latency=0.0, error_rate=1.0, error_status=400))
+    data = _analysis()
+    del data["tailored_summary"]
+    result = validate_and_repair(broken, "gpt-4o-mini", 0.2, "resume", "jd", data)
+    assert result.invalid == ["tailored_summary"]
+    assert result.repair_error
+
+def test_truncated_analysis_is_completed_by_repair():
+    text = json.dumps(_analysis(ats_score_overall="82%"))
+    truncated = text[: text.index('"tailored_summary"') + 30]
+
+    class Truncating(FakeOpenAI):
+        def _pick(self, messages):
+            # the full analysis comes back cut off; the repair request is answered normally
+            if "previous answer" in messages[-1]["content"]:
+                return super()._pick(messages)
+            return truncated
+
+    client = Truncating(FakeLLMConfig(latency=0.0))
+    out = json.loads(analyze_resume_against_jd(client, "gpt-4o-mini", 0.2, "Python developer", "Need Python"))
+    assert out["ats_score_overall"] == 82
+    assert out["tailored_summary"] == DEFAULT_ANALYSIS["tailored_summary"]
+    assert client.calls == 2
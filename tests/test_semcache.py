@@ -0,0 +1,34 @@
+from src.semcache import SemanticCache, vectorize
+
+SCOPE = "resume+jd"
+
+def test_rewordings_are_similar():
+    a = vectorize("How can I quantify my impact in the experience section?")
+    b = vectorize("how do I quantify impact in my experience section")
+    assert a.similarity(b) > 0.85
+
+def test_different_skills_numbers_or_negation_never_match():
+    base = vectorize("Should I add Python to my skills?")
+    assert base.similarity(vectorize("Should I add Java to my skills?")) == 0.0
+    assert vectorize("Is 5 years enough?").similarity(vectorize("Is 3 years enough?")) == 0.0
+    assert vectorize("Mention Docker").similarity(vectorize("Do not mention Docker")) == 0.0
+
+def test_lookup_within_scope():
+    cache = SemanticCache(threshold=0.85)
+    cache.set(SCOPE, "How can I quantify my impact?", "answer")
+    hit = cache.lookup(SCOPE, "how do I quantify my impact")
+    assert hit is not None and hit.value == "answer" and hit.query == "How can I quantify my impact?"
+    assert cache.get("other scope", "How can I quantify my impact?") is None
+    assert cache.get(SCOPE, "Which certifications should I get?") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+
+def test_least_recently_used_entries_are_evicted():
+    cache = SemanticCache(max_entries=2)
+    cache.set(SCOPE, "first question about python", "1")
+    cache.set(SCOPE, "second question about java", "2")
+    assert cache.get(SCOPE, "first question about python") == "1"
+    cache.set(SCOPE, "third question about go", "3")
+    assert len(cache) == 2 and cache.stats()["evictions"] == 1
+    assert cache.get(SCOPE, "second question about java") is None
+    assert cache.get(SCOPE, "first question about python") == "1"